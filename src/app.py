@@ -5,9 +5,12 @@ import os
 import config
 
 
-from file_handle import save_uploaded_file, save_cleaned_df_to_file_and_update_session_state, load_file_standardize_header
+from file_handle import save_uploaded_file, save_cleaned_df_to_file_and_update_session_state, load_dataset, export_cleaned_df_to_excel
+from file_handle import read_available_columns, required_columns, read_dataset_version, is_streamed_file
+from file_handle import read_tail_columns, load_tail_dataset, start_tail_watcher
 from file_handle import save_clustered_df_to_file_and_update_session_state
-from data_wrangle import clean_df, add_columns, remove_outliers
+from data_wrangle import clean_df, add_columns, exact_iqr_bounds, outlier_mask, filter_validity_masks
+from data_wrangle import DERIVED_CHANNELS, get_default_channels, get_computable_channels
 # from manage_projects import handle_load_project, handle_save_project, handle_delete_project
 from state import ensure_key_in_session_state
 from app_interface import show_sidebar
@@ -20,6 +23,16 @@ st.set_page_config(
 )
 
 
+def clean_tail_rows(df):
+    """
+    Apply the stored cleaning to raw rows of a followed log: the cleaned columns, then the outlier fences.
+    """
+    df = clean_df(df, [column for column in st.session_state['cleaned_columns'] if column in df.columns])
+    bounds = {column: bounds for column, bounds in st.session_state['outlier_bounds'].items()
+              if column in df.columns}
+    return df[outlier_mask(df, bounds)]
+
+
 def main():
 
     # # DEBUG: Create a button, when clicking, the session state will be shown by st.write()
@@ -32,6 +45,10 @@ def main():
     ensure_key_in_session_state('clusters', [])
     ensure_key_in_session_state('loaded_count', 0)
     ensure_key_in_session_state('features', [])
+    # Validity masks of the cleaned columns, so newly selected columns only compute their own
+    ensure_key_in_session_state('validity_masks', {})
+    # IQR fences of the columns outliers were removed from, applied again to the rows of a followed log
+    ensure_key_in_session_state('outlier_bounds', {})
 
     columns_to_clean_already = ensure_key_in_session_state(
         'cleaned_columns', [])
@@ -54,6 +71,15 @@ def main():
             if file_path:
                 st.session_state['loaded_file'] = file_path
 
+        # When uploading several wells, save every file and keep the list of paths,
+        # the wells are loaded concurrently and combined with a 'well ()' column
+        elif len(uploaded_files) > 1:
+            file_paths = [save_uploaded_file(uploaded_file)
+                          for uploaded_file in uploaded_files]
+            file_paths = [file_path for file_path in file_paths if file_path]
+            if file_paths:
+                st.session_state['loaded_file'] = file_paths
+
     if st.session_state['loaded_file'] is not None:
 
         # For debug
@@ -62,14 +88,62 @@ def main():
 
         st.markdown("---")
 
-        df = load_file_standardize_header(
-            st.session_state['loaded_file'])
-
-        if st.session_state['loaded_count'] == 0:
-            # DEBUG
-            # st.write(
-            #     "Add columns BIT_DIAMETER (in), DOC (in/rev), Mu (), and MSE (ksi)")
-            df = add_columns(df)
+        # A CSV/TXT log still being written can be followed: a background watcher ingests the rows
+        # appended to the live file (not the uploaded copy, which never grows), and only those
+        # are parsed and standardized; a rerun loads what was ingested so far
+        loaded_file = st.session_state['loaded_file']
+        follow_log = st.checkbox("Follow growing log", key='follow_log')
+        log_path = st.text_input(
+            "Path of the live log (CSV/TXT)", key='follow_log_path').strip() if follow_log else ''
+        if follow_log and not (os.path.isfile(log_path) and os.path.splitext(
+                log_path)[1].lower() in ('.csv', '.txt')):
+            if log_path:
+                st.warning(f"{log_path} is not a CSV/TXT file")
+            follow_log = False
+        tail_watcher = st.session_state.get('tail_watcher')
+        if follow_log:
+            if tail_watcher is None or tail_watcher[0] != log_path:
+                if tail_watcher is not None:
+                    tail_watcher[2].set()
+                st.session_state['tail_watcher'] = (
+                    log_path, *start_tail_watcher(log_path))
+            st.button("Refresh")
+        elif tail_watcher is not None:
+            tail_watcher[2].set()
+            del st.session_state['tail_watcher']
+
+        # Push the columns selected for cleaning and by the features down into the reader,
+        # so channels nobody uses are never parsed, unit-converted or stored
+        available_columns = (read_tail_columns(log_path) if follow_log else None) \
+            or read_available_columns(loaded_file)
+        selected_columns = set(st.session_state.get(
+            'columns_to_clean', columns_to_clean_already))
+        for feature in st.session_state['features']:
+            selected_columns.update(feature.required_columns())
+        projected_columns = required_columns(
+            available_columns, selected_columns) if selected_columns else None
+
+        # A raw file, the raw files of several wells (loaded concurrently)
+        # or the memory-mapped channel store of the cleaned dataset
+        with st.spinner("Loading data..."):
+            # The ingested rows of a followed log already have the derived columns
+            tail_df = load_tail_dataset(
+                log_path, columns=projected_columns) if follow_log else None
+            df = tail_df if tail_df is not None else load_dataset(
+                st.session_state['loaded_file'], columns=projected_columns)
+        if tail_df is not None:
+            st.write(f"{len(tail_df)} rows ingested from {log_path}")
+
+        # Add the default derived channels (DOC, Mu, MSE) and the selected ones on every run;
+        # they are recomputed from their inputs, which costs less than checking whether these changed
+        derived_channels = get_default_channels() + \
+            [column for column in selected_columns if column in DERIVED_CHANNELS]
+        df = add_columns(df, derived_channels)
+
+        # The rows of a followed log are raw, including the ones appended since the last clean, so once
+        # the dataset is cleaned every rerun applies the cleaned columns and the stored outlier fences
+        if tail_df is not None and st.session_state['is_df_cleaned']:
+            df = clean_tail_rows(df)
         # st.write(df.columns)
         st.write(df)
 
@@ -78,8 +152,14 @@ def main():
         col1, col2 = st.columns(2)
 
         with col1:
+            # Offer every channel of the file, not only the loaded ones,
+            # and the derived channels that can be computed from them
+            column_options = available_columns + \
+                [column for column in df.columns if column not in available_columns]
+            column_options += [column for column in get_computable_channels(column_options + ['BIT_DIAMETER (in)'])
+                               if column not in column_options]
             columns_to_clean = st.multiselect(
-                "Select columns to clean", df.columns, columns_to_clean_already)
+                "Select columns to clean", column_options, columns_to_clean_already, key='columns_to_clean')
 
         with col2:
             removed_outlier_columns = [
@@ -89,39 +169,93 @@ def main():
 
         column_to_clean_diff = list(
             set(columns_to_clean) - set(columns_to_clean_already))
+        # Outliers are removed once per column from the stored dataset; like cleaning, this is not undone
+        outlier_column_diff = [column for column in column_to_remove_outliers
+                               if column not in st.session_state['removed_outlier_columns']]
 
-        if len(column_to_clean_diff) > 0:
+        if len(column_to_clean_diff) > 0 or len(outlier_column_diff) > 0:
             st.session_state['is_df_cleaned'] = False
 
         proceed_clicked = st.button(
             "Proceed", disabled=st.session_state['is_df_cleaned'])
 
-        if proceed_clicked or st.session_state['is_df_cleaned']:
-            with st.spinner("Cleaning data..."):
-                st.session_state['cleaned_columns'] = columns_to_clean
-                st.session_state['removed_outlier_columns'] = column_to_remove_outliers
-
-                if not st.session_state['is_df_cleaned']:
-                    # Clean df based on the columns not cleaned yet
-                    df = clean_df(df, column_to_clean_diff)
+        # Clean, remove outliers and save only when Proceed is clicked for a new selection;
+        # other reruns use the stored dataset as it is
+        if proceed_clicked and not st.session_state['is_df_cleaned']:
+            if tail_df is None and is_streamed_file(st.session_state['loaded_file']):
+                # A large raw file is cleaned and filtered chunk by chunk while it is ingested, so it is
+                # never held whole in memory; the result is cached and memory-mapped
+                with st.spinner("Cleaning data and removing outliers while loading..."):
+                    df = load_dataset(st.session_state['loaded_file'], channels=derived_channels,
+                                      clean_columns=columns_to_clean, outlier_columns=outlier_column_diff)
+                    st.session_state['cleaned_columns'] = columns_to_clean
+                    columns_to_clean_already = columns_to_clean
+                    # The cached masks describe the raw file
+                    st.session_state['validity_masks'] = {}
+                    st.success("Data cleaned successfully!")
+            else:
+                # The cleaned dataset keeps every channel, not only the projected ones, so channels
+                # that were not selected can still be added to the cleaning later. All channels are
+                # only read when a new clean is saved; other reruns keep the projected frame, and a
+                # newly selected channel widens the projection, so only that channel of the store is mapped
+                if projected_columns is not None:
+                    with st.spinner("Loading all channels..."):
+                        full_df = load_tail_dataset(log_path) if tail_df is not None else None
+                        if full_df is None:
+                            full_df = load_dataset(st.session_state['loaded_file'])
+                        df = add_columns(full_df, derived_channels)
+
+                with st.spinner("Cleaning data..."):
+                    st.session_state['cleaned_columns'] = columns_to_clean
+                    if tail_df is not None:
+                        # The rows of a followed log are raw: clean every selected column
+                        df = clean_tail_rows(df)
+                    else:
+                        # Clean df based on the columns not cleaned yet; the masks cached for the
+                        # loaded dataset version are reused
+                        df = clean_df(df, column_to_clean_diff,
+                                      mask_cache=st.session_state['validity_masks'],
+                                      version=read_dataset_version(st.session_state['loaded_file']))
                     # Update the columns already cleaned
                     columns_to_clean_already = columns_to_clean
-
-                st.success("Data cleaned successfully!")
-
-            if len(column_to_remove_outliers) > 0:
-                with st.spinner("Removing outliers..."):
-                    df = remove_outliers(df, column_to_remove_outliers)
-                    st.success("Outliers removed successfully!")
-
+                    st.success("Data cleaned successfully!")
+
+                if len(outlier_column_diff) > 0:
+                    with st.spinner("Removing outliers..."):
+                        # The outlier columns are among the cleaned columns; their fences are kept
+                        # for the rows a followed log appends later
+                        bounds = exact_iqr_bounds(df, outlier_column_diff)
+                        keep = outlier_mask(df, bounds)
+                        df = df[keep]
+                        filter_validity_masks(st.session_state['validity_masks'], keep)
+                        st.session_state['outlier_bounds'].update(bounds)
+                        st.success("Outliers removed successfully!")
+
+            st.session_state['removed_outlier_columns'] = sorted(
+                set(st.session_state['removed_outlier_columns']) | set(outlier_column_diff))
             st.session_state['is_df_cleaned'] = True
-            save_cleaned_df_to_file_and_update_session_state(df)
+            save_cleaned_df_to_file_and_update_session_state(
+                df, {'operation': 'cleaning',
+                     'cleaned_columns': sorted(st.session_state['cleaned_columns']),
+                     'removed_outlier_columns': st.session_state['removed_outlier_columns']})
+            # The cached masks now describe the saved dataset
+            st.session_state['validity_masks']['version'] = read_dataset_version(
+                st.session_state['loaded_file'])
 
     if st.session_state.get('is_df_cleaned', False):
 
         cleaned_columns = st.session_state['cleaned_columns']
         st.write(df.head())
 
+        # Excel is only generated on request, the working format is Parquet
+        if st.button("Export to Excel"):
+            with st.spinner("Exporting to Excel..."):
+                excel_path = export_cleaned_df_to_excel(
+                    st.session_state['loaded_file'])
+            with open(excel_path, "rb") as f:
+                st.download_button("Download Excel file", f.read(),
+                                   file_name=os.path.basename(excel_path))
+
         st.markdown("---")
 
         for i, feature in enumerate(st.session_state["features"]):
@@ -23,6 +23,6 @@ def show_sidebar():
         st.write("---")
 
         uploaded_files = st.file_uploader(
-            "Choose files", type=["csv", "txt"], accept_multiple_files=True)
+            "Choose files", type=["csv", "txt", "las", "xlsx", "xls", "gz", "zip", "parquet"], accept_multiple_files=True)
 
     return uploaded_files
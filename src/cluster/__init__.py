@@ -1,3 +1,3 @@
-from .cluster import perform_kmeans
+from .cluster import perform_kmeans, select_kmeans_mode
 
-__all__ = ['perform_kmeans']
+__all__ = ['perform_kmeans', 'select_kmeans_mode']
@@ -1,16 +1,276 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score, calinski_harabasz_score
 from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
 
 import streamlit as st
 
-from utils import get_columns_by_mnemonics
+from config import config_constants
+from utils import get_columns_by_mnemonics, forget_cluster_partition
 
 
-def perform_kmeans(df, columns, k=None, k_min=2, k_max=11):
+# Column whose values split multi-well datasets into wells, sampled evenly to seed mini-batch k-means
+CHUNK_COLUMN = 'well ()'
 
+# Arrays shared with the k-sweep workers, attached once per worker process by `attach_shared_arrays`
+_shared_arrays = {}
+
+
+def select_kmeans_mode(n_rows, mode='auto'):
+    """
+    Resolve the clustering mode for a dataset.
+
+    Parameters:
+    n_rows (int): The number of rows to cluster.
+    mode (str, optional): 'full', 'minibatch' or 'auto'. 'auto' uses mini-batch k-means from
+        config_constants['kmeans_minibatch_min_rows'] rows. Defaults to 'auto'.
+
+    Returns:
+    str: 'full' or 'minibatch'.
+    """
+    if mode not in ('full', 'minibatch', 'auto'):
+        raise ValueError(f"Unsupported k-means mode: {mode}. Supported modes are: ['full', 'minibatch', 'auto']")
+    if mode == 'auto':
+        return 'minibatch' if n_rows >= config_constants['kmeans_minibatch_min_rows'] else 'full'
+    return mode
+
+
+def stratified_sample_indices(labels, sample_size, random_state=1):
+    """
+    Draw a sample of rows stratified by group (cluster or well), each group keeping its share of the rows (and
+    at least two rows, when it has them, so every cluster counts in the silhouette).
+
+    Parameters:
+    labels (numpy.ndarray): The cluster label, or group code, of every row.
+    sample_size (int): The approximate number of rows to draw.
+    random_state (int, optional): The seed. Defaults to 1.
+
+    Returns:
+    numpy.ndarray: The sorted positions of the sampled rows; all rows if there are at most sample_size.
+    """
+    n_rows = len(labels)
+    if n_rows <= sample_size:
+        return np.arange(n_rows)
+
+    rng = np.random.default_rng(random_state)
+    fraction = sample_size / n_rows
+    samples = []
+    for label in np.unique(labels):
+        positions = np.flatnonzero(labels == label)
+        size = min(len(positions), max(2, int(round(len(positions) * fraction))))
+        samples.append(rng.choice(positions, size=size, replace=False))
+    return np.sort(np.concatenate(samples))
+
+
+def sampled_silhouette_score(data, labels, sample_size=config_constants['silhouette_sample_size'],
+                             random_state=1):
+    """
+    Estimate the silhouette score on a stratified sample of the rows (see `stratified_sample_indices`).
+
+    The exact score is quadratic in the number of rows; on a sample of fixed size its cost no longer grows
+    with the dataset. Datasets of at most sample_size rows get the exact score.
+    """
+    sample = stratified_sample_indices(labels, sample_size, random_state)
+    return silhouette_score(data[sample], labels[sample])
+
+
+def fit_minibatch_kmeans(data, k, chunk_codes=None, batch_size=config_constants['kmeans_batch_size'],
+                         n_init=3, epochs=config_constants['kmeans_epochs']):
+    """
+    Fit mini-batch k-means and label every row.
+
+    Without chunk codes the model is fitted on all rows at once (sklearn draws the mini-batches). With chunk
+    codes, e.g. the wells of a multi-well dataset, the centers are seeded by k-means on a sample stratified
+    across the chunk groups, so every well is represented in the initialization, and the model is then
+    fitted with `partial_fit` on batches shuffled across all wells, over several epochs. Feeding the wells
+    one after the other instead would let the first well decide the centers.
+
+    Parameters:
+    data (numpy.ndarray): The scaled features.
+    k (int): The number of clusters.
+    chunk_codes (numpy.ndarray, optional): An integer group code per row. Defaults to None.
+    batch_size (int, optional): The mini-batch size.
+    n_init (int, optional): The number of initializations, of the whole fit or of the seeding k-means.
+        Defaults to 3.
+    epochs (int, optional): The passes over the rows with chunk codes. Defaults to
+        config_constants['kmeans_epochs'].
+
+    Returns:
+    tuple: (fitted MiniBatchKMeans, labels)
+    """
+    if chunk_codes is None:
+        kmeans = MiniBatchKMeans(n_clusters=k, random_state=1, batch_size=batch_size, n_init=n_init)
+        kmeans.fit(data)
+        return kmeans, kmeans.labels_
+
+    if len(data) < k:
+        raise ValueError(f"n_samples={len(data)} should be >= n_clusters={k}.")
+
+    # Seed the centers from every well, as MiniBatchKMeans does from its first 3 * batch_size rows
+    seed_rows = stratified_sample_indices(chunk_codes, max(3 * batch_size, k))
+    centers = KMeans(n_clusters=k, random_state=1, n_init=n_init).fit(data[seed_rows]).cluster_centers_
+
+    kmeans = MiniBatchKMeans(n_clusters=k, init=centers, n_init=1, random_state=1, batch_size=batch_size)
+    rng = np.random.default_rng(1)
+    for _ in range(epochs):
+        order = rng.permutation(len(data))
+        for start in range(0, len(order), batch_size):
+            kmeans.partial_fit(data[order[start:start + batch_size]])
+    return kmeans, kmeans.predict(data)
+
+
+def evaluate_k(data, k, mode='full', chunk_codes=None,
+               silhouette_sample_size=config_constants['silhouette_sample_size']):
+    """
+    Fit k-means for one k of the k-sweep and score the clusters.
+
+    Returns:
+    tuple: ({'k', 'inertia', 'silhouette', 'calinski_harabasz', 'fit_time_s', 'total_time_s'}, labels)
+    """
+    start = time.perf_counter()
+    if mode == 'minibatch':
+        kmeans, labels = fit_minibatch_kmeans(data, k, chunk_codes)
+        inertia = -kmeans.score(data)
+    else:
+        kmeans = KMeans(n_clusters=k, random_state=1, n_init=10)
+        kmeans.fit(data)
+        labels, inertia = kmeans.labels_, kmeans.inertia_
+    fit_time = time.perf_counter() - start
+
+    metrics = {
+        'k': k,
+        'inertia': float(inertia),
+        'silhouette': float(sampled_silhouette_score(data, labels, silhouette_sample_size)),
+        'calinski_harabasz': float(calinski_harabasz_score(data, labels)),
+        'fit_time_s': fit_time,
+        'total_time_s': time.perf_counter() - start,
+    }
+    return metrics, labels
+
+
+def share_array(array):
+    """
+    Copy an array into a new shared memory block.
+
+    Returns:
+    tuple: (SharedMemory, descriptor {'name', 'shape', 'dtype'} to attach it with `attach_shared_arrays`)
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, {'name': shm.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+
+def attach_shared_arrays(descriptors, n_threads):
+    """
+    Attach a k-sweep worker to the shared arrays (initializer of the process pool of `sweep_k`).
+
+    The arrays are read in place, without copies. The native thread pools of the worker are limited to
+    n_threads, so the workers together do not use more threads than there are CPUs.
+    """
+    for key, descriptor in descriptors.items():
+        if descriptor is None:
+            _shared_arrays[key] = None
+            continue
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+        # The SharedMemory object is kept with the view, which is only valid while the block is open
+        _shared_arrays[key] = (shm, np.ndarray(descriptor['shape'], dtype=descriptor['dtype'], buffer=shm.buf))
+    threadpool_limits(limits=n_threads)
+
+
+def evaluate_shared_k(k, mode, silhouette_sample_size):
+    """
+    Run `evaluate_k` in a k-sweep worker, on the shared arrays.
+    """
+    data = _shared_arrays['data'][1]
+    chunk_codes = _shared_arrays['chunk_codes'][1] if _shared_arrays['chunk_codes'] is not None else None
+    return evaluate_k(data, k, mode, chunk_codes, silhouette_sample_size)
+
+
+def sweep_k(data, ks, mode='full', chunk_codes=None,
+            silhouette_sample_size=config_constants['silhouette_sample_size'],
+            max_workers=config_constants['clustering_max_workers']):
+    """
+    Fit and score k-means for every k (see `evaluate_k`), one k per worker process.
+
+    The scaled features (and the chunk codes) are copied once into shared memory, which every worker reads in
+    place, instead of being pickled to each worker. With one worker the sweep runs in this process.
+
+    Parameters:
+    data (numpy.ndarray): The scaled features.
+    ks (iterable of int): The numbers of clusters to try.
+    mode (str, optional): 'full' or 'minibatch'. Defaults to 'full'.
+    chunk_codes (numpy.ndarray, optional): The chunk group of every row, in 'minibatch' mode.
+    silhouette_sample_size (int, optional): The rows sampled for the silhouette score.
+    max_workers (int, optional): The maximum number of worker processes. Defaults to
+        config_constants['clustering_max_workers']; None uses the number of CPUs.
+
+    Returns:
+    tuple: (list of the metrics of every k, in order, {k: labels})
+    """
+    ks = list(ks)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(ks)))
+
+    if max_workers == 1:
+        results = [evaluate_k(data, k, mode, chunk_codes, silhouette_sample_size) for k in ks]
+    else:
+        shared = []
+        try:
+            descriptors = {}
+            for key, array in (('data', data), ('chunk_codes', chunk_codes)):
+                descriptors[key] = None
+                if array is not None:
+                    shm, descriptors[key] = share_array(array)
+                    shared.append(shm)
+
+            n_threads = max(1, (os.cpu_count() or 1) // max_workers)
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=attach_shared_arrays,
+                                     initargs=(descriptors, n_threads)) as executor:
+                futures = [executor.submit(evaluate_shared_k, k, mode, silhouette_sample_size) for k in ks]
+                results = [future.result() for future in futures]
+        finally:
+            for shm in shared:
+                shm.close()
+                shm.unlink()
+
+    return [metrics for metrics, _ in results], {k: labels for k, (_, labels) in zip(ks, results)}
+
+
+def perform_kmeans(df, columns, k=None, k_min=2, k_max=11, mode='full',
+                   silhouette_sample_size=config_constants['silhouette_sample_size']):
+    """
+    Cluster the rows of a DataFrame with k-means and add their labels as a 'cluster ()' column.
+
+    With k=None, every k from k_min to k_max - 1 is tried in parallel (see `sweep_k`) and the k with the
+    highest silhouette score is used. The silhouette is estimated on a stratified sample of
+    silhouette_sample_size rows (see `sampled_silhouette_score`). In 'minibatch' mode the clusters are fitted with mini-batch k-means, and a
+    multi-well dataset (with a 'well ()' column) is seeded from every well and fitted with `partial_fit` on
+    batches shuffled across wells (see `fit_minibatch_kmeans`).
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame, modified in place.
+    columns (list of str): The mnemonics of the columns to cluster on.
+    k (int, optional): The number of clusters. Defaults to None, which selects it by silhouette score.
+    k_min (int, optional): The smallest k tried. Defaults to 2.
+    k_max (int, optional): One more than the largest k tried. Defaults to 11.
+    mode (str, optional): 'full', 'minibatch' or 'auto' (see `select_kmeans_mode`). Defaults to 'full'.
+    silhouette_sample_size (int, optional): The rows sampled for the silhouette score. Defaults to
+        config_constants['silhouette_sample_size'].
+
+    Returns:
+    tuple: (df, the metrics of each k tried (see `evaluate_k`; empty when k is given), k)
+    """
     columns = get_columns_by_mnemonics(df, columns)
+    mode = select_kmeans_mode(len(df), mode)
 
     # Extract the columns for clustering
     data = df[columns]
@@ -19,17 +279,19 @@ def perform_kmeans(df, columns, k=None, k_min=2, k_max=11):
     scaler = StandardScaler()
     data = scaler.fit_transform(data)
 
-    # List to hold the silhouette scores for each k
-    silhouette_scores = []
+    chunk_codes = None
+    if mode == 'minibatch' and CHUNK_COLUMN in df.columns:
+        chunk_codes = pd.factorize(df[CHUNK_COLUMN])[0]
+
+    # Metrics of each k tried, and the labels of each k, reused for the selected k
+    sweep_metrics = []
+    labels_by_k = {}
 
     if k is None:
 
-        # Test k from 2 to 10 (silhouette score requires at least 2 clusters)
-        for k in range(k_min, k_max):
-            kmeans = KMeans(n_clusters=k, random_state=1, n_init=10)
-            kmeans.fit(data)
-            score = silhouette_score(data, kmeans.labels_)
-            silhouette_scores.append(score)
+        # Test k from k_min to k_max - 1 (silhouette score requires at least 2 clusters), in parallel
+        sweep_metrics, labels_by_k = sweep_k(data, range(k_min, k_max), mode, chunk_codes, silhouette_sample_size)
+        silhouette_scores = [metrics['silhouette'] for metrics in sweep_metrics]
 
         # Plot the silhouette scores for each k
         plt.plot(range(k_min, k_max), silhouette_scores, marker='o')
@@ -38,14 +300,24 @@ def perform_kmeans(df, columns, k=None, k_min=2, k_max=11):
         plt.show()
 
         # Find the k with the highest silhouette score
-        k = silhouette_scores.index(max(silhouette_scores)) + 2
+        k = silhouette_scores.index(max(silhouette_scores)) + k_min
 
-    # Perform KMeans with the specified or optimal number of clusters
-    kmeans = KMeans(n_clusters=k, random_state=1)
-    kmeans.fit(data)
+    # Perform KMeans with the specified number of clusters; the selected k was already fitted by the sweep
+    if k in labels_by_k:
+        labels = labels_by_k[k]
+    elif mode == 'minibatch':
+        _, labels = fit_minibatch_kmeans(data, k, chunk_codes)
+    else:
+        kmeans = KMeans(n_clusters=k, random_state=1)
+        kmeans.fit(data)
+        labels = kmeans.labels_
 
     # Add the cluster labels to the original DataFrame if there is no cluster column
     # already, otherwise replace the existing cluster column
-    df['cluster ()'] = kmeans.labels_
+    df['cluster ()'] = labels
+
+    # The per-cluster stages group the rows of the frame they read on first use (see
+    # `utils.get_cluster_partition`); this frame is saved and reloaded, so no partition is built for it here
+    forget_cluster_partition(df)
 
-    return df, silhouette_scores, k
+    return df, sweep_metrics, k
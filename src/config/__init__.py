@@ -1,8 +1,9 @@
-from .config import config_constants, temp_directory, projects_directory, each_project_folders, header_patterns, setup_temp_folder, root_directory
+from .config import config_constants, temp_directory, projects_directory, cache_directory, each_project_folders, header_patterns, setup_temp_folder, root_directory
 
 __all__ = ['config_constants',
            'temp_directory',
            'projects_directory',
+           'cache_directory',
            'each_project_folders',
            'header_patterns',
            'root_directory']
@@ -7,6 +7,8 @@ root_directory = os.path.dirname(
 
 temp_directory = os.path.join(root_directory, "temp_folder")
 projects_directory = os.path.join(root_directory, "projects")
+# Kept outside temp_folder so cached datasets are not copied into saved projects
+cache_directory = os.path.join(root_directory, "cache_folder")
 
 each_project_folders = {
     'state_folder': 'state_folder',
@@ -21,6 +23,36 @@ config_constants = {
     # clustering
     'k_min': 2,
     'k_max': 11,
+    # 'auto' clusters with mini-batch k-means from kmeans_minibatch_min_rows rows, else 'full' or 'minibatch'
+    'kmeans_mode': 'auto',
+    'kmeans_minibatch_min_rows': 200_000,
+    'kmeans_batch_size': 4096,
+    # passes over the rows when multi-well data is fitted batch by batch
+    'kmeans_epochs': 3,
+    # rows sampled (stratified by cluster) to estimate the silhouette score of each k
+    'silhouette_sample_size': 10_000,
+    # parallel k-sweep of auto-clustering, None uses the number of CPUs
+    'clustering_max_workers': None,
+    # on-disk cache of standardized datasets
+    'cache_size_limit_mb': 2048,
+    # chunked ingestion of large CSV/TXT logs
+    'streaming_threshold_mb': 512,
+    'streaming_chunk_rows': 250_000,
+    # parallel multi-well ingestion, None uses the number of CPUs
+    'ingestion_max_workers': None,
+    # downcast loaded frames (float32, categoricals, Arrow strings)
+    'compact_dtypes': False,
+    # incremental ingestion of growing real-time logs
+    'tail_poll_interval_s': 5,
+    # rows appended by polls are merged into the last Parquet part until it holds this many rows
+    'tail_part_rows': 250_000,
+    # column multi-sheet Excel workbooks tag each sheet's rows with: 'well' or 'section'
+    'excel_sheet_tag': 'well',
+    # outlier removal: 'combined' (one pass over all columns) or 'sequential' (column by column, legacy);
+    # streamed files with at least outlier_approx_min_rows rows use approximate quartiles from a t-digest
+    'outlier_method': 'combined',
+    'outlier_approx_min_rows': 5_000_000,
+    'tdigest_compression': 1000,
 }
 
 
@@ -57,7 +89,9 @@ header_patterns = {
     "VOLUME": None,
     # We'll set this dynamically in the get_volume_pattern function
     # ... rest of your patterns ...
-    "cluster": r".*cluster.*"
+    "cluster": r".*cluster.*",
+    "well": r"^well$",
+    "section": r"^section$"
 }
 
 
@@ -1,5 +1,7 @@
 from .clean_df import clean_df, clean_df_by_mnemonics, remove_outliers, remove_outliers_by_mnemonics
+from .clean_df import remove_outliers_from_chunks, exact_iqr_bounds, outlier_mask, filter_validity_masks
 from .add_columns import add_columns
+from .derived_channels import DERIVED_CHANNELS, register_derived_channel, get_default_channels, get_computable_channels
 
 # TODO: Need to migrate this to the new one
 from .prepare_plot_data import prepare_data_for_plotting
@@ -10,7 +12,15 @@ __all__ = [
     'clean_df_by_mnemonics',
     'remove_outliers',
     'remove_outliers_by_mnemonics',
+    'remove_outliers_from_chunks',
+    'exact_iqr_bounds',
+    'outlier_mask',
+    'filter_validity_masks',
     'add_columns',
+    'DERIVED_CHANNELS',
+    'register_derived_channel',
+    'get_default_channels',
+    'get_computable_channels',
 
     # TODO: Need to migrate to new ones
     ' prepare_data_for_plotting'
@@ -1,29 +1,25 @@
-import numpy as np
-import pandas as pd
-from utils import get_columns_by_mnemonics
 import config
+from .derived_channels import compute_derived_channels, get_default_channels
 
 
-def add_columns(df):
+def add_columns(df, channels=None):
+    """
+    Add the bit diameter and derived channels (see `derived_channels.DERIVED_CHANNELS`) to a DataFrame.
 
-    if 'BIT_DIAMETER (in)' not in df.columns:
-        df['BIT_DIAMETER (in)'] = config.config_constants['bit_diameter']
-
-    def add_column_if_not_exists(mnemonics, new_column, calculation):
-        columns = get_columns_by_mnemonics(df, mnemonics)
-        if len(columns) == len(mnemonics) and not get_columns_by_mnemonics(df, [new_column]):
-            columns_dict = dict(zip(mnemonics, columns))
-            df[new_column] = calculation(df, columns_dict)
+    The channels are recomputed from their inputs on every call, in dependency order (see
+    `derived_channels.compute_derived_channels`), so they always follow the inputs of the frame.
 
-    add_column_if_not_exists(['ROP', 'BIT_RPM'], 'DOC (in/rev)',
-                             lambda df, cols: df[cols['ROP']] * 39.3701 / 60 / df[cols['BIT_RPM']])
+    Parameters:
+    df (pandas.DataFrame): The DataFrame, modified in place.
+    channels (list of str, optional): The derived channels to add. Defaults to None, which adds the default
+        channels (DOC, Mu and MSE).
 
-    add_column_if_not_exists(['WOB', 'TORQUE', 'BIT_DIAMETER'], 'Mu ()',
-                             lambda df, cols: df[cols['TORQUE']] / (df[cols['WOB']] * df[cols['BIT_DIAMETER']] / 36))
-
-    add_column_if_not_exists(['WOB', 'TORQUE', 'BIT_RPM', 'ROP', 'BIT_DIAMETER'], 'MSE (ksi)',
-                             lambda df, cols: (df[cols['WOB']] / np.pi * (df[cols['BIT_DIAMETER']] / 2)**2) +
-                             480 * df[cols['TORQUE']] * df[cols['BIT_RPM']] /
-                             (df[cols['BIT_DIAMETER']]**2 * df[cols['ROP']]))
+    Returns:
+    pandas.DataFrame: df.
+    """
+    if 'BIT_DIAMETER (in)' not in df.columns:
+        df['BIT_DIAMETER (in)'] = config.config_constants['bit_diameter']
 
-    return df
+    if channels is None:
+        channels = get_default_channels()
+    return compute_derived_channels(df, channels)
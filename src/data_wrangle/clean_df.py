@@ -1,33 +1,116 @@
 import numpy as np
 import pandas as pd
+from config import config_constants
 from utils import get_columns_by_mnemonics
+from .quantile_sketch import new_tdigest, tdigest_update, tdigest_quantile
 
 
-def clean_df(df, columns, bit_diameter=8.5):
+def column_validity_mask(series):
+    """
+    Compute the validity mask of a column: True where its value, coerced to numeric, is positive.
+
+    Zeros, negative numbers, NaN and non-numeric values are invalid, so rows where every cleaned column is 0
+    are invalid as well.
+
+    Parameters:
+    series (pandas.Series): The column.
+
+    Returns:
+    tuple: (numpy.ndarray of bool, the numeric column, or None if the column already was numeric)
+    """
+    numeric = None
+    if not pd.api.types.is_numeric_dtype(series):
+        numeric = pd.to_numeric(series, errors='coerce')
+        values = numeric.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+
+    # NaN compares False, so missing values are invalid
+    with np.errstate(invalid='ignore'):
+        return values > 0, numeric
+
+
+def get_validity_masks(df, columns, mask_cache=None, version=None):
+    """
+    Return the validity mask of each column (see `column_validity_mask`), computing only the missing ones.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame the masks describe.
+    columns (list of str): The columns.
+    mask_cache (dict, optional): {'version': ..., 'masks': {column: mask}}, the masks already computed for the
+        dataset version 'version'. New masks are added to it. When `version` differs, or is None, the masks
+        were computed for another dataset (possibly with the same number of rows) and are discarded.
+    version (str, optional): The version of the dataset `df` was loaded from (see `dataset_version`).
+
+    Returns:
+    tuple: (dict of column -> mask, dict of column -> numeric column for the columns that had to be converted)
+    """
+    if mask_cache is None:
+        mask_cache = {}
+    masks = mask_cache.setdefault("masks", {})
+    if version is None or mask_cache.get("version") != version \
+            or any(len(mask) != len(df) for mask in masks.values()):
+        masks.clear()
+        mask_cache["version"] = version
+
+    converted = {}
+    for column in columns:
+        if column not in masks:
+            masks[column], numeric = column_validity_mask(df[column])
+            if numeric is not None:
+                converted[column] = numeric
+    return {column: masks[column] for column in columns}, converted
+
+
+def filter_validity_masks(mask_cache, keep):
+    """
+    Filter the cached validity masks with the rows kept by a later step (e.g. outlier removal), so they keep
+    describing the frame. See `get_validity_masks`.
+    """
+    masks = mask_cache.get("masks", {})
+    for column in masks:
+        masks[column] = masks[column][keep]
+
+
+def clean_df(df, columns, bit_diameter=8.5, mask_cache=None, version=None):
     """
     Cleans the DataFrame by handling zero values, non-numeric values, specific outliers, and missing values in specified columns.
 
     This function drops rows where all specified columns are 0, converts the specified columns to numeric (handling non-numeric values by coercing them to NaN), replaces negative numbers or 0 with NaN, drops rows where any specified column is NaN, and adds a 'BIT_DIAMETER (in)' column if it doesn't exist.
 
+    All of this comes down to keeping the rows where every specified column is a positive number, so one boolean
+    validity mask is computed per column in NumPy (see `column_validity_mask`), the masks are ANDed and the
+    rows are filtered once. With `mask_cache`, the masks of columns cleaned before are reused, so cleaning newly
+    selected columns only computes their masks. The cached masks are then filtered with the rows, so they
+    describe the returned DataFrame.
+
     Parameters:
     df (pandas.DataFrame): The input DataFrame to be cleaned.
     columns (list of str): A list of column names to be cleaned.
     bit_diameter (float, optional): The bit diameter to be used in the cleaning process. Defaults to 8.5.
+    mask_cache (dict, optional): Validity masks of the dataset version `version`, reused and updated (see
+        `get_validity_masks`), e.g. st.session_state['validity_masks']. Defaults to None, which computes every mask.
+    version (str, optional): The version of the dataset `df` was loaded from. The cached masks are only reused
+        for the same version. Defaults to None, which computes every mask.
 
     Returns:
     pandas.DataFrame: The cleaned DataFrame.
     """
-    # Drop rows where all specified columns are 0
-    df = df.loc[~(df[columns] == 0).all(axis=1)]
+    masks, converted = get_validity_masks(df, columns, mask_cache, version)
+
+    keep = np.ones(len(df), dtype=bool)
+    for mask in masks.values():
+        keep &= mask
 
-    # Convert specified columns to numeric and handle non-numeric values
-    df[columns] = df[columns].apply(pd.to_numeric, errors='coerce')
+    # A shallow copy, so the columns set below do not reach the caller's frame
+    df = (df if keep.all() else df[keep]).copy(deep=False)
 
-    # Replace negative numbers with NaN
-    df[columns] = df[columns].map(lambda x: np.nan if x <= 0 else x)
+    # Non-numeric columns are replaced by their numeric conversion; the rows kept are all positive
+    for column, numeric in converted.items():
+        df[column] = numeric.to_numpy()[keep]
 
-    # Drop rows where any specified column is NaN
-    df = df.dropna(subset=columns)
+    if mask_cache is not None and not keep.all():
+        filter_validity_masks(mask_cache, keep)
 
     # Add bit_diameter column
     df["BIT_DIAMETER (in)"] = df.get("BIT_DIAMETER (in)", bit_diameter)
@@ -63,7 +146,126 @@ def clean_df_by_mnemonics(df, mnemonics, bit_diameter=8.5):
     return df
 
 
-def remove_outliers(df, columns, cleaned_df=False):
+def numeric_column_values(df, column):
+    """
+    Return a column as a float array, coercing non-numeric values to NaN.
+    """
+    series = df[column]
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors='coerce')
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+def iqr_bounds(quartiles):
+    """
+    Return the IQR fences Q1 - 1.5*IQR and Q3 + 1.5*IQR from the (Q1, Q3) quartiles.
+    """
+    q1, q3 = quartiles
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def exact_iqr_bounds(df, columns):
+    """
+    Compute the IQR fences of several columns of an in-memory frame, with exact quartiles (NaN values ignored).
+
+    Returns:
+    dict: column -> (lower fence, upper fence).
+    """
+    values = np.column_stack([numeric_column_values(df, column) for column in columns]) \
+        if columns else np.empty((len(df), 0))
+    quartiles = np.nanquantile(values, [0.25, 0.75], axis=0) if len(df) else np.full((2, len(columns)), np.nan)
+    return {column: iqr_bounds(quartiles[:, i]) for i, column in enumerate(columns)}
+
+
+def chunked_iqr_bounds(chunks, columns, approx_min_rows=config_constants['outlier_approx_min_rows'],
+                       compression=config_constants['tdigest_compression']):
+    """
+    Compute the IQR fences of several columns in one pass over chunks.
+
+    The values of the columns are kept while fewer than `approx_min_rows` rows were read, and the quartiles are
+    exact. Past that, they are moved into one t-digest per column (see `quantile_sketch`) and the quartiles are
+    approximate, so large inputs are never held whole. Chunks from chunked ingestion (e.g.
+    `file_handle.stream_file.iter_standardized_chunks`) can be passed directly.
+
+    Parameters:
+    chunks (iterable of pandas.DataFrame): The chunks.
+    columns (list of str): The columns.
+    approx_min_rows (int, optional): The number of rows from which the quartiles are approximate. Defaults to
+        config_constants['outlier_approx_min_rows']; None never approximates.
+    compression (float, optional): The accuracy of the digests. Defaults to config_constants['tdigest_compression'].
+
+    Returns:
+    dict: column -> (lower fence, upper fence).
+    """
+    values = {column: [] for column in columns}
+    digests = None
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for column in columns:
+            values[column].append(numeric_column_values(chunk, column))
+        if digests is None and approx_min_rows is not None and rows >= approx_min_rows:
+            digests = {column: new_tdigest() for column in columns}
+        if digests is not None:
+            for column in columns:
+                tdigest_update(digests[column], np.concatenate(values[column]), compression)
+                values[column] = []
+
+    if digests is not None:
+        return {column: iqr_bounds(tdigest_quantile(digests[column], [0.25, 0.75]))
+                for column in columns}
+    return exact_iqr_bounds(pd.DataFrame({column: np.concatenate(values[column]) if values[column]
+                                          else np.empty(0) for column in columns}), columns)
+
+
+def outlier_mask(df, bounds):
+    """
+    Return the rows of a frame (or chunk) within the IQR fences of every column.
+
+    Parameters:
+    df (pandas.DataFrame): The frame.
+    bounds (dict): column -> (lower fence, upper fence), e.g. from `chunked_iqr_bounds`.
+
+    Returns:
+    numpy.ndarray: Boolean mask, True for the rows to keep. NaN values are outside the fences.
+    """
+    keep = np.ones(len(df), dtype=bool)
+    for column, (lower, upper) in bounds.items():
+        values = numeric_column_values(df, column)
+        keep &= (values >= lower) & (values <= upper)
+    return keep
+
+
+def remove_outliers_from_chunks(make_chunks, columns, cleaned_df=False,
+                                approx_min_rows=config_constants['outlier_approx_min_rows'],
+                                compression=config_constants['tdigest_compression']):
+    """
+    Remove outliers from chunked data in two passes: the IQR fences first (see `chunked_iqr_bounds`), then every
+    chunk is filtered with one combined mask.
+
+    Parameters:
+    make_chunks (callable): Returns a new iterator over the chunks; it is called once per pass.
+    columns (list of str): The columns from which outliers should be removed.
+    cleaned_df (bool, optional): If True, the chunks are not cleaned (see `clean_df`) before removing outliers.
+        Defaults to False.
+    approx_min_rows (int, optional): The number of rows from which the quartiles are approximate. Defaults to
+        config_constants['outlier_approx_min_rows']; None never approximates.
+    compression (float, optional): The accuracy of the digests. Defaults to config_constants['tdigest_compression'].
+
+    Yields:
+    pandas.DataFrame: The chunks without outliers.
+    """
+    def make_clean_chunks():
+        chunks = make_chunks()
+        return chunks if cleaned_df else (clean_df(chunk, columns) for chunk in chunks)
+
+    bounds = chunked_iqr_bounds(make_clean_chunks(), columns, approx_min_rows, compression)
+    for chunk in make_clean_chunks():
+        yield chunk[outlier_mask(chunk, bounds)]
+
+
+def remove_outliers(df, columns, cleaned_df=False, method=config_constants['outlier_method']):
     """
     Removes outliers from specified columns in the DataFrame.
 
@@ -71,27 +273,40 @@ def remove_outliers(df, columns, cleaned_df=False):
     and then removes rows where the column value is an outlier, defined as being below Q1 - 1.5*IQR or above Q3 + 1.5*IQR,
     where Q1 and Q3 are the first and third quartiles, respectively, and IQR is the interquartile range.
 
+    With the 'combined' method, the quartiles of all columns are computed on the same rows in one vectorized
+    call and the rows are filtered with one combined mask, so the result does not depend on the order of the
+    columns. The 'sequential' method filters one column at a time, each on the rows left by the previous columns,
+    as earlier versions did. The quartiles are exact; data too large to be held whole is filtered while it is
+    ingested instead (see `remove_outliers_from_chunks`).
+
     Parameters:
     df (pandas.DataFrame): The input DataFrame from which outliers should be removed.
     columns (list of str): A list of column names from which outliers should be removed.
     cleaned_df (bool, optional): If True, the function will not clean the DataFrame before removing outliers. Defaults to False.
+    method (str, optional): 'combined' or 'sequential'. Defaults to config_constants['outlier_method'].
 
     Returns:
     pandas.DataFrame: The DataFrame with outliers removed from the specified columns.
     """
+    if method not in ("combined", "sequential"):
+        raise ValueError(f"Unsupported outlier method: {method}. Supported methods are: ['combined', 'sequential']")
+
     if not cleaned_df:
         df = clean_df(df, columns)
 
-    # Convert specified columns to numeric and handle non-numeric values
-    df[columns] = df[columns].apply(pd.to_numeric, errors='coerce')
+    if method == "sequential":
+        # Convert specified columns to numeric and handle non-numeric values
+        df[columns] = df[columns].apply(pd.to_numeric, errors='coerce')
 
-    for column in columns:
-        Q1 = df[column].quantile(0.25)
-        Q3 = df[column].quantile(0.75)
-        IQR = Q3 - Q1
-        df = df[(df[column] >= Q1 - 1.5*IQR) & (df[column] <= Q3 + 1.5*IQR)]
+        for column in columns:
+            Q1 = df[column].quantile(0.25)
+            Q3 = df[column].quantile(0.75)
+            IQR = Q3 - Q1
+            df = df[(df[column] >= Q1 - 1.5*IQR) & (df[column] <= Q3 + 1.5*IQR)]
 
-    return df
+        return df
+
+    return df[outlier_mask(df, exact_iqr_bounds(df, columns))]
 
 
 def remove_outliers_by_mnemonics(df, mnemonics, cleaned_df=False):
@@ -0,0 +1,157 @@
+import pandas as pd
+from utils import get_columns_by_mnemonics, compute_doc, compute_mu, compute_mse
+
+
+# Derived channels by standardized column name. Each channel declares the mnemonics of its inputs (raw or
+# derived channels) and a vectorized formula taking {mnemonic: numeric Series}. 'default' channels are added
+# by `add_columns` when no channels are requested; the others only when requested, e.g. selected in the app.
+DERIVED_CHANNELS = {}
+
+
+def register_derived_channel(column, inputs, formula, default=False):
+    """
+    Register a derived channel.
+
+    Parameters:
+    column (str): The standardized "MNEMONIC (unit)" name of the channel.
+    inputs (list of str): The mnemonics of the input channels, found as by `get_columns_by_mnemonics`.
+        Inputs may be derived channels themselves; they are computed first.
+    formula (callable): Takes {mnemonic: pandas.Series} and returns the channel as a Series or array of the
+        same length.
+    default (bool, optional): Whether `add_columns` adds the channel by default. Defaults to False.
+    """
+    DERIVED_CHANNELS[column] = {"inputs": list(inputs), "formula": formula, "default": default}
+
+
+def get_channel_mnemonic(column):
+    return column.split("(")[0].strip()
+
+
+def get_default_channels():
+    return [column for column, channel in DERIVED_CHANNELS.items() if channel["default"]]
+
+
+def find_derived_channel(mnemonic):
+    """
+    Return the derived channel with the given mnemonic, or None.
+    """
+    for column in DERIVED_CHANNELS:
+        if get_channel_mnemonic(column) == mnemonic:
+            return column
+    return None
+
+
+def get_raw_input_mnemonics(channels=None):
+    """
+    Return the mnemonics of the raw (not derived) channels the given derived channels are computed from.
+
+    Parameters:
+    channels (list of str, optional): The derived channels. Defaults to None, which uses every registered channel.
+
+    Returns:
+    list of str: The mnemonics, in order of first use.
+    """
+    if channels is None:
+        channels = list(DERIVED_CHANNELS)
+    mnemonics = {}
+    for column in resolve_evaluation_order(channels):
+        for mnemonic in DERIVED_CHANNELS[column]["inputs"]:
+            if find_derived_channel(mnemonic) is None:
+                mnemonics[mnemonic] = None
+    return list(mnemonics)
+
+
+def get_computable_channels(columns):
+    """
+    Return the derived channels whose raw inputs are all among the given columns, without computing them.
+    """
+    header = pd.DataFrame(columns=list(columns))
+    computable = []
+    for column in DERIVED_CHANNELS:
+        mnemonics = get_raw_input_mnemonics([column])
+        if len(get_columns_by_mnemonics(header, mnemonics)) == len(mnemonics):
+            computable.append(column)
+    return computable
+
+
+def resolve_evaluation_order(channels):
+    """
+    Order derived channels so every channel comes after the derived channels it depends on.
+
+    Parameters:
+    channels (list of str): The requested channels.
+
+    Returns:
+    list of str: The requested channels and their derived dependencies, in dependency order.
+    """
+    order = []
+    visiting = set()
+
+    def visit(column):
+        if column in order:
+            return
+        if column in visiting:
+            raise ValueError(f"Derived channel '{column}' depends on itself.")
+        visiting.add(column)
+        for mnemonic in DERIVED_CHANNELS[column]["inputs"]:
+            dependency = find_derived_channel(mnemonic)
+            if dependency is not None:
+                visit(dependency)
+        visiting.discard(column)
+        order.append(column)
+
+    for column in channels:
+        visit(column)
+    return order
+
+
+def compute_derived_channels(df, channels):
+    """
+    Add derived channels to a DataFrame.
+
+    Channels are evaluated in dependency order (see `resolve_evaluation_order`) and recomputed on every call,
+    as the formulas are vectorized and cost less than checking whether their inputs changed; a channel thus
+    always follows its inputs, e.g. after they were converted while cleaning or filtered. A channel whose
+    inputs are missing is skipped, so a channel read from the file without its inputs is kept.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame, modified in place.
+    channels (list of str): The requested channels.
+
+    Returns:
+    pandas.DataFrame: df.
+    """
+    for column in resolve_evaluation_order(channels):
+        mnemonics = DERIVED_CHANNELS[column]["inputs"]
+        input_columns = get_columns_by_mnemonics(df, mnemonics)
+        if len(input_columns) != len(mnemonics):
+            continue
+
+        inputs = {mnemonic: pd.to_numeric(df[input_column], errors='coerce')
+                  for mnemonic, input_column in zip(mnemonics, input_columns)}
+        df[column] = DERIVED_CHANNELS[column]["formula"](inputs)
+
+    return df
+
+
+# DOC, Mu and MSE use the array kernels of utils.drilling_utils, shared with the optimizers
+register_derived_channel(
+    'DOC (in/rev)', ['ROP', 'BIT_RPM'],
+    lambda c: compute_doc(c['ROP'], c['BIT_RPM']),
+    default=True)
+
+register_derived_channel(
+    'Mu ()', ['WOB', 'TORQUE', 'BIT_DIAMETER'],
+    lambda c: compute_mu(c['WOB'], c['TORQUE'], c['BIT_DIAMETER']),
+    default=True)
+
+register_derived_channel(
+    'MSE (ksi)', ['WOB', 'TORQUE', 'BIT_RPM', 'ROP', 'BIT_DIAMETER'],
+    lambda c: compute_mse(c['WOB'], c['BIT_RPM'], c['TORQUE'], c['ROP'], c['BIT_DIAMETER']),
+    default=True)
+
+# Drilling strength: weight on bit per unit bit diameter and depth of cut (klbs / in^2 = ksi)
+register_derived_channel(
+    'DS (ksi)', ['WOB', 'BIT_DIAMETER', 'DOC'],
+    lambda c: c['WOB'] / (c['BIT_DIAMETER'] * c['DOC']))
+
@@ -0,0 +1,79 @@
+import numpy as np
+from config import config_constants
+
+
+def new_tdigest():
+    """
+    Create an empty t-digest: a sketch of a distribution as (mean, weight) centroids, small at the tails and
+    larger near the median, from which quantiles can be estimated without keeping the data.
+    """
+    return {"means": np.empty(0), "weights": np.empty(0), "min": np.inf, "max": -np.inf, "count": 0}
+
+
+def compress_centroids(means, weights, compression):
+    """
+    Merge sorted centroids into at most about `compression` centroids.
+
+    Each centroid is placed on the k1 scale k(q) = compression / (2 * pi) * arcsin(2q - 1) at the middle of its
+    quantile range, and centroids falling in the same unit of k are merged, in one vectorized pass.
+    """
+    total = weights.sum()
+    cumulative = np.cumsum(weights)
+    q_middle = (cumulative - weights / 2) / total
+    k = compression / (2 * np.pi) * np.arcsin(np.clip(2 * q_middle - 1, -1, 1))
+    buckets = np.floor(k)
+
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return merged_means, merged_weights
+
+
+def tdigest_update(digest, values, compression=config_constants['tdigest_compression']):
+    """
+    Add a chunk of values to a t-digest (NaN values are ignored).
+
+    Parameters:
+    digest (dict): The digest from `new_tdigest`, updated in place.
+    values (numpy.ndarray): The values of the chunk.
+    compression (float, optional): The accuracy of the digest; the rank error near the quartiles is about
+        1 / compression. Defaults to config_constants['tdigest_compression'].
+
+    Returns:
+    dict: digest.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return digest
+
+    means = np.concatenate([digest["means"], values])
+    weights = np.concatenate([digest["weights"], np.ones(len(values))])
+    order = np.argsort(means, kind="stable")
+
+    digest["means"], digest["weights"] = compress_centroids(means[order], weights[order], compression)
+    digest["min"] = min(digest["min"], values.min())
+    digest["max"] = max(digest["max"], values.max())
+    digest["count"] += len(values)
+    return digest
+
+
+def tdigest_quantile(digest, q):
+    """
+    Estimate quantiles from a t-digest, interpolating between the centroid means and the exact min and max.
+
+    Parameters:
+    digest (dict): The digest.
+    q (float or array-like): The quantiles, between 0 and 1.
+
+    Returns:
+    float or numpy.ndarray: The estimates (NaN for an empty digest).
+    """
+    if digest["count"] == 0:
+        return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+    weights = digest["weights"]
+    ranks = (np.cumsum(weights) - weights / 2) / weights.sum()
+    ranks = np.concatenate([[0.0], ranks, [1.0]])
+    means = np.concatenate([[digest["min"]], digest["means"], [digest["max"]]])
+    return np.interp(q, ranks, means)
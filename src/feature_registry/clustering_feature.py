@@ -2,9 +2,9 @@ from datetime import datetime
 import pandas as pd
 import streamlit as st
 from .features import Feature
-from cluster import perform_kmeans
+from cluster import perform_kmeans, select_kmeans_mode
 from config import config_constants
-from file_handle import save_clustered_df_to_file_and_update_session_state, load_file_standardize_header
+from file_handle import save_clustered_df_to_file_and_update_session_state, load_dataset
 
 
 class ClusteringFeature(Feature):
@@ -34,36 +34,47 @@ class ClusteringFeature(Feature):
                 st.session_state['cleaned_columns'].append('cluster ()')
 
             df_new = save_clustered_df_to_file_and_update_session_state(
-                df_new)
+                df_new, {'operation': 'clustering',
+                         'clustered_columns': self.parameters['clustered_columns'],
+                         'k': self.parameters['k']})
 
         # If the feature is activated and self.parameters['silhouette_scores']
         # is not an empty list, plot the silhouette scores
         if self.activated:
 
-            df = load_file_standardize_header(st.session_state['loaded_file'])
+            df = load_dataset(st.session_state['loaded_file'])
 
             # Update feature_session_state
             feature_session_state.parameters['clustered_columns'] = self.parameters['clustered_columns']
             feature_session_state.parameters['k'] = self.parameters['k']
             feature_session_state.parameters['auto_cluster'] = self.parameters['auto_cluster']
             feature_session_state.parameters['silhouette_score'] = self.parameters['silhouette_score']
+            feature_session_state.parameters['sweep_metrics'] = self.parameters.get('sweep_metrics', [])
             feature_session_state.activated = self.activated
 
             if self.parameters['silhouette_score']:
                 self.plot_silhouette_scores(
-                    self.parameters['silhouette_score'])
+                    self.parameters['silhouette_score'],
+                    self.parameters.get('sweep_metrics'))
 
             st.success("Clustering has been done!")
 
             return df
 
     def kmeans_clustering(self, df):
+        # Large datasets are clustered with mini-batch k-means (see config_constants['kmeans_mode'])
+        self.parameters['kmeans_mode'] = select_kmeans_mode(len(df), config_constants['kmeans_mode'])
+        st.caption(f"Clustering {len(df):,} rows with {self.parameters['kmeans_mode']} k-means")
+
         # Call the perform_kmeans function from the cluster module
-        df, self.parameters['silhouette_score'], self.parameters['k'] = perform_kmeans(
+        df, self.parameters['sweep_metrics'], self.parameters['k'] = perform_kmeans(
             df, self.parameters['clustered_columns'],
             self.parameters['k'],
             config_constants['k_min'],
-            config_constants['k_max'])
+            config_constants['k_max'],
+            mode=self.parameters['kmeans_mode'])
+        self.parameters['silhouette_score'] = [metrics['silhouette']
+                                               for metrics in self.parameters['sweep_metrics']]
         return df
 
     def set_feature_parameters(self, cleaned_columns, feature_session_state):
@@ -88,7 +99,7 @@ class ClusteringFeature(Feature):
 
         return clustered_columns, k, auto_cluster
 
-    def plot_silhouette_scores(self, silhouette_scores):
+    def plot_silhouette_scores(self, silhouette_scores, sweep_metrics=None):
         # plot silhouette score to scatter plot if silhouette_scores is not an empty list
         if silhouette_scores:
             # Convert the silhouette scores to a DataFrame with an appropriate index
@@ -98,6 +109,17 @@ class ClusteringFeature(Feature):
             # Plot the silhouette scores
             st.line_chart(silhouette_scores_df)
 
+        # Show every metric of the k-sweep (features saved before the sweep recorded them only have the
+        # silhouette scores)
+        if sweep_metrics:
+            sweep_metrics_df = pd.DataFrame(sweep_metrics).set_index('k').rename(columns={
+                'inertia': 'Inertia',
+                'silhouette': 'Silhouette',
+                'calinski_harabasz': 'Calinski-Harabasz',
+                'fit_time_s': 'Fit time (s)',
+                'total_time_s': 'Total time (s)'})
+            st.dataframe(sweep_metrics_df)
+
     def to_dict(self):
         data = super().to_dict()
         return data
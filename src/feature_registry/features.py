@@ -35,10 +35,30 @@ class Feature(ABC):
         self.created_at = datetime.now().isoformat()  # Use ISO format for serialization
         self.activated = activated
 
+    # Parameters holding dataset column names, see required_columns
+    COLUMN_PARAMETERS = ("x", "y", "z", "color", "size", "X_cols", "y_col", "clustered_columns")
+
     @abstractmethod
     def set_feature_parameters(self, *args, **kwargs):
         pass
 
+    def required_columns(self):
+        """
+        Returns the dataset columns this feature reads, from its column parameters.
+
+        Returns:
+            list of str: The column names.
+
+        """
+        columns = []
+        for parameter in self.COLUMN_PARAMETERS:
+            value = (self.parameters or {}).get(parameter)
+            if isinstance(value, str):
+                columns.append(value)
+            elif isinstance(value, (list, tuple)):
+                columns.extend(value)
+        return columns
+
     def execute(self, *args, **kwargs):
         """
         Executes the feature.
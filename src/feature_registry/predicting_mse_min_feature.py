@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 from .features import Feature
 from optimize_for_mse_min import execute_monte_carlo_optimization, add_mse_min_to_original_data
-from file_handle import save_clustered_df_to_file_and_update_session_state, load_file_standardize_header
+from file_handle import save_clustered_df_to_file_and_update_session_state, load_dataset
 
 
 class PredictingMSEMinFeature(Feature):
@@ -97,7 +97,7 @@ class PredictingMSEMinFeature(Feature):
                         columns={'cluster': 'cluster ()'}, inplace=True)
 
                     df_with_clusters_mse_min = save_clustered_df_to_file_and_update_session_state(
-                        df_with_clusters_mse_min)
+                        df_with_clusters_mse_min, {'operation': 'mse_min', 'iterations': iterations})
 
                     # TODO
                     # Modify keys of cluster from <integer> to "cluster<integer>'
@@ -111,7 +111,7 @@ class PredictingMSEMinFeature(Feature):
             feature_session_state.activated = True
 
         if feature_session_state.activated:
-            df_with_clusters_mse_min = load_file_standardize_header(
+            df_with_clusters_mse_min = load_dataset(
                 st.session_state['loaded_file'])
             self.print_results(feature_session_state, df_with_clusters_mse_min)
 
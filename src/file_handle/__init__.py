@@ -1,13 +1,35 @@
 from .standardize_single_dataset import load_file_standardize_header
+from .standardize_multiple_datasets import load_files_standardize_header
+from .load_dataset import load_dataset, read_available_columns, read_dataset_version, is_streamed_file
+from .projection import required_columns
+from .tail_ingest import ingest_new_rows, read_tail_columns, load_tail_dataset, start_tail_watcher
+from .channel_store import save_channel_store, open_channel_store
 
 # TODO: From legecy, need to be removed when upgrading our code successfully
 from .save_file import save_uploaded_file, save_cleaned_df_to_file_and_update_session_state, save_clustered_df_to_file_and_update_session_state
+from .save_file import export_cleaned_df_to_excel
+from .parquet_dataset import save_dataset_parquet, load_dataset_parquet
 # from .file_handling import st_read_file, read_file
 from .load_file import load_file_and_merge_headers, st_read_file
 
 __all__ = ['load_file_standardize_header',
+           'load_files_standardize_header',
+           'load_dataset',
+           'read_available_columns',
+           'read_dataset_version',
+           'is_streamed_file',
+           'required_columns',
+           'ingest_new_rows',
+           'read_tail_columns',
+           'load_tail_dataset',
+           'start_tail_watcher',
+           'save_channel_store',
+           'open_channel_store',
            'save_uploaded_file',
            'save_cleaned_df_to_file_and_update_session_state',
            'save_clustered_df_to_file_and_update_session_state',
+           'export_cleaned_df_to_excel',
+           'save_dataset_parquet',
+           'load_dataset_parquet',
            'st_read_file',
            'load_file_and_merge_headers']
@@ -0,0 +1,278 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+
+CHANNEL_STORE_FORMAT_VERSION = 1
+CHANNEL_STORE_SUFFIX = ".channels"
+MANIFEST_FILE = "manifest.json"
+
+
+def split_column_name(column):
+    """
+    Split a standardized "MNEMONIC (unit)" column name into its mnemonic and unit.
+    """
+    column = str(column)
+    mnemonic = column.split("(")[0].strip()
+    unit = column.split("(")[-1].split(")")[0].strip() if "(" in column and ")" in column else ""
+    return mnemonic, unit
+
+
+def get_channel_store_path(file_path):
+    """
+    Return the channel store directory used for a dataset file, e.g. "well_1.csv" -> "well_1.csv.channels".
+    """
+    return f"{file_path}{CHANNEL_STORE_SUFFIX}"
+
+
+def is_channel_store(path):
+    return isinstance(path, str) and os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def channel_values(series):
+    """
+    Convert a column to the array stored on disk.
+
+    Numeric, boolean and datetime columns are stored as they are (nullable extension dtypes become float64
+    with NaN). Any other column is stored as int32 codes into a list of categories.
+
+    Returns:
+    tuple: (numpy.ndarray, list of categories or None)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+
+    if pd.api.types.is_extension_array_dtype(series.dtype) and pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan), None
+
+    if series.dtype.kind in "fiubM":
+        return np.ascontiguousarray(series.to_numpy()), None
+
+    codes, categories = pd.factorize(series, use_na_sentinel=True)
+    categories = [category.item() if isinstance(category, np.generic) else category
+                  for category in categories]
+    categories = [category if isinstance(category, (str, int, float, bool)) else str(category)
+                  for category in categories]
+    return codes.astype("int32"), categories
+
+
+def save_channel_store(df, store_path, version=None, lineage=None):
+    """
+    Save a standardized DataFrame as a channel store: one contiguous .npy array per column plus a JSON manifest.
+
+    The manifest records, for each channel, the column name, mnemonic, unit, dtype and array file, so readers
+    can memory-map only the channels they need (see `open_channel_store`). The row index is not stored; the
+    store is read back with a RangeIndex, as when the dataset is reread from a file.
+
+    The store is written to a temporary directory and swapped into place, so readers never see a partial store.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame to save.
+    store_path (str): The channel store directory.
+    version (str, optional): The dataset version recorded in the manifest (see `dataset_version`).
+    lineage (list of dict, optional): The operations that produced the dataset, recorded in the manifest.
+
+    Returns:
+    str: store_path.
+    """
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    old_path = f"{store_path}.{os.getpid()}.old"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    try:
+        channels = []
+        for position, column in enumerate(df.columns):
+            values, categories = channel_values(df.iloc[:, position])
+            file_name = f"{position:04d}.npy"
+            np.save(os.path.join(tmp_path, file_name), values)
+
+            mnemonic, unit = split_column_name(column)
+            channel = {"column": column, "mnemonic": mnemonic, "unit": unit,
+                       "dtype": str(values.dtype), "file": file_name}
+            if categories is not None:
+                channel["categories"] = categories
+            channels.append(channel)
+
+        manifest = {"format_version": CHANNEL_STORE_FORMAT_VERSION, "version": version,
+                    "lineage": lineage or [], "n_rows": len(df), "channels": channels}
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    if os.path.exists(store_path):
+        os.replace(store_path, old_path)
+    os.replace(tmp_path, store_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return store_path
+
+
+def save_channel_store_from_parquet(parquet_path, store_path, version=None, lineage=None):
+    """
+    Convert a Parquet file into a channel store one row group at a time, so the dataset is never held whole.
+
+    Every channel is written into a memory-mapped .npy file sized from the Parquet metadata. Columns that are
+    not numeric in the first row group are stored as codes into categories collected across the row groups,
+    as `save_channel_store` does for a whole frame.
+
+    Parameters:
+    parquet_path (str): The path of the Parquet file, e.g. a streamed cache entry (see `stream_file`).
+    store_path (str): The channel store directory.
+    version (str, optional): The dataset version recorded in the manifest (see `dataset_version`).
+    lineage (list of dict, optional): The operations that produced the dataset, recorded in the manifest.
+
+    Returns:
+    str: store_path.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    if parquet_file.num_row_groups == 0:
+        return save_channel_store(pd.read_parquet(parquet_path), store_path, version, lineage)
+
+    n_rows = parquet_file.metadata.num_rows
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    old_path = f"{store_path}.{os.getpid()}.old"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    try:
+        arrays, categories, columns = [], [], None
+        offset = 0
+        for row_group in range(parquet_file.num_row_groups):
+            chunk = parquet_file.read_row_group(row_group).to_pandas()
+            if columns is None:
+                columns = list(chunk.columns)
+                for position in range(chunk.shape[1]):
+                    series = chunk.iloc[:, position]
+                    numeric = series.dtype.kind in "fiubM" or (
+                        pd.api.types.is_extension_array_dtype(series.dtype)
+                        and pd.api.types.is_numeric_dtype(series.dtype))
+                    dtype = (series.dtype if series.dtype.kind in "fiubM"
+                             else np.dtype("float64") if numeric else np.dtype("int32"))
+                    arrays.append(np.lib.format.open_memmap(
+                        os.path.join(tmp_path, f"{position:04d}.npy"), mode="w+", dtype=dtype, shape=(n_rows,)))
+                    categories.append(None if numeric else {})
+
+            for position in range(chunk.shape[1]):
+                series = chunk.iloc[:, position]
+                if categories[position] is None:
+                    values = series.to_numpy(dtype=arrays[position].dtype, na_value=np.nan) \
+                        if pd.api.types.is_extension_array_dtype(series.dtype) else series.to_numpy()
+                else:
+                    series = series.astype(object)
+                    for category in pd.unique(series.dropna()):
+                        categories[position].setdefault(category, len(categories[position]))
+                    values = pd.Categorical(series, categories=list(categories[position])).codes
+                arrays[position][offset:offset + len(chunk)] = values
+            offset += len(chunk)
+
+        channels = []
+        for position, column in enumerate(columns):
+            arrays[position].flush()
+            mnemonic, unit = split_column_name(column)
+            channel = {"column": column, "mnemonic": mnemonic, "unit": unit,
+                       "dtype": str(arrays[position].dtype), "file": f"{position:04d}.npy"}
+            if categories[position] is not None:
+                channel["categories"] = [
+                    category.item() if isinstance(category, np.generic) else
+                    category if isinstance(category, (str, int, float, bool)) else str(category)
+                    for category in categories[position]]
+            channels.append(channel)
+        del arrays
+
+        manifest = {"format_version": CHANNEL_STORE_FORMAT_VERSION, "version": version,
+                    "lineage": lineage or [], "n_rows": n_rows, "channels": channels}
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    if os.path.exists(store_path):
+        os.replace(store_path, old_path)
+    os.replace(tmp_path, store_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return store_path
+
+
+def read_channel_store_manifest(store_path):
+    with open(os.path.join(store_path, MANIFEST_FILE), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != CHANNEL_STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported channel store format in '{store_path}'.")
+    return manifest
+
+
+def read_channel_store_version(store_path):
+    """
+    Return the (version, lineage) recorded in a channel store, or (None, []) if there is no readable store.
+    """
+    if not is_channel_store(store_path):
+        return None, []
+    try:
+        manifest = read_channel_store_manifest(store_path)
+    except (OSError, ValueError) as e:
+        print(f"Could not read channel store manifest of '{store_path}': {e}")
+        return None, []
+    return manifest.get("version"), manifest.get("lineage", [])
+
+
+def open_channel(store_path, channel, mmap_mode="c"):
+    """
+    Memory-map the array of one channel.
+
+    Parameters:
+    store_path (str): The channel store directory.
+    channel (dict): The channel entry from the manifest.
+    mmap_mode (str, optional): The `numpy.load` memory-map mode. Defaults to 'c' (copy-on-write), so the
+        returned arrays can be modified in memory without changing the files. None reads the array into RAM.
+
+    Returns:
+    numpy.ndarray: The channel values; categorical channels are returned as an object array.
+    """
+    values = np.load(os.path.join(store_path, channel["file"]), mmap_mode=mmap_mode)
+    if "categories" in channel:
+        categories = np.array(channel["categories"] + [np.nan], dtype=object)
+        return categories[values]
+    return values
+
+
+def open_channel_store(store_path, columns=None, mmap_mode="c"):
+    """
+    Open a channel store as a DataFrame, memory-mapping only the requested channels.
+
+    Numeric channels are backed directly by the memory-mapped files, so opening a store does not copy the data
+    into RAM; pages are read on access.
+
+    Parameters:
+    store_path (str): The channel store directory.
+    columns (list of str, optional): The columns to open, in this order. Defaults to None, which opens all columns.
+    mmap_mode (str, optional): The memory-map mode, see `open_channel`. Defaults to 'c'.
+
+    Returns:
+    df (pandas.DataFrame): The DataFrame with the requested columns.
+    """
+    manifest = read_channel_store_manifest(store_path)
+    channels = manifest["channels"]
+
+    if columns is not None:
+        # Duplicated column names resolve to the first channel with that name
+        first_channels = {}
+        for channel in channels:
+            first_channels.setdefault(channel["column"], channel)
+        missing = [column for column in columns if column not in first_channels]
+        if missing:
+            raise KeyError(f"Columns not found in channel store '{store_path}': {missing}")
+        channels = [first_channels[column] for column in columns]
+
+    data = {position: open_channel(store_path, channel, mmap_mode)
+            for position, channel in enumerate(channels)}
+    df = pd.DataFrame(data, index=pd.RangeIndex(manifest["n_rows"]), copy=False)
+    df.columns = [channel["column"] for channel in channels]
+    return df
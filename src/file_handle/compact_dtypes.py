@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from .channel_store import split_column_name
+
+
+# Columns with few distinct labels repeated on every row, stored as categoricals
+CATEGORICAL_MNEMONICS = ("well", "section", "cluster")
+
+# Largest relative error accepted when a float64 channel is stored as float32
+FLOAT32_RTOL = 1e-6
+
+FLOAT32_MAX = np.finfo(np.float32).max
+
+
+def fits_float32(values, rtol=FLOAT32_RTOL):
+    """
+    Check whether a float64 array can be stored as float32 without losing more than `rtol` relative precision.
+    """
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return True
+    if np.abs(finite).max() > FLOAT32_MAX:
+        return False
+    return np.allclose(finite.astype(np.float32), finite, rtol=rtol, atol=0)
+
+
+def compact_column(series, rtol=FLOAT32_RTOL):
+    """
+    Return the column with the smallest dtype that keeps its values.
+
+    - 'well', 'section' and 'cluster' columns become categoricals.
+    - float64 channels become float32 when `fits_float32` allows it.
+    - Integer channels are downcast to the smallest integer type.
+    - Text columns become Arrow-backed strings.
+    Any other column is returned unchanged.
+    """
+    mnemonic, _ = split_column_name(series.name)
+    if mnemonic.lower() in CATEGORICAL_MNEMONICS:
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+
+    if series.dtype == np.float64:
+        values = series.to_numpy()
+        return series.astype(np.float32) if fits_float32(values, rtol) else series
+
+    if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+
+    if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        return series.astype("string[pyarrow]")
+
+    return series
+
+
+def compact_dtypes(df, rtol=FLOAT32_RTOL):
+    """
+    Downcast the columns of a standardized DataFrame to reduce its memory footprint.
+
+    See `compact_column` for the rules applied to each column. Column names and order are kept.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame to compact.
+    rtol (float, optional): The largest relative error accepted for float32 channels. Defaults to 1e-6.
+
+    Returns:
+    tuple: (compacted DataFrame, memory report from `memory_report`)
+    """
+    compacted = pd.concat([compact_column(df.iloc[:, position], rtol)
+                           for position in range(df.shape[1])], axis=1)
+    compacted.columns = df.columns
+    compacted.attrs = df.attrs
+    return compacted, memory_report(df, compacted)
+
+
+def memory_report(df_before, df_after):
+    """
+    Compare the memory used by each column before and after compaction.
+
+    Parameters:
+    df_before (pandas.DataFrame): The original DataFrame.
+    df_after (pandas.DataFrame): The compacted DataFrame, with the same columns.
+
+    Returns:
+    pandas.DataFrame: One row per column with dtype_before, dtype_after, bytes_before and bytes_after,
+                      followed by a 'TOTAL' row.
+    """
+    report = pd.DataFrame({
+        "column": list(df_before.columns),
+        "dtype_before": [str(dtype) for dtype in df_before.dtypes],
+        "dtype_after": [str(dtype) for dtype in df_after.dtypes],
+        "bytes_before": df_before.memory_usage(index=False, deep=True).to_numpy(),
+        "bytes_after": df_after.memory_usage(index=False, deep=True).to_numpy(),
+    })
+    total = pd.DataFrame([{"column": "TOTAL", "dtype_before": "", "dtype_after": "",
+                           "bytes_before": report["bytes_before"].sum(),
+                           "bytes_after": report["bytes_after"].sum()}])
+    return pd.concat([report, total], ignore_index=True)
+
+
+def print_memory_report(report):
+    total = report.iloc[-1]
+    print(report.to_string(index=False))
+    print(f"Memory: {total['bytes_before'] / 1024 ** 2:.1f} MB -> {total['bytes_after'] / 1024 ** 2:.1f} MB")
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow.parquet as pq
+
+import config
+from config import cache_directory, config_constants
+from utils import ensure_directory_exists
+from . import units, units_config
+from .channel_store import get_channel_store_path, is_channel_store, open_channel_store, save_channel_store_from_parquet
+
+
+# Bump when the loading/standardization code changes the frames it produces,
+# so entries written by older code are never returned.
+CACHE_FORMAT_VERSION = 1
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Content hashes already computed in this process, keyed by (path, size, mtime_ns),
+# so a rerun does not re-read an unchanged file just to hash it
+_content_hashes = {}
+
+
+def file_content_hash(file_path):
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    The result is memoized on (path, size, mtime_ns), so repeated calls on an unchanged
+    file cost one `os.stat` instead of a full read.
+
+    Parameters:
+    file_path (str): The path to the file.
+
+    Returns:
+    str: The hex digest of the file content.
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _content_hashes:
+        return _content_hashes[memo_key]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    _content_hashes[memo_key] = digest.hexdigest()
+    return _content_hashes[memo_key]
+
+
+def remember_content_hash(file_path, content_hash):
+    """
+    Record the content hash of a file computed elsewhere (e.g. while saving an upload), so
+    `file_content_hash` does not read the file again.
+    """
+    stat = os.stat(file_path)
+    _content_hashes[(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)] = content_hash
+
+
+def standardization_config_version():
+    """
+    Fingerprint the header and unit configuration used by `load_file_standardize_header`.
+
+    The "VOLUME" header pattern is excluded because it is derived from the unit at
+    mapping time (see `headers_config.get_volume_pattern`).
+
+    Returns:
+    str: A short hex digest that changes whenever the configuration changes.
+    """
+    plan = units.compile_unit_conversion_plan(
+        units_config.unit_conversion_mappings)
+    fingerprint = {
+        "cache_format_version": CACHE_FORMAT_VERSION,
+        "header_patterns": {k: v for k, v in config.header_patterns.items() if k != "VOLUME"},
+        "unit_patterns": units_config.unit_patterns,
+        "unit_conversions": {unit: [step["scale"], step["offset"], step["new_unit"],
+                                    step["conversion_function"].__name__]
+                             for unit, step in plan.items()},
+    }
+    payload = json.dumps(fingerprint, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def dataset_cache_key(file_path):
+    """
+    Build the cache key for a raw file: content hash, mtime and configuration version.
+
+    Parameters:
+    file_path (str): The path to the raw file.
+
+    Returns:
+    str: The cache key, usable as a file name.
+    """
+    mtime_ns = os.stat(file_path).st_mtime_ns
+    payload = f"{file_content_hash(file_path)}:{mtime_ns}:{standardization_config_version()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def projected_cache_key(key, columns):
+    """
+    Build the cache key of a column projection of a raw file.
+
+    Parameters:
+    key (str): The cache key of the whole file from `dataset_cache_key`.
+    columns (list of str): The standardized columns of the projection.
+
+    Returns:
+    str: The cache key, usable as a file name.
+    """
+    payload = json.dumps([key, sorted(columns)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cleaned_cache_key(key, channels, clean_columns, outlier_columns):
+    """
+    Build the cache key of a raw file loaded with derived channels, cleaned and without outliers (see
+    `load_file_standardize_header`).
+
+    Parameters:
+    key (str): The cache key of the whole file from `dataset_cache_key`.
+    channels (list of str): The derived channels added.
+    clean_columns (list of str): The cleaned columns.
+    outlier_columns (list of str): The columns from which outliers were removed.
+
+    Returns:
+    str: The cache key, usable as a file name.
+    """
+    payload = json.dumps([key, sorted(channels or []), sorted(clean_columns or []), sorted(outlier_columns or []),
+                          config_constants['outlier_approx_min_rows'], config_constants['tdigest_compression']])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cache_path(key, cache_folder=cache_directory):
+    return os.path.join(cache_folder, f"{key}.parquet")
+
+
+def save_cache_channel_store(key, cache_folder=cache_directory):
+    """
+    Convert a cache entry into a channel store next to it, row group by row group (see
+    `channel_store.save_channel_store_from_parquet`), so the entry is memory-mapped when it is loaded.
+
+    Used for the entries of streamed files, which are too large to be read whole.
+
+    Returns:
+    str: The channel store directory.
+    """
+    cache_path = get_cache_path(key, cache_folder)
+    return save_channel_store_from_parquet(cache_path, get_channel_store_path(cache_path))
+
+
+def load_cached_dataframe(key, cache_folder=cache_directory, columns=None):
+    """
+    Load a standardized DataFrame from the cache.
+
+    When the entry has a channel store (see `save_cache_channel_store`), the channels are memory-mapped from
+    it instead of being read from the Parquet file. A hit refreshes the entry's modification time, which is
+    what the LRU eviction uses.
+
+    Parameters:
+    key (str): The cache key from `dataset_cache_key`.
+    cache_folder (str, optional): The cache directory. Defaults to config.cache_directory.
+    columns (list of str, optional): Only read these columns (those present in the entry) from the Parquet
+        file. Defaults to None, which reads all columns.
+
+    Returns:
+    pandas.DataFrame or None: The cached DataFrame, or None on a miss or unreadable entry.
+    """
+    cache_path = get_cache_path(key, cache_folder)
+    if not os.path.exists(cache_path):
+        return None
+
+    store_path = get_channel_store_path(cache_path)
+    try:
+        if columns is not None:
+            columns = set(columns)
+            columns = [name for name in pq.read_schema(cache_path).names if name in columns]
+        df = (open_channel_store(store_path, columns) if is_channel_store(store_path)
+              else pd.read_parquet(cache_path, columns=columns))
+    except Exception as e:
+        print(f"Could not read cache entry {cache_path}: {e}")
+        return None
+
+    os.utime(cache_path)
+    return df
+
+
+def save_dataframe_to_cache(key, df, cache_folder=cache_directory,
+                            size_limit_mb=config_constants['cache_size_limit_mb']):
+    """
+    Save a standardized DataFrame to the cache, then evict least recently used entries.
+
+    The entry is written to a temporary file and renamed into place, so a reader never
+    sees a partially written file. Frames that cannot be stored as Parquet (e.g. duplicated
+    column names or mixed-type object columns) are simply not cached.
+
+    Parameters:
+    key (str): The cache key from `dataset_cache_key`.
+    df (pandas.DataFrame): The DataFrame to cache.
+    cache_folder (str, optional): The cache directory. Defaults to config.cache_directory.
+    size_limit_mb (float, optional): Total size the cache is trimmed to after the write.
+
+    Returns:
+    bool: True if the entry was written.
+    """
+    ensure_directory_exists(cache_folder)
+    cache_path = get_cache_path(key, cache_folder)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Could not cache DataFrame: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    evict_least_recently_used(cache_folder, size_limit_mb)
+    return True
+
+
+def directory_size(path):
+    if not os.path.isdir(path):
+        return 0
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def evict_least_recently_used(cache_folder=cache_directory,
+                              size_limit_mb=config_constants['cache_size_limit_mb']):
+    """
+    Delete the least recently used cache entries, with their channel stores, until the cache fits the size limit.
+
+    Parameters:
+    cache_folder (str, optional): The cache directory. Defaults to config.cache_directory.
+    size_limit_mb (float, optional): The maximum total size of the cache in megabytes.
+
+    Returns:
+    list of str: The paths of the evicted entries.
+    """
+    if not os.path.isdir(cache_folder):
+        return []
+
+    entries = [entry for entry in os.scandir(cache_folder)
+               if entry.is_file() and entry.name.endswith(".parquet")]
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+
+    sizes = {entry.path: entry.stat().st_size + directory_size(get_channel_store_path(entry.path))
+             for entry in entries}
+    total_size = sum(sizes.values())
+    size_limit = size_limit_mb * 1024 * 1024
+
+    evicted = []
+    for entry in entries:
+        if total_size <= size_limit:
+            break
+        total_size -= sizes[entry.path]
+        os.remove(entry.path)
+        shutil.rmtree(get_channel_store_path(entry.path), ignore_errors=True)
+        evicted.append(entry.path)
+
+    return evicted
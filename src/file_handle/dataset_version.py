@@ -0,0 +1,57 @@
+import hashlib
+import json
+import pandas as pd
+
+
+def dataset_fingerprint(df):
+    """
+    Fingerprint the content of a DataFrame: column names, dtypes and values (the row index is ignored).
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame to fingerprint.
+
+    Returns:
+    str or None: The hex digest, or None if the values cannot be hashed.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype
+                              in zip(df.columns, df.dtypes)]).encode("utf-8"))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    except TypeError as e:
+        print(f"Could not fingerprint DataFrame: {e}")
+        return None
+    return digest.hexdigest()
+
+
+def extend_lineage(lineage, operation):
+    """
+    Append an operation to a lineage, unless it is already the last one (a rerun of the same operation).
+
+    Parameters:
+    lineage (list of dict): The operations that produced the dataset so far.
+    operation (dict, optional): The operation that produced the new version, e.g. {'operation': 'clustering', ...}.
+
+    Returns:
+    list of dict: The new lineage.
+    """
+    lineage = list(lineage or [])
+    if operation is not None:
+        operation = json.loads(json.dumps(operation, default=str))
+        if not lineage or lineage[-1] != operation:
+            lineage.append(operation)
+    return lineage
+
+
+def dataset_version(df, lineage):
+    """
+    Build the version of a dataset from its content fingerprint and the lineage of operations that produced it.
+
+    Returns:
+    str or None: The hex digest, or None if the content cannot be fingerprinted (the dataset is then always saved).
+    """
+    fingerprint = dataset_fingerprint(df)
+    if fingerprint is None:
+        return None
+    payload = json.dumps({"fingerprint": fingerprint, "lineage": lineage}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow.parquet as pq
+from config import config_constants
+from . import headers, units, units_config, load_file, dataset_cache
+
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+def is_excel_file(file_path):
+    return isinstance(file_path, str) and file_path.lower().endswith(EXCEL_EXTENSIONS)
+
+
+# Sheet names already listed in this process, keyed by (path, size, mtime_ns)
+_sheet_names = {}
+
+
+def list_workbook_sheets(file_path):
+    """
+    List the sheet names of a workbook, without parsing the sheets.
+
+    The result is memoized on (path, size, mtime_ns), so Streamlit reruns do not reopen an unchanged workbook.
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _sheet_names:
+        with pd.ExcelFile(file_path) as workbook:
+            _sheet_names[memo_key] = list(workbook.sheet_names)
+    return _sheet_names[memo_key]
+
+
+def is_multi_sheet_workbook(file_path):
+    return is_excel_file(file_path) and len(list_workbook_sheets(file_path)) > 1
+
+
+def get_sheet_tag_column(tag=config_constants['excel_sheet_tag']):
+    """
+    Return the standardized name of the column tagging rows with their sheet, e.g. 'well ()' or 'section ()'.
+    """
+    if tag not in ("well", "section"):
+        raise ValueError(f"Unsupported sheet tag: {tag}. Supported tags are: ['well', 'section']")
+    return f"{tag} ()"
+
+
+def load_sheet_standardize_header(file_path, sheet_name, tag_column):
+    """
+    Load one sheet of a workbook and standardize it like `load_file_standardize_header`, then tag its rows.
+
+    Runs in a worker process of `load_workbook_standardize_header`. Each worker opens the workbook itself and
+    only parses its own sheet.
+
+    Parameters:
+    file_path (str): The path to the workbook.
+    sheet_name (str): The sheet to load; its first two rows are the header and units rows.
+    tag_column (str): The column filled with the sheet name (see `get_sheet_tag_column`).
+
+    Returns:
+    df (pandas.DataFrame): The standardized sheet, or None if the sheet is empty.
+    """
+    data = pd.read_excel(file_path, sheet_name=sheet_name, header=[0, 1])
+    if data.empty:
+        return None
+
+    data = load_file.convert_na_values(data)
+    df = load_file.merge_header_levels(data)
+    df = headers.standardize_mnemonics(df)
+    df = units.standardize_units(df, units_config.unit_conversion_mappings)
+
+    df.columns = headers.make_unique_columns(df.columns)
+    df[tag_column] = str(sheet_name)
+    return df
+
+
+def workbook_cache_key(file_path, tag_column):
+    """
+    Build the cache key of the combined sheets of a workbook, from the file's cache key and the tag column.
+    """
+    payload = json.dumps([dataset_cache.dataset_cache_key(file_path), "sheets", tag_column])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def normalize_sheet_types(df):
+    """
+    Store columns that are numeric in some sheets and text in others as strings, so the combined frame can be
+    cached as Parquet.
+    """
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True).startswith("mixed"):
+            df.isetitem(position, column.astype("string"))
+    return df
+
+
+def load_workbook_standardize_header(file_path, use_cache=True,
+                                     max_workers=config_constants['ingestion_max_workers'],
+                                     tag=config_constants['excel_sheet_tag'], columns=None):
+    """
+    Load every sheet of a workbook in parallel, standardize them and combine them into one DataFrame.
+
+    Each sheet (one per well or hole section) goes through `load_sheet_standardize_header` in a process pool,
+    so the slow openpyxl parse runs in parallel across sheets, and its rows are tagged with the sheet name in a
+    'well ()' or 'section ()' column. The combined frame is cached as Parquet (see `dataset_cache`), so each
+    workbook is only parsed once; later loads, with or without `columns`, read the cached Parquet file.
+
+    Parameters:
+    file_path (str): The path to the workbook.
+    use_cache (bool, optional): Whether to read from and write to the on-disk cache. Defaults to True.
+    max_workers (int, optional): The maximum number of worker processes. Defaults to
+        config_constants['ingestion_max_workers']; None uses the number of CPUs.
+    tag (str, optional): 'well' or 'section'. Defaults to config_constants['excel_sheet_tag'].
+    columns (list of str, optional): The standardized columns to return. Defaults to None, which returns all columns.
+
+    Returns:
+    df (pandas.DataFrame): The combined DataFrame with the tag column last, or None if no sheet could be loaded.
+    """
+    tag_column = get_sheet_tag_column(tag)
+    cache_key = workbook_cache_key(file_path, tag_column) if use_cache else None
+    if cache_key is not None:
+        df = dataset_cache.load_cached_dataframe(cache_key, columns=columns)
+        if df is not None:
+            return df
+
+    sheet_names = list_workbook_sheets(file_path)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(sheet_names)))
+
+    results = []
+    if max_workers == 1:
+        for sheet_name in sheet_names:
+            try:
+                results.append(load_sheet_standardize_header(file_path, sheet_name, tag_column))
+            except Exception as e:
+                print(f"Error loading sheet '{sheet_name}' from {file_path}: {e}")
+                results.append(None)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(load_sheet_standardize_header, file_path, sheet_name, tag_column)
+                       for sheet_name in sheet_names]
+            for sheet_name, future in zip(sheet_names, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Error loading sheet '{sheet_name}' from {file_path}: {e}")
+                    results.append(None)
+
+    frames = [frame for frame in results if frame is not None]
+    if not frames:
+        return None
+
+    df = pd.concat(frames, ignore_index=True, sort=False)
+
+    # Keep the sheet tag as the last column, as for multi-well datasets
+    df = df[[column for column in df.columns if column != tag_column] + [tag_column]]
+    df = normalize_sheet_types(df)
+
+    if cache_key is not None:
+        dataset_cache.save_dataframe_to_cache(cache_key, df)
+    if columns is not None:
+        columns = set(columns)
+        df = df[[column for column in df.columns if column in columns]]
+    return df
+
+
+def read_workbook_columns(file_path, tag=config_constants['excel_sheet_tag']):
+    """
+    Return the columns of the combined sheets of a workbook.
+
+    They are read from the cached Parquet file; a workbook that is not cached yet is loaded (and cached) first.
+
+    Returns:
+    list of str: The standardized columns, with the tag column last.
+    """
+    tag_column = get_sheet_tag_column(tag)
+    cache_path = dataset_cache.get_cache_path(workbook_cache_key(file_path, tag_column))
+    if os.path.exists(cache_path):
+        return pq.read_schema(cache_path).names
+
+    df = load_workbook_standardize_header(file_path, tag=tag)
+    return [] if df is None else list(df.columns)
@@ -1,13 +1,125 @@
 import pandas as pd
 import os
+import codecs
 from pandas.errors import EmptyDataError
 import streamlit as st
 from collections import Counter  # Import Counter for duplicate handling
+from . import typed_csv
+
+
+# Encodings tried, in order, when the file has no byte order mark
+ENCODINGS = ["utf-8", "latin-1"]
+# Delimiters relevant for CSV/TXT
+DELIMITERS = [",", "\t", ";", " "]
+# Number of bytes read from the start of a file to sniff its format
+SNIFF_SAMPLE_BYTES = 64 * 1024
+
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def read_sample(file_path_or_buffer, sample_size=SNIFF_SAMPLE_BYTES):
+    """Read the first sample_size bytes of a file path or file-like object, leaving a buffer rewound."""
+    if hasattr(file_path_or_buffer, "read"):
+        sample = file_path_or_buffer.read(sample_size)
+        if hasattr(file_path_or_buffer, "seek"):
+            file_path_or_buffer.seek(0)
+        return sample if isinstance(sample, bytes) else sample.encode("utf-8")
+
+    with open(file_path_or_buffer, "rb") as f:
+        return f.read(sample_size)
+
+
+def sniff_encoding(sample, attempts):
+    """
+    Detect the encoding of a byte sample: byte order mark first, then UTF-16 without a BOM,
+    then the first of ENCODINGS that decodes the sample.
+
+    Returns:
+    tuple: (encoding, decoded_text)
+    """
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if sample.startswith(bom):
+            attempts.append({"step": "encoding", "candidate": encoding, "result": "byte order mark"})
+            return encoding, sample.decode(encoding, errors="ignore")
+
+    # UTF-16 without a BOM: ASCII text leaves every other byte NUL
+    if len(sample) >= 4 and sample[1::2].count(0) > len(sample) // 4:
+        attempts.append({"step": "encoding", "candidate": "utf-16-le", "result": "NUL byte pattern"})
+        return "utf-16-le", sample.decode("utf-16-le", errors="ignore")
+
+    for encoding in ENCODINGS:
+        try:
+            # The sample may end in the middle of a multi-byte character
+            text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            attempts.append({"step": "encoding", "candidate": encoding, "result": "ok"})
+            return encoding, text
+        except UnicodeDecodeError as e:
+            attempts.append({"step": "encoding", "candidate": encoding, "result": str(e)})
+
+    raise UnicodeDecodeError(
+        ENCODINGS[-1], sample, 0, len(sample), "Could not decode file with any tried encoding")
+
+
+def sniff_delimiter(text, attempts):
+    """
+    Detect the delimiter from decoded sample text.
+
+    A candidate scores when it splits every sampled line into the same number (> 1) of fields;
+    the candidate giving the most fields wins. Falls back to ',' when none is consistent.
+    """
+    lines = [line for line in text.splitlines()[:50] if line.strip()]
+    # Drop the last line, which may have been cut by the sample size
+    if len(lines) > 2:
+        lines = lines[:-1]
+
+    best_delimiter, best_fields = None, 1
+    for delimiter in DELIMITERS:
+        if delimiter == " ":
+            counts = {len(line.split()) for line in lines}
+        else:
+            counts = {line.count(delimiter) + 1 for line in lines}
+        consistent = len(counts) == 1
+        fields = counts.pop() if consistent else 0
+        attempts.append({"step": "delimiter", "candidate": delimiter,
+                         "result": f"{fields} fields" if consistent else "inconsistent field counts"})
+        if consistent and fields > best_fields:
+            best_delimiter, best_fields = delimiter, fields
+
+    return best_delimiter or ","
+
+
+def sniff_file_format(file_path_or_buffer, sample_size=SNIFF_SAMPLE_BYTES):
+    """
+    Detect the encoding and delimiter of a CSV/TXT file from its first few KB.
+
+    Parameters:
+    file_path_or_buffer: The path to the file or a file-like object.
+    sample_size (int): The number of bytes to sniff.
+
+    Returns:
+    dict: {'encoding': str, 'delimiter': str, 'attempts': list of dict}, where 'attempts' records
+          every candidate considered and its outcome, for diagnostics.
+    """
+    attempts = []
+    sample = read_sample(file_path_or_buffer, sample_size)
+    encoding, text = sniff_encoding(sample, attempts)
+    delimiter = sniff_delimiter(text, attempts)
+    return {"encoding": encoding, "delimiter": delimiter, "attempts": attempts}
 
 
 def read_file(file_path_or_buffer, file_type="csv"):
     """
-    Reads a file (CSV, Excel, TXT) into a pandas DataFrame, trying different encodings and delimiters.
+    Reads a file (CSV, Excel, TXT) into a pandas DataFrame.
+
+    For CSV/TXT the encoding (including byte order marks) and delimiter are sniffed from the first
+    few KB of the file (see `sniff_file_format`) and the file is then parsed once, by the
+    multi-threaded Arrow reader with an inferred float/string schema where possible (see
+    `typed_csv.read_csv_typed`). The attempts are recorded in `df.attrs['read_attempts']`
+    for diagnostics.
 
     Args:
         file_path_or_buffer: The path to the file or a file-like object.
@@ -19,13 +131,10 @@ def read_file(file_path_or_buffer, file_type="csv"):
     Raises:
         ValueError: If the file type is unsupported.
         FileNotFoundError: If the file path does not exist.
-        EmptyDataError: If the file is empty after trying all options.
-        UnicodeDecodeError: If the file cannot be decoded with tried encodings.
+        EmptyDataError: If the file is empty.
+        UnicodeDecodeError: If the file cannot be decoded.
         Exception: For other pandas or file reading errors.
     """
-    encodings = ["utf-8", "latin-1", "ISO-8859-1", "utf-16"]
-    delimiters = [",", "\t", ";", " "]  # Define delimiters relevant for CSV/TXT
-
     read_funcs = {
         "csv": pd.read_csv,
         "excel": pd.read_excel,
@@ -37,100 +146,65 @@ def read_file(file_path_or_buffer, file_type="csv"):
             f"Unsupported file type: {file_type}. Supported types are: {list(read_funcs.keys())}"
         )
 
-    read_func = read_funcs[file_type]
-    last_exception = None
-
-    # Common arguments for read functions
-    common_args = {"header": None}
-
-    for encoding in encodings:
-        # Arguments specific to this iteration
-        current_args = common_args.copy()
-        current_args["encoding"] = encoding
-
-        # Only iterate through delimiters for text-based formats
-        if file_type in ["csv", "txt"]:
-            for delimiter in delimiters:
-                try:
-                    current_args["delimiter"] = delimiter
-                    # Use low_memory=False for potentially mixed type columns often seen in CSVs
-                    if file_type == "csv":
-                        current_args["low_memory"] = False
-                    df = read_func(file_path_or_buffer, **current_args)
-                    # Reset buffer position if it's a file-like object for the next try
-                    if hasattr(file_path_or_buffer, "seek"):
-                        file_path_or_buffer.seek(0)
-                    if not df.empty:
-                        # Check if DataFrame has enough rows before setting header
-                        if len(df) < 2:
-                            # Handle files with less than 2 rows (e.g., only header or empty)
-                            # Option 1: Return as is (or with minimal processing)
-                            # return df # Or apply alternative processing
-                            # Option 2: Raise an error if this structure is invalid
-                            raise ValueError(
-                                f"File '{get_base_filename(file_path_or_buffer)}' has less than 2 rows required for header generation."
-                            )
-                        return set_header(df, file_path_or_buffer)
-                    else:
-                        # Store EmptyDataError but continue trying other options
-                        if not isinstance(last_exception, EmptyDataError):
-                            last_exception = EmptyDataError(
-                                f"No columns to parse from file '{get_base_filename(file_path_or_buffer)}' with encoding '{encoding}' and delimiter '{delimiter}'"
-                            )
-                except (UnicodeDecodeError, EmptyDataError, pd.errors.ParserError) as e:
-                    last_exception = e
-                    # Reset buffer position if it's a file-like object
-                    if hasattr(file_path_or_buffer, "seek"):
-                        file_path_or_buffer.seek(0)
-                    continue  # Try next delimiter/encoding
-                except Exception as e:  # Catch other potential pandas errors
-                    last_exception = e
-                    if hasattr(file_path_or_buffer, "seek"):
-                        file_path_or_buffer.seek(0)
-                    continue
-        elif file_type == "excel":
-            try:
-                # Don't pass delimiter to read_excel
-                df = read_func(
-                    file_path_or_buffer, encoding=encoding, header=common_args["header"]
-                )
-                # Reset buffer position if it's a file-like object
-                if hasattr(file_path_or_buffer, "seek"):
-                    file_path_or_buffer.seek(0)
-                if not df.empty:
-                    if len(df) < 2:
-                        raise ValueError(
-                            f"File '{get_base_filename(file_path_or_buffer)}' has less than 2 rows required for header generation."
-                        )
-                    return set_header(df, file_path_or_buffer)
-                else:
-                    if not isinstance(last_exception, EmptyDataError):
-                        last_exception = EmptyDataError(
-                            f"No columns to parse from file '{get_base_filename(file_path_or_buffer)}' (Excel) with encoding '{encoding}'"
-                        )
-            except (
-                UnicodeDecodeError,
-                EmptyDataError,
-            ) as e:  # Add other relevant Excel errors if needed
-                last_exception = e
-                if hasattr(file_path_or_buffer, "seek"):
-                    file_path_or_buffer.seek(0)
-                continue  # Try next encoding
-            except Exception as e:
-                last_exception = e
-                if hasattr(file_path_or_buffer, "seek"):
-                    file_path_or_buffer.seek(0)
-                continue
-
-    # If loop finishes without returning, raise the last encountered exception
-    if last_exception:
-        raise last_exception
+    if file_type == "excel":
+        # Excel files carry their own encoding, so there is nothing to sniff
+        attempts = []
+        df = pd.read_excel(file_path_or_buffer, header=None)
     else:
-        # Should not happen if input is valid, but as a fallback
-        raise Exception(
-            f"Could not read file '{get_base_filename(file_path_or_buffer)}' with any tried encoding/delimiter combination."
+        sniffed = sniff_file_format(file_path_or_buffer)
+        attempts = sniffed["attempts"]
+        if sniffed["delimiter"] != " ":
+            # Typed multi-threaded parse: header rows first, then float/string body
+            header_rows, body = typed_csv.read_csv_typed(
+                file_path_or_buffer, delimiter=sniffed["delimiter"], encoding=sniffed["encoding"])
+            if body is not None:
+                attempts.append({"step": "parse", "candidate": "arrow typed", "result": "ok"})
+                df = set_header_from_rows(header_rows, body, file_path_or_buffer)
+                df.attrs["read_attempts"] = attempts
+                return df
+            attempts.append({"step": "parse", "candidate": "arrow typed", "result": "fallback to pandas"})
+
+        read_args = {
+            "header": None,
+            "encoding": sniffed["encoding"],
+            # Runs of spaces separate columns in space-delimited exports
+            "sep": r"\s+" if sniffed["delimiter"] == " " else sniffed["delimiter"],
+        }
+        # Use low_memory=False for potentially mixed type columns often seen in CSVs
+        if file_type == "csv":
+            read_args["low_memory"] = False
+        try:
+            df = pd.read_csv(file_path_or_buffer, **read_args)
+        except UnicodeDecodeError as e:
+            # Non-UTF-8 bytes after the sniffed sample: latin-1 decodes any byte sequence
+            attempts.append({"step": "parse", "candidate": read_args["encoding"], "result": str(e)})
+            if hasattr(file_path_or_buffer, "seek"):
+                file_path_or_buffer.seek(0)
+            read_args["encoding"] = "latin-1"
+            df = pd.read_csv(file_path_or_buffer, **read_args)
+        except pd.errors.ParserError as e:
+            raise pd.errors.ParserError(
+                f"Could not parse file '{get_base_filename(file_path_or_buffer)}' (attempts: {attempts}): {e}"
+            ) from e
+        finally:
+            # Leave a file-like object rewound for any later reader
+            if hasattr(file_path_or_buffer, "seek"):
+                file_path_or_buffer.seek(0)
+        attempts.append({"step": "parse", "candidate": read_args["encoding"], "result": "ok"})
+
+    if df.empty:
+        raise EmptyDataError(
+            f"No columns to parse from file '{get_base_filename(file_path_or_buffer)}' (attempts: {attempts})"
+        )
+    if len(df) < 2:
+        raise ValueError(
+            f"File '{get_base_filename(file_path_or_buffer)}' has less than 2 rows required for header generation."
         )
 
+    df = set_header(df, file_path_or_buffer)
+    df.attrs["read_attempts"] = attempts
+    return df
+
 
 def get_base_filename(file_path_or_buffer):
     """Safely extracts the base filename without extension."""
@@ -161,6 +235,37 @@ def generate_unique_header(header_list):
     return new_header
 
 
+def combine_header_rows(header_row1, header_row2):
+    """Combine the mnemonic and unit rows into unique "mnemonic__unit" names, stripping whitespace."""
+    header_row1 = header_row1.astype(str).str.strip()
+    header_row2 = header_row2.astype(str).str.strip()
+    combined_header = (header_row1 + "__" + header_row2).tolist()
+
+    # Make header names unique
+    return generate_unique_header(combined_header)
+
+
+def set_header_from_rows(header_rows, body, file_path_or_buffer):
+    """
+    Same as `set_header`, for a body that was parsed separately from its two header rows
+    (see `typed_csv.read_csv_typed`), so the body keeps its typed columns.
+
+    Args:
+        header_rows (pandas.DataFrame): The two header rows, read as strings.
+        body (pandas.DataFrame): The data rows, with positional columns.
+        file_path_or_buffer: The original file path or buffer to extract the filename.
+
+    Returns:
+        pandas.DataFrame: The body with the combined header and a 'well' column.
+    """
+    if len(header_rows) < 2:
+        raise ValueError("DataFrame must have at least two rows to generate header.")
+
+    body.columns = combine_header_rows(header_rows.iloc[0], header_rows.iloc[1])
+    body["well"] = get_base_filename(file_path_or_buffer)
+    return body
+
+
 # Function to set the header of the DataFrame
 def set_header(df, file_path_or_buffer):
     """
@@ -178,13 +283,8 @@ def set_header(df, file_path_or_buffer):
         raise ValueError("DataFrame must have at least two rows to generate header.")
 
     df = df.copy()  # Create a copy to avoid SettingWithCopyWarning
-    # Combine first two rows, stripping whitespace
-    header_row1 = df.iloc[0].astype(str).str.strip()
-    header_row2 = df.iloc[1].astype(str).str.strip()
-    combined_header = (header_row1 + "__" + header_row2).tolist()
-
-    # Make header names unique
-    unique_header = generate_unique_header(combined_header)
+    # Combine first two rows into unique header names
+    unique_header = combine_header_rows(df.iloc[0], df.iloc[1])
 
     df = df.iloc[2:].reset_index(drop=True)  # Remove the first two rows and reset index
     df.columns = unique_header  # Set the new unique header
@@ -1,7 +1,58 @@
+import functools
+import hashlib
+import json
+import os
 import re
 import pandas as pd
 from . import headers_config
 import config
+from config import cache_directory
+from utils import ensure_directory_exists
+
+
+# Bump when the mapping logic changes, so persisted mappings are recomputed
+HEADER_MAPPING_VERSION = 1
+SCHEMA_MAPPINGS_FILE = "schema_mappings.json"
+
+# Persisted column -> standard mnemonic mappings, loaded from disk on first use
+_schema_mappings = None
+
+
+@functools.lru_cache(maxsize=None)
+def compile_header_matcher(pattern_items, volume_pattern):
+    """
+    Compile the header patterns into one case-insensitive regex of named alternatives.
+
+    `re.match` on the combined regex returns the first pattern, in `config.header_patterns`
+    order, that matches the mnemonic, which is the same as trying each pattern in turn.
+    Matchers are cached per (patterns, VOLUME pattern), so each is compiled once.
+
+    Parameters:
+    pattern_items (tuple): The (std_mnemonic, pattern) items of the header patterns.
+    volume_pattern (str or None): The pattern used for "VOLUME", which depends on the unit.
+
+    Returns:
+    tuple: (compiled regex, dict mapping group name -> std_mnemonic)
+    """
+    alternatives = []
+    group_names = {}
+    for i, (std_mnemonic, pattern) in enumerate(pattern_items):
+        if std_mnemonic == "VOLUME":
+            pattern = volume_pattern
+        if pattern:
+            alternatives.append(f"(?P<p{i}>{pattern})")
+            group_names[f"p{i}"] = std_mnemonic
+    return re.compile("|".join(alternatives), re.IGNORECASE), group_names
+
+
+def match_standard_mnemonic(mnemonic, unit):
+    """
+    Return the standard mnemonic whose pattern matches the given mnemonic, or None.
+    """
+    matcher, group_names = compile_header_matcher(
+        tuple(config.header_patterns.items()), headers_config.get_volume_pattern(unit))
+    match = matcher.match(mnemonic)
+    return group_names[match.lastgroup] if match else None
 
 
 def map_mnemonic(mnemonic, unit, rpm_values):
@@ -10,14 +61,11 @@ def map_mnemonic(mnemonic, unit, rpm_values):
     Case-insensitive matching is used to capture various cases.
     Units are also considered in the mapping process.
     """
-    patterns = config.header_patterns
-
-    # Set the pattern for "VOLUME" dynamically based on the unit
-    patterns["VOLUME"] = headers_config.get_volume_pattern(unit)
-
-    for std_mnemonic, pattern in patterns.items():
-        if pattern and re.match(pattern, mnemonic, re.IGNORECASE):
-            return f"{std_mnemonic} ({unit})"
+    # The "VOLUME" pattern is chosen from the unit inside the matcher,
+    # so the shared config.header_patterns is never modified
+    std_mnemonic = match_standard_mnemonic(mnemonic, unit)
+    if std_mnemonic is not None:
+        return f"{std_mnemonic} ({unit})"
 
     # For ambiguous RPM cases
     if 'RPM' in mnemonic.upper():
@@ -82,21 +130,112 @@ def analyze_rpm_context(mnemonic, unit, rpm_values):
 
 #     df.columns = new_columns
 #     return df
+
+
+def schema_signature(columns):
+    """
+    Build a key for a header/unit signature: the merged column names plus the header configuration.
+
+    The mapping only depends on the column names (the RPM context only looks at which RPM
+    channels are present), so files with identical headers share one mapping.
+    """
+    header_patterns = {k: v for k, v in config.header_patterns.items() if k != "VOLUME"}
+    payload = json.dumps([HEADER_MAPPING_VERSION, header_patterns, [str(col) for col in columns]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_schema_mappings_path(cache_folder=cache_directory):
+    return os.path.join(cache_folder, SCHEMA_MAPPINGS_FILE)
+
+
+def read_schema_mappings(cache_folder=cache_directory):
+    path = get_schema_mappings_path(cache_folder)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read schema mappings from {path}: {e}")
+        return {}
+
+
+def load_schema_mapping(columns):
+    """
+    Return the persisted standardized column names for this header signature, or None.
+    """
+    global _schema_mappings
+    if _schema_mappings is None:
+        _schema_mappings = read_schema_mappings()
+    return _schema_mappings.get(schema_signature(columns))
+
+
+def save_schema_mapping(columns, new_columns, cache_folder=cache_directory):
+    """
+    Persist the standardized column names for this header signature.
+
+    The file is re-read before writing, so mappings saved by other processes are kept,
+    and replaced atomically.
+    """
+    global _schema_mappings
+    ensure_directory_exists(cache_folder)
+    _schema_mappings = read_schema_mappings(cache_folder)
+    _schema_mappings[schema_signature(columns)] = list(new_columns)
+
+    path = get_schema_mappings_path(cache_folder)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(_schema_mappings, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save schema mappings to {path}: {e}")
+
+
 def standardize_mnemonics(df):
     """
     Apply mnemonic standardization to all column headers in the DataFrame.
+
+    The complete mapping for a header signature is persisted (see `save_schema_mapping`),
+    so repeat files with identical headers skip matching entirely.
     """
+    columns = list(df.columns)
+    new_columns = load_schema_mapping(columns)
+    if new_columns is not None:
+        df.columns = new_columns
+        return df
+
     # Extract average RPM values for context analysis
-    rpm_values = {col: df[col].mean(
+    rpm_values = {col: pd.to_numeric(df[col], errors='coerce').mean(
     ) for col in df.columns if 'RPM' in col.split(' (')[0].upper()}
 
     # Update the column headers based on the standardized mnemonics
     new_columns = []
-    for col in df.columns:
+    for col in columns:
         mnemonic = col.split(' (')[0]
         unit = col.split(' (')[1].rstrip(')') if ' (' in col else ""
         unit = "" if "Unnamed" in unit else unit
         new_columns.append(map_mnemonic(mnemonic, unit, rpm_values))
 
+    save_schema_mapping(columns, new_columns)
     df.columns = new_columns
     return df
+
+
+def make_unique_columns(columns):
+    """
+    Suffix duplicated "MNEMONIC (unit)" names as "MNEMONIC_2 (unit)", "MNEMONIC_3 (unit)", ...
+
+    Parquet needs unique column names, while several raw channels can map to the same
+    standard mnemonic (e.g. two RPM channels both mapped to BIT_RPM).
+    """
+    seen = {}
+    unique_columns = []
+    for column in columns:
+        seen[column] = seen.get(column, 0) + 1
+        if seen[column] == 1:
+            unique_columns.append(column)
+        else:
+            mnemonic, _, unit = column.partition(' (')
+            unique_columns.append(f"{mnemonic}_{seen[column]} ({unit}")
+    return unique_columns
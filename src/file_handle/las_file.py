@@ -0,0 +1,192 @@
+import io
+import numpy as np
+import pandas as pd
+
+from config import config_constants
+
+
+LAS_EXTENSION = ".las"
+
+
+def parse_las_line(line):
+    """
+    Split a LAS 2.0 header line 'MNEM.UNIT  VALUE : DESCRIPTION' into its mnemonic, unit and value.
+
+    The mnemonic ends at the first period and the unit at the first space after it; the value runs up to
+    the last colon.
+
+    Returns:
+    tuple: (mnemonic, unit, value), or None if the line has no period.
+    """
+    mnemonic, period, rest = line.partition(".")
+    if not period:
+        return None
+    if rest[:1].isspace() or not rest:
+        unit, value = "", rest
+    else:
+        unit, _, value = rest.partition(" ")
+    value = value.rpartition(":")[0] if ":" in value else value
+    return mnemonic.strip(), unit.strip(), value.strip()
+
+
+def read_las_header(file_path):
+    """
+    Read the header sections of a LAS 2.0 file up to its ~A (ASCII data) section.
+
+    Only the lines before the data are read. ~Version gives the wrap mode, ~Well the null value and
+    ~Curve the mnemonic and unit of every column of the data section, in order.
+
+    Parameters:
+    file_path (str): The path to the LAS file.
+
+    Returns:
+    dict: {'version', 'wrap', 'null', 'curves': [(mnemonic, unit)], 'data_offset', 'encoding'}, where
+        data_offset is the byte offset of the first data line.
+    """
+    header = {"version": None, "wrap": False, "null": None, "curves": [], "data_offset": None,
+              "encoding": "utf-8"}
+    raw_lines = []
+    with open(file_path, "rb") as f:
+        for raw_line in iter(f.readline, b""):
+            raw_lines.append(raw_line)
+            if raw_line.lstrip().upper().startswith(b"~A"):
+                header["data_offset"] = f.tell()
+                break
+
+    if header["data_offset"] is None:
+        raise ValueError(f"'{file_path}' has no ~A data section.")
+
+    text = b"".join(raw_lines)
+    try:
+        text = text.decode("utf-8")
+    except UnicodeDecodeError:
+        header["encoding"] = "latin1"
+        text = text.decode("latin1")
+
+    section = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("~"):
+            section = stripped[1:2].upper()
+            continue
+
+        parsed = parse_las_line(stripped)
+        if parsed is None:
+            continue
+        mnemonic, unit, value = parsed
+
+        if section == "V" and mnemonic.upper() == "VERS":
+            header["version"] = value
+        elif section == "V" and mnemonic.upper() == "WRAP":
+            header["wrap"] = value.upper() == "YES"
+        elif section == "W" and mnemonic.upper() == "NULL":
+            try:
+                header["null"] = float(value)
+            except ValueError:
+                pass
+        elif section == "C":
+            header["curves"].append((mnemonic, unit))
+
+    if not header["curves"]:
+        raise ValueError(f"'{file_path}' has no ~Curve section.")
+    return header
+
+
+def read_las_merged_header(file_path):
+    """
+    Read the curves of a LAS file as merged "MNEMONIC (unit)" names, the convention of
+    `load_file.load_file_and_merge_headers`, without reading its data.
+
+    Returns:
+    list of str: The merged column names.
+    """
+    return [f"{mnemonic} ({unit})" for mnemonic, unit in read_las_header(file_path)["curves"]]
+
+
+def iter_wrapped_values(f, n_curves, chunksize):
+    """
+    Parse the data section of a wrapped LAS file (one depth step spread over several lines) into rows.
+
+    The section is split into whitespace-separated tokens, converted to floats in one NumPy call per
+    block and reshaped to one row per depth step; an incomplete step is carried over to the next block.
+
+    Yields:
+    numpy.ndarray: Float arrays of shape (rows, n_curves).
+    """
+    carry = np.empty(0)
+    while True:
+        lines = [line for line in (f.readline() for _ in range(chunksize)) if line]
+        if not lines:
+            break
+        tokens = " ".join(line.partition("#")[0] for line in lines).split()
+        values = np.concatenate([carry, np.asarray(tokens, dtype=float)])
+        n_complete = len(values) // n_curves * n_curves
+        carry = values[n_complete:]
+        if n_complete:
+            yield values[:n_complete].reshape(-1, n_curves)
+
+
+def iter_las_chunks(file_path, chunksize=config_constants['streaming_chunk_rows'], usecols=None, header=None):
+    """
+    Read the ~A data section of a LAS 2.0 file in chunks.
+
+    Unwrapped data is parsed by the C reader of pandas (whitespace-delimited, one row per line); wrapped
+    data by `iter_wrapped_values`. The null value of the ~Well section is replaced by NaN. Only the ~A
+    section is read, from the byte offset found by `read_las_header`.
+
+    Parameters:
+    file_path (str): The path to the LAS file.
+    chunksize (int, optional): The number of rows per chunk.
+    usecols (list of int, optional): The positions of the curves to read. Defaults to None, which reads all curves.
+    header (dict, optional): The result of `read_las_header`, if already read.
+
+    Yields:
+    pandas.DataFrame: Chunks with columns labelled by curve position.
+    """
+    if header is None:
+        header = read_las_header(file_path)
+    n_curves = len(header["curves"])
+    positions = list(range(n_curves)) if usecols is None else list(usecols)
+
+    with open(file_path, "rb") as raw:
+        raw.seek(header["data_offset"])
+        f = io.TextIOWrapper(raw, encoding=header["encoding"])
+
+        if header["wrap"]:
+            chunks = (pd.DataFrame(values[:, positions], columns=positions)
+                      for values in iter_wrapped_values(f, n_curves, chunksize))
+        else:
+            chunks = pd.read_csv(f, sep=r"\s+", header=None, names=range(n_curves), usecols=positions,
+                                 comment="#", chunksize=chunksize)
+
+        for chunk in chunks:
+            if header["null"] is not None:
+                numeric = chunk.select_dtypes("number")
+                chunk[numeric.columns] = numeric.mask(numeric == header["null"])
+            yield chunk
+
+
+def read_las(file_path, usecols=None):
+    """
+    Read a LAS 2.0 file into a DataFrame with (mnemonic, unit) MultiIndex columns, the layout
+    `load_file.load_file_into_dataframe` returns for CSV/TXT/Excel files.
+
+    Parameters:
+    file_path (str): The path to the LAS file.
+    usecols (list of int, optional): The positions of the curves to read. With usecols, the columns
+        are labelled by position instead. Defaults to None, which reads all curves.
+
+    Returns:
+    pandas.DataFrame: The data section.
+    """
+    header = read_las_header(file_path)
+    chunks = list(iter_las_chunks(file_path, usecols=usecols, header=header))
+    positions = list(range(len(header["curves"]))) if usecols is None else list(usecols)
+    df = (pd.concat(chunks, ignore_index=True) if chunks
+          else pd.DataFrame(columns=positions, dtype=float))
+
+    if usecols is None:
+        df.columns = pd.MultiIndex.from_tuples(header["curves"])
+    return df
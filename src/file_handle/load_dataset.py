@@ -0,0 +1,142 @@
+import hashlib
+import json
+import pyarrow.parquet as pq
+from config import config_constants
+from data_wrangle.derived_channels import DERIVED_CHANNELS, compute_derived_channels
+from .standardize_single_dataset import load_file_standardize_header, prepare_dataframe
+from .standardize_multiple_datasets import load_files_standardize_header, read_wells_columns
+from .channel_store import is_channel_store, open_channel_store, read_channel_store_manifest, read_channel_store_version
+from .parquet_dataset import load_dataset_parquet, is_dataset_parquet, read_dataset_parquet_version
+from .excel_workbook import is_multi_sheet_workbook, load_workbook_standardize_header, read_workbook_columns
+from .compact_dtypes import compact_dtypes, print_memory_report
+from .headers import make_unique_columns
+from . import projection, dataset_cache, stream_file
+
+
+def read_available_columns(loaded_file):
+    """
+    Return the columns of the dataset referenced by st.session_state['loaded_file'] without loading its data.
+
+    Raw files are resolved from their header rows (see `projection.read_standardized_columns`), with
+    duplicated channels named as in a projected load; channel stores and Parquet files from their metadata;
+    multi-sheet workbooks from their cached combined sheets.
+
+    Parameters:
+    loaded_file (str or list of str): See `load_dataset`.
+
+    Returns:
+    list of str: The standardized columns.
+    """
+    if isinstance(loaded_file, (list, tuple)):
+        return read_wells_columns(loaded_file)
+    if is_channel_store(loaded_file):
+        return [channel["column"] for channel in read_channel_store_manifest(loaded_file)["channels"]]
+    if is_dataset_parquet(loaded_file):
+        return pq.read_schema(loaded_file).names
+    if is_multi_sheet_workbook(loaded_file):
+        return read_workbook_columns(loaded_file)
+    return make_unique_columns(projection.read_standardized_columns(loaded_file) or [])
+
+
+def read_dataset_version(loaded_file):
+    """
+    Return a version of the dataset referenced by st.session_state['loaded_file'] that changes whenever its
+    content does, without loading its data, e.g. to tell whether values computed for a previous frame still
+    apply (see `data_wrangle.clean_df.get_validity_masks`).
+
+    Channel stores and Parquet datasets return the version recorded when they were saved (see
+    `dataset_version`), raw files their cache key (see `dataset_cache.dataset_cache_key`), and the raw files
+    of a multi-well upload a hash of their cache keys.
+
+    Parameters:
+    loaded_file (str or list of str): See `load_dataset`.
+
+    Returns:
+    str or None: The version, or None if it is unknown.
+    """
+    try:
+        if isinstance(loaded_file, (list, tuple)):
+            keys = [dataset_cache.dataset_cache_key(file_path) for file_path in loaded_file]
+            return hashlib.sha256(json.dumps(keys).encode("utf-8")).hexdigest()
+        if is_channel_store(loaded_file):
+            return read_channel_store_version(loaded_file)[0]
+        if is_dataset_parquet(loaded_file):
+            return read_dataset_parquet_version(loaded_file)[0]
+        return dataset_cache.dataset_cache_key(loaded_file)
+    except (OSError, ValueError) as e:
+        print(f"Could not read the version of '{loaded_file}': {e}")
+        return None
+
+
+def is_raw_file(loaded_file):
+    """
+    Whether st.session_state['loaded_file'] is a single raw file, loaded by `load_file_standardize_header`.
+    """
+    return (isinstance(loaded_file, str) and not is_channel_store(loaded_file)
+            and not is_dataset_parquet(loaded_file) and not is_multi_sheet_workbook(loaded_file))
+
+
+def is_streamed_file(loaded_file):
+    """
+    Whether st.session_state['loaded_file'] is a single raw file large enough to be ingested chunk by chunk
+    (see `stream_file.should_stream`).
+    """
+    return is_raw_file(loaded_file) and stream_file.should_stream(loaded_file)
+
+
+def load_dataset(loaded_file, compact=config_constants['compact_dtypes'], columns=None,
+                 channels=None, clean_columns=None, outlier_columns=None):
+    """
+    Load the dataset referenced by st.session_state['loaded_file'].
+
+    Parameters:
+    loaded_file (str or list of str): A raw file (including a raw Parquet upload or a multi-sheet workbook,
+        whose sheets are loaded in parallel), the raw files of a multi-well upload, or the channel store or
+        Parquet file of a cleaned dataset.
+    compact (bool, optional): Whether to downcast the loaded frame (see `compact_dtypes`).
+        Defaults to config_constants['compact_dtypes'].
+    columns (list of str, optional): The columns to load (see `projection.required_columns`). Raw files
+        only parse these columns, channel stores only map them and Parquet files only read them.
+        Defaults to None, which loads all columns.
+    channels, clean_columns, outlier_columns (list of str, optional): The derived channels to add, the columns
+        to clean and the columns from which outliers are removed (see `load_file_standardize_header`). A streamed
+        raw file is prepared chunk by chunk while it is ingested (see `is_streamed_file`), any other dataset once
+        loaded. Default to None.
+
+    Returns:
+    df (pandas.DataFrame): The standardized DataFrame.
+    """
+    if is_raw_file(loaded_file):
+        return load_file_standardize_header(loaded_file, compact=compact, columns=columns, channels=channels,
+                                            clean_columns=clean_columns, outlier_columns=outlier_columns)
+    df = load_standardized_dataset(loaded_file, compact, columns)
+    if df is not None and (channels or clean_columns or outlier_columns):
+        df = prepare_dataframe(df, channels, clean_columns, outlier_columns)
+    return df
+
+
+def load_standardized_dataset(loaded_file, compact, columns):
+    """
+    Load a multi-well upload, a channel store, a Parquet dataset or a multi-sheet workbook. See `load_dataset`.
+    """
+    if isinstance(loaded_file, (list, tuple)):
+        return load_files_standardize_header(loaded_file, compact=compact, columns=columns)
+    if is_channel_store(loaded_file) or is_dataset_parquet(loaded_file):
+        if columns is not None:
+            columns = set(columns)
+            columns = [column for column in read_available_columns(loaded_file) if column in columns]
+        df = (open_channel_store(loaded_file, columns) if is_channel_store(loaded_file)
+              else load_dataset_parquet(loaded_file, columns))
+        # The derived channels of a saved dataset are recomputed from its inputs, so datasets saved with an
+        # older formula (e.g. 'MSE (ksi)' before the MSE formulas were merged) get the current values
+        compute_derived_channels(df, [column for column in DERIVED_CHANNELS if column in df.columns])
+        if compact:
+            df, report = compact_dtypes(df)
+            print_memory_report(report)
+        return df
+    if is_multi_sheet_workbook(loaded_file):
+        df = load_workbook_standardize_header(loaded_file, columns=columns)
+        if compact and df is not None:
+            df, report = compact_dtypes(df)
+            print_memory_report(report)
+        return df
@@ -0,0 +1,138 @@
+import json
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .channel_store import split_column_name
+from .headers import make_unique_columns
+
+
+PARQUET_DATASET_FORMAT_VERSION = 1
+PARQUET_DATASET_EXTENSION = ".parquet"
+# Key of the schema metadata holding the header and unit of every column
+DATASET_METADATA_KEY = b"mse_analysis"
+
+
+def dataset_schema(df, version=None, lineage=None):
+    """
+    Build the Arrow schema of a standardized DataFrame with the header and unit of each column in the metadata.
+
+    Each field carries its own 'mnemonic' and 'unit' metadata, and the schema metadata holds the list of
+    columns under DATASET_METADATA_KEY, which replaces the units row of the unmerged Excel layout, along with
+    the dataset version and lineage.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields = []
+    columns = []
+    for field in table.schema:
+        mnemonic, unit = split_column_name(field.name)
+        fields.append(field.with_metadata({b"mnemonic": mnemonic.encode("utf-8"),
+                                           b"unit": unit.encode("utf-8")}))
+        columns.append({"column": field.name, "mnemonic": mnemonic, "unit": unit})
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[DATASET_METADATA_KEY] = json.dumps(
+        {"format_version": PARQUET_DATASET_FORMAT_VERSION, "version": version,
+         "lineage": lineage or [], "columns": columns}).encode("utf-8")
+    return pa.Table.from_arrays(table.columns, schema=pa.schema(fields, metadata=metadata))
+
+
+def save_dataset_parquet(df, file_path, version=None, lineage=None):
+    """
+    Save a standardized DataFrame as Parquet, the working format of intermediate (cleaned/clustered) datasets.
+
+    The header and unit of every column are stored in the Parquet schema (see `dataset_schema`). Duplicated column
+    names, which Parquet cannot store, are suffixed (see `headers.make_unique_columns`). The file is written
+    under a temporary name and renamed into place.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame to save.
+    file_path (str): The path of the Parquet file.
+    version (str, optional): The dataset version recorded in the schema (see `dataset_version`).
+    lineage (list of dict, optional): The operations that produced the dataset, recorded in the schema.
+
+    Returns:
+    str: file_path.
+    """
+    if df.columns.duplicated().any():
+        df = df.set_axis(make_unique_columns(df.columns), axis=1)
+
+    table = dataset_schema(df, version, lineage)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return file_path
+
+
+def load_dataset_parquet(file_path, columns=None):
+    """
+    Load a dataset saved by `save_dataset_parquet`.
+
+    Parameters:
+    file_path (str): The path of the Parquet file.
+    columns (list of str, optional): The columns to read. Defaults to None, which reads all columns.
+
+    Returns:
+    df (pandas.DataFrame): The DataFrame with "MNEMONIC (unit)" columns.
+    """
+    return pq.read_table(file_path, columns=columns, memory_map=True).to_pandas()
+
+
+def is_dataset_parquet(path):
+    """
+    Whether a path is a dataset saved by `save_dataset_parquet`, as opposed to a raw Parquet upload.
+    """
+    if not isinstance(path, str) or not path.endswith(PARQUET_DATASET_EXTENSION):
+        return False
+    return DATASET_METADATA_KEY in (pq.read_schema(path).metadata or {})
+
+
+def read_dataset_columns(file_path):
+    """
+    Read the header and unit of every column from the schema of a dataset saved by `save_dataset_parquet`.
+
+    Returns:
+    list of dict: One {'column', 'mnemonic', 'unit'} entry per column.
+    """
+    metadata = pq.read_schema(file_path).metadata or {}
+    if DATASET_METADATA_KEY not in metadata:
+        raise ValueError(f"'{file_path}' has no header/unit metadata.")
+    return json.loads(metadata[DATASET_METADATA_KEY])["columns"]
+
+
+def read_dataset_parquet_version(file_path):
+    """
+    Return the (version, lineage) recorded in the schema of a dataset saved by `save_dataset_parquet`.
+    """
+    metadata = json.loads((pq.read_schema(file_path).metadata or {})[DATASET_METADATA_KEY])
+    return metadata.get("version"), metadata.get("lineage", [])
+
+
+def export_dataset_to_excel(file_path, excel_path=None):
+    """
+    Export a Parquet dataset to Excel with a header row and a units row, on demand.
+
+    The Excel file is only regenerated when it is missing or older than the Parquet file.
+
+    Parameters:
+    file_path (str): The path of the Parquet dataset.
+    excel_path (str, optional): The path of the Excel file. Defaults to the dataset path with an .xlsx extension.
+
+    Returns:
+    str: excel_path.
+    """
+    # Imported here, as save_file imports this module
+    from .save_file import unmerge_df_headers_and_save_file
+
+    if excel_path is None:
+        excel_path = f"{os.path.splitext(file_path)[0]}.xlsx"
+
+    if os.path.exists(excel_path) and os.path.getmtime(excel_path) >= os.path.getmtime(file_path):
+        return excel_path
+
+    unmerge_df_headers_and_save_file(load_dataset_parquet(file_path), excel_path)
+    return excel_path
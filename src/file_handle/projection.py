@@ -0,0 +1,120 @@
+import pandas as pd
+from utils import get_columns_by_mnemonics
+from data_wrangle.derived_channels import DERIVED_CHANNELS, get_channel_mnemonic, get_raw_input_mnemonics
+from . import headers, units, units_config, load_file
+from .channel_store import split_column_name
+
+
+# Channels the registered derived channels (see `data_wrangle.derived_channels`) are computed from
+DERIVED_INPUT_MNEMONICS = get_raw_input_mnemonics()
+
+# Derived and tag columns read by the clustering, MSE-min and optimization features
+KEPT_MNEMONICS = {"MSE_min", "BIT_DIAMETER", "cluster", "well", "section"} | {
+    get_channel_mnemonic(column) for column in DERIVED_CHANNELS}
+
+
+def resolve_standardized_columns(merged_columns):
+    """
+    Resolve the standardized names of a file's columns from its merged "MNEMONIC (unit)" header alone.
+
+    Header standardization and the unit renaming only depend on the column names, so they are run on an
+    empty frame. The mapping is the one `load_file_standardize_header` would produce for the whole file.
+
+    Parameters:
+    merged_columns (list of str): The merged header of the raw file.
+
+    Returns:
+    tuple: (standardized names before unit conversion, final names after unit conversion)
+    """
+    standardized = list(headers.standardize_mnemonics(pd.DataFrame(columns=merged_columns)).columns)
+    final = list(units.standardize_units(pd.DataFrame(columns=standardized),
+                                         units_config.unit_conversion_mappings).columns)
+    return standardized, final
+
+
+def read_standardized_columns(file_path):
+    """
+    Read the final standardized column names of a raw file without loading its data.
+
+    Returns:
+    list of str: The column names `load_file_standardize_header` returns for the file, or None.
+    """
+    merged_columns = load_file.read_merged_header(file_path)
+    if merged_columns is None:
+        return None
+    return resolve_standardized_columns(merged_columns)[1]
+
+
+def project_positions(final_columns, columns):
+    """
+    Return the positions of the requested columns in a file's standardized header.
+
+    A column is selected by its name or by its de-duplicated name (see `headers.make_unique_columns`),
+    so 'BIT_RPM_2 (rpm)' from a multi-well dataset selects the second BIT_RPM channel.
+    """
+    columns = set(columns)
+    unique_columns = headers.make_unique_columns(final_columns)
+    return [position for position, (column, unique_column) in enumerate(zip(final_columns, unique_columns))
+            if column in columns or unique_column in columns]
+
+
+def required_columns(available_columns, selected_columns):
+    """
+    Return the columns downstream steps need: the selected columns plus the inputs of the derived channels
+    and the derived/tag columns (DOC, Mu, MSE and the other derived channels, MSE_min, BIT_DIAMETER, cluster,
+    well, section).
+
+    The inputs of the derived channels are found the way `add_columns` finds them (first column containing the
+    mnemonic, see `get_columns_by_mnemonics`), so the derived channels are computed from the same columns.
+
+    Parameters:
+    available_columns (list of str): The columns of the dataset.
+    selected_columns (iterable of str): The columns selected for cleaning, clustering, modelling and plotting.
+
+    Returns:
+    list of str: The required columns, in dataset order.
+    """
+    required = set(selected_columns)
+    required.update(get_columns_by_mnemonics(pd.DataFrame(columns=available_columns),
+                                             DERIVED_INPUT_MNEMONICS))
+    required.update(column for column in available_columns
+                    if split_column_name(column)[0] in KEPT_MNEMONICS)
+    return [column for column in dict.fromkeys(available_columns) if column in required]
+
+
+def load_file_projected(file_path, columns):
+    """
+    Load and standardize only the requested columns of a raw file.
+
+    The header is resolved first (see `resolve_standardized_columns`), and only the matching columns are
+    read, NaN-converted and unit-converted; the others are never parsed.
+
+    Parameters:
+    file_path (str): The path to the raw file.
+    columns (list of str): The standardized columns to load.
+
+    Returns:
+    df (pandas.DataFrame): The standardized DataFrame with the requested columns, in file order and with
+        de-duplicated names (see `headers.make_unique_columns`), or None.
+    """
+    merged_columns = load_file.read_merged_header(file_path)
+    if merged_columns is None:
+        return None
+
+    standardized, final = resolve_standardized_columns(merged_columns)
+    positions = project_positions(final, columns)
+    if not positions:
+        return pd.DataFrame()
+
+    df = load_file.load_file_columns(file_path, positions)
+    if df is None:
+        return None
+
+    df.columns = [standardized[position] for position in positions]
+    df = units.standardize_units(df, units_config.unit_conversion_mappings)
+
+    # Name the columns after the de-duplicated header, so a projection keeps the names
+    # the channels have in the whole file (e.g. 'BIT_RPM_2 (rpm)')
+    unique_columns = headers.make_unique_columns(final)
+    df.columns = [unique_columns[position] for position in positions]
+    return df
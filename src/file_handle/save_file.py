@@ -1,9 +1,93 @@
+import gzip
+import hashlib
+import json
 import os
+import zipfile
 import pandas as pd
 import numpy as np
 import streamlit as st
 from config import temp_directory, each_project_folders
 from utils import ensure_directory_exists
+from .channel_store import save_channel_store, get_channel_store_path, split_column_name, CHANNEL_STORE_SUFFIX
+from .channel_store import read_channel_store_version, open_channel_store, MANIFEST_FILE
+from .dataset_version import dataset_version, extend_lineage
+from . import dataset_cache
+from .parquet_dataset import PARQUET_DATASET_EXTENSION
+
+
+# Size of the blocks an upload is copied, decompressed and hashed in, so memory stays bounded
+UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+# Index of the saved uploads by path, with their content hash, kept in the upload folder
+UPLOAD_INDEX_FILE = "upload_index.json"
+# Extensions of the files the loaders read, as uploaded or inside a .gz/.zip upload
+UPLOAD_DATA_EXTENSIONS = (".csv", ".txt", ".las", ".xlsx", ".xls", PARQUET_DATASET_EXTENSION)
+
+
+def open_upload_stream(uploaded_file):
+    """
+    Open the content of an upload as a binary stream, decompressing .gz and .zip uploads on the fly.
+
+    A .gz upload is read through `gzip.GzipFile` and a .zip upload through the stream of its single data
+    file, so neither is decompressed in memory.
+
+    Parameters:
+    uploaded_file (UploadedFile): The file uploaded by the user.
+
+    Returns:
+    tuple: (stream, file name of the content), or (None, None) if the upload holds no supported file.
+    """
+    name = os.path.basename(uploaded_file.name)
+    extension = os.path.splitext(name)[1].lower()
+
+    if extension == ".gz":
+        return gzip.GzipFile(fileobj=uploaded_file, mode="rb"), os.path.splitext(name)[0]
+
+    if extension == ".zip":
+        archive = zipfile.ZipFile(uploaded_file)
+        members = [member for member in archive.infolist() if not member.is_dir()
+                   and os.path.splitext(member.filename)[1].lower() in UPLOAD_DATA_EXTENSIONS]
+        if len(members) != 1:
+            print(f"Expected one data file in {name}, found {len(members)}.")
+            return None, None
+        return archive.open(members[0]), os.path.basename(members[0].filename)
+
+    return uploaded_file, name
+
+
+def read_upload_index(uploaded_folder):
+    index_path = os.path.join(uploaded_folder, UPLOAD_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read upload index {index_path}: {e}")
+        return {}
+
+
+def save_upload_index(uploaded_folder, index):
+    index_path = os.path.join(uploaded_folder, UPLOAD_INDEX_FILE)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+
+def find_saved_upload(index, file_path, content_hash):
+    """
+    Return the saved file at `file_path` if it has the given content hash and is still on disk unchanged.
+
+    The file name is part of the key: the well tag of a dataset comes from its file name, so the same bytes
+    uploaded under another name are saved again under that name.
+    """
+    entry = index.get(file_path)
+    if entry is None or entry.get("hash") != content_hash or not os.path.exists(file_path):
+        return None
+    stat = os.stat(file_path)
+    if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+        return None
+    return file_path
 
 
 def save_uploaded_file(
@@ -23,10 +107,16 @@ def save_uploaded_file(
     over file handling. It ensures that the file is correctly received and
     stored before any operations are performed on it.
 
+    The upload is copied in blocks of UPLOAD_CHUNK_BYTES and hashed (SHA-256) while it is written. .gz and .zip
+    uploads are decompressed on the fly (see `open_upload_stream`) and saved under the name of their content,
+    e.g. "well_1.csv.gz" -> "well_1.csv". When a file with the same name and content was already saved, the new
+    copy is dropped and the saved file is returned, so identical re-uploads are not stored twice and keep their
+    dataset cache entries.
+
     Parameters
     ----------
     uploaded_file : UploadedFile
-        The file uploaded by the user.
+        The file uploaded by the user (.csv, .txt, .las, .xlsx, .xls or .parquet, optionally as .gz or .zip).
     uploaded_folder : str, optional
         The directory where the uploaded file will be saved. By default, this is
         set to the value of folder["uploaded_folder"].
@@ -34,74 +124,185 @@ def save_uploaded_file(
     Returns
     -------
     str
-        The absolute path to the saved file. If no file was uploaded, returns None.
+        The absolute path to the saved file. If no file was uploaded, or it holds no supported file, returns None.
     """
     if uploaded_file is not None:
         # Create a uploaded_folder if it doesn't exist
         ensure_directory_exists(uploaded_folder)
 
-        # Write the file to the new uploaded_folder
-        file_path = os.path.join(uploaded_folder, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-
-        # Get the absolute path
-        absolute_file_path = os.path.abspath(file_path)
-        return absolute_file_path
+        # The upload may already have been read (e.g. by a preview), so stream it from the start
+        uploaded_file.seek(0)
+        try:
+            stream, file_name = open_upload_stream(uploaded_file)
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"Could not open upload {uploaded_file.name}: {e}")
+            return None
+        if stream is None:
+            return None
+        if not file_name.lower().endswith(UPLOAD_DATA_EXTENSIONS):
+            print(f"Unsupported file type: {file_name}")
+            return None
+
+        # Write the content to a temporary file, hashing it block by block
+        file_path = os.path.abspath(os.path.join(uploaded_folder, file_name))
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        digest = hashlib.sha256()
+        try:
+            with open(tmp_path, "wb") as f:
+                for block in iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b""):
+                    digest.update(block)
+                    f.write(block)
+        except (OSError, EOFError, zipfile.BadZipFile) as e:
+            print(f"Could not save upload {uploaded_file.name}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        content_hash = digest.hexdigest()
+
+        index = read_upload_index(uploaded_folder)
+        saved_path = find_saved_upload(index, file_path, content_hash)
+        if saved_path is not None:
+            os.remove(tmp_path)
+            return saved_path
+
+        os.replace(tmp_path, file_path)
+        stat = os.stat(file_path)
+        index[file_path] = {"hash": content_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        save_upload_index(uploaded_folder, index)
+
+        # The dataset cache key needs the same hash, so it does not read the file again
+        dataset_cache.remember_content_hash(file_path, content_hash)
+        return file_path
 
     return None
 
 
-def save_cleaned_df_to_file_and_update_session_state(cleaned_df):
+def save_cleaned_df_to_file_and_update_session_state(cleaned_df, operation=None):
     """
-    Save a cleaned DataFrame to a CSV file and update the session state.
+    Save a cleaned DataFrame to a channel store and update the session state.
+
+    This function takes a cleaned DataFrame as input. It saves the DataFrame as a channel store, with the header
+    and unit of every column in its manifest (see `channel_store.save_channel_store`), in the
+    "cleaned_data_folder" in temp_folder, and the session state of loaded_file is updated to the store, so reruns
+    memory-map the cleaned channels instead of re-reading the file. The dataset is written once, as the store only.
+
+    Saves are versioned: the version is built from the content of the DataFrame and the lineage of operations
+    that produced it (see `dataset_version`). When the saved dataset already has this version, nothing is
+    written, so reruns that do not change the data cost a fingerprint instead of a full write.
 
-    This function takes a cleaned DataFrame as input. It saves the DataFrame to a CSV file
-    in the "cleaned_data_folder" in temp_folder, and updates the session state of loaded_file
-    to reflect the new file path.
+    Excel is no longer written on every save; it is built from the store on request, see
+    `export_cleaned_df_to_excel`.
 
     Parameters:
     cleaned_df (pandas.DataFrame): The cleaned DataFrame to be saved.
+    operation (dict, optional): The operation that produced the DataFrame, appended to the lineage of the
+        loaded dataset, e.g. {'operation': 'cleaning', 'columns': [...]}.
 
     Returns:
-    None
+    pandas.DataFrame: The saved DataFrame.
     """
+    loaded_file = st.session_state["loaded_file"]
+
     # Save the cleaned df to a new file
     # with the same name, but in cleaned_data_folder
-    cleaned_file_path = os.path.join(
-        os.path.join(temp_directory, each_project_folders["cleaned_data_folder"]),
-        os.path.basename(st.session_state["loaded_file"]),
-    )
+    cleaned_file_path = get_cleaned_file_path(loaded_file)
+    store_path = get_channel_store_path(cleaned_file_path)
+
+    # The lineage continues the one of the loaded dataset (empty for a raw file)
+    _, previous_lineage = read_channel_store_version(loaded_file)
+    lineage = extend_lineage(previous_lineage, operation)
+    version = dataset_version(cleaned_df, lineage)
 
-    ensure_directory_exists(
-        os.path.join(
-            os.path.join(temp_directory, each_project_folders["cleaned_data_folder"])
-        )
+    saved_version, _ = read_channel_store_version(store_path)
+    if version is not None and version == saved_version:
+        print(f"Dataset unchanged, skipped saving {store_path}")
+    else:
+        ensure_directory_exists(os.path.dirname(cleaned_file_path))
+
+        # Save cleaned df to cleaned_data_folder in temp_folder
+        save_channel_store(cleaned_df, store_path, version, lineage)
+
+    # Update st.session_state['loaded_file'] to the channel store of the cleaned file
+    st.session_state["loaded_file"] = store_path
+
+    return cleaned_df
+
+
+def get_cleaned_file_path(loaded_file):
+    """
+    Return the path the cleaned dataset of the loaded dataset is saved under, in cleaned_data_folder in temp_folder.
+
+    The channel store is this path with the channel store suffix, and the Excel export this path with an .xlsx
+    extension.
+    """
+    file_name = os.path.splitext(get_dataset_file_name(loaded_file))[0]
+    return os.path.join(
+        temp_directory, each_project_folders["cleaned_data_folder"],
+        f"{file_name}{PARQUET_DATASET_EXTENSION}",
     )
 
-    # Save cleaned df to cleaned_data_folder in temp_folder
-    df = unmerge_df_headers_and_save_file(cleaned_df, cleaned_file_path)
 
-    # Update st.session_state['loaded_file'] to the cleaned file
-    st.session_state["loaded_file"] = cleaned_file_path
+def export_cleaned_df_to_excel(loaded_file):
+    """
+    Export the cleaned dataset to Excel (header row and units row) next to its channel store.
 
-    return df
+    The Excel file is built from the store on demand, and reused while the store is unchanged.
 
+    Parameters:
+    loaded_file (str): st.session_state['loaded_file'] after cleaning.
 
-def save_clustered_df_to_file_and_update_session_state(clustered_df):
+    Returns:
+    str: The path of the Excel file.
     """
-    Clustering is applied to the cleaned DataFrame and the clustered DataFrame is saved to a CSV file.
+    cleaned_file_path = get_cleaned_file_path(loaded_file)
+    store_path = get_channel_store_path(cleaned_file_path)
+    excel_path = f"{os.path.splitext(cleaned_file_path)[0]}.xlsx"
 
-    As clustering is only added clustered columns but not change the original cleaned DataFrame, it is fine to save the clustered DataFrame to a CSV file
+    if os.path.exists(excel_path) and \
+            os.path.getmtime(excel_path) >= os.path.getmtime(os.path.join(store_path, MANIFEST_FILE)):
+        return excel_path
+
+    unmerge_df_headers_and_save_file(open_channel_store(store_path), excel_path)
+    return excel_path
+
+
+def get_dataset_file_name(loaded_file):
+    """
+    Return the file name used for the saved copy of the loaded dataset.
+
+    Parameters:
+    loaded_file (str or list of str): The loaded file, or the raw files of a multi-well upload.
+
+    Returns:
+    str: The base name of the loaded file (without the channel store suffix),
+         or "combined_<n>_wells_<hash>" for several wells, where the hash is built from the sorted content
+         hashes of their files, so different well sets of the same size get different names.
+    """
+    if isinstance(loaded_file, (list, tuple)):
+        content_hashes = sorted(dataset_cache.file_content_hash(file_path) for file_path in loaded_file)
+        wells_hash = hashlib.sha256(json.dumps(content_hashes).encode("utf-8")).hexdigest()[:16]
+        return f"combined_{len(loaded_file)}_wells_{wells_hash}"
+    file_name = os.path.basename(loaded_file)
+    if file_name.endswith(CHANNEL_STORE_SUFFIX):
+        file_name = file_name[:-len(CHANNEL_STORE_SUFFIX)]
+    return file_name
+
+
+def save_clustered_df_to_file_and_update_session_state(clustered_df, operation=None):
+    """
+    Clustering is applied to the cleaned DataFrame and the clustered DataFrame is saved to a Parquet file.
+
+    As clustering is only added clustered columns but not change the original cleaned DataFrame, it is fine to save the clustered DataFrame
     with the same name as the cleaned DataFrame.
 
     Parameters:
     clustered_df (pandas.DataFrame): The clustered DataFrame to be saved.
+    operation (dict, optional): The operation that produced the DataFrame, see `save_cleaned_df_to_file_and_update_session_state`.
 
     Returns:
-    None
+    pandas.DataFrame: The saved DataFrame.
     """
-    return save_cleaned_df_to_file_and_update_session_state(clustered_df)
+    return save_cleaned_df_to_file_and_update_session_state(clustered_df, operation)
 
 
 def unmerge_df_headers_and_save_file(df, file_path):
@@ -109,6 +310,9 @@ def unmerge_df_headers_and_save_file(df, file_path):
     Unmerges the headers of a DataFrame (e.g., "Header (Unit)") into two rows:
     one for the header and one for the unit. Saves the modified DataFrame to a file.
 
+    When several columns share the same header, the header keeps the position of its
+    first column and the data of its last column.
+
     Args:
         df (pd.DataFrame): The DataFrame with merged headers.
         file_path (str): The path where the modified DataFrame should be saved.
@@ -116,60 +320,28 @@ def unmerge_df_headers_and_save_file(df, file_path):
     Returns:
         pd.DataFrame: The DataFrame with unmerged headers.
     """
-    new_df = pd.DataFrame()
-    # Keep track of the original column name associated with each new header
-    # This handles cases where duplicate base headers might cause overwrites.
-    # We map the final header to the *last* original column that generated it.
-    header_to_original_col = {}
-
-    for column in df.columns:
-        # Extract the main header part (before the parenthesis)
-        header = column.split("(")[0].strip()
-        # Assign the original column data to the new header in new_df
-        new_df[header] = df[column]
-        # Store the mapping from the potentially simplified header back to its original full name
-        header_to_original_col[header] = column
-
-    # Generate the units row based on the actual columns in new_df
-    units_row = []
-    for header in new_df.columns:
-        original_column = header_to_original_col[header]
-        unit = ""
-        # Extract unit from the original column name if parentheses are present
-        if "(" in original_column and ")" in original_column:
-            try:
-                unit = original_column.split("(")[-1].split(")")[0].strip()
-            except IndexError:
-                unit = ""  # Handle cases where splitting might fail unexpectedly
-        units_row.append(unit)
-
-    # Assign the units row (now guaranteed to match the number of columns in new_df)
-    # Ensure the index exists before assigning; inserting might be safer.
-    # Temporarily add a dummy row if df was empty, then replace it.
-    if 0 not in new_df.index:
-        # If the original df was empty, new_df might be too.
-        # Or if index doesn't start at 0. Let's use insert for safety.
-        # Create a temporary DataFrame for the units row
-        units_df = pd.DataFrame([units_row], columns=new_df.columns, index=[0])
-        # Concatenate and sort to place the units row at index 0
-        new_df = pd.concat([units_df, new_df]).sort_index()
-    else:
-        # If index 0 already exists (e.g., from original data), overwrite it.
-        # This assumes the original data doesn't meaningfully use index 0.
-        # A safer approach might be to shift existing indices up first.
-        # Let's stick to the original intent of using loc[0] for units.
-        new_df.loc[0] = units_row
-        new_df.sort_index(inplace=True)  # Ensure row 0 is at the top
-
-    # Save the DataFrame using the provided file_path
-    # Example saving logic (replace with your actual saving method if different)
+    # Map each header to the *last* original column that generated it
+    header_to_position = {}
+    for position, column in enumerate(df.columns):
+        header = str(column).split("(")[0].strip()
+        header_to_position[header] = position
+
+    headers = list(header_to_position)
+    new_df = df.iloc[:, list(header_to_position.values())].set_axis(headers, axis=1)
+
+    # Extract unit from the original column name if parentheses are present
+    units_row = [split_column_name(df.columns[position])[1]
+                 for position in header_to_position.values()]
+
+    # Put the units row on top of the data
+    units_df = pd.DataFrame([units_row], columns=headers, dtype=object)
+    new_df = pd.concat([units_df, new_df.astype(object)], ignore_index=True)
+
     try:
-        # Assuming saving to Excel, adjust if saving to CSV or other formats
         new_df.to_excel(file_path, index=False)
         print(f"Successfully saved unmerged DataFrame to {file_path}")
     except Exception as e:
         print(f"Error saving DataFrame to {file_path}: {e}")
-        # Optionally re-raise the exception or handle it as needed
         raise
 
     return new_df
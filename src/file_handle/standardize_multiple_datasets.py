@@ -0,0 +1,142 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from config import config_constants
+from .standardize_single_dataset import load_file_standardize_header, load_cached_standardized_dataframe
+from .file_handling import get_base_filename
+from .headers import make_unique_columns
+from .compact_dtypes import compact_dtypes, print_memory_report
+from . import projection
+
+
+# Standardized name of the column tagging each row with its well, following the "MNEMONIC (unit)" convention
+WELL_COLUMN = "well ()"
+
+
+def load_well_standardize_header(file_path, use_cache=True, columns=None):
+    """
+    Load and standardize one well with `load_file_standardize_header` and tag its rows with the well name.
+
+    The well name is the file name without extension, as in `file_handling.set_header`. Duplicated standardized
+    columns are suffixed (see `headers.make_unique_columns`) so the frames of several wells can be combined.
+
+    Parameters:
+    file_path (str): The path to the raw file of the well.
+    use_cache (bool, optional): Whether to use the on-disk dataset cache. Defaults to True.
+    columns (list of str, optional): The standardized columns to load. Defaults to None, which loads all columns.
+
+    Returns:
+    df (pandas.DataFrame): The standardized DataFrame with a 'well ()' column.
+    """
+    df = load_file_standardize_header(file_path, use_cache=use_cache, columns=well_columns(columns))
+    if df is None:
+        raise ValueError(f"Could not load file '{file_path}'.")
+    return tag_well(df, file_path)
+
+
+def well_columns(columns):
+    """
+    Return the columns to load from the file of one well: the requested ones without the well tag.
+    """
+    if columns is None:
+        return None
+    return [column for column in columns if column != WELL_COLUMN]
+
+
+def tag_well(df, file_path):
+    """
+    De-duplicate the standardized columns of one well and tag its rows with the well name (the file name).
+    """
+    df.columns = make_unique_columns(df.columns)
+    df[WELL_COLUMN] = get_base_filename(file_path)
+    return df
+
+
+def read_wells_columns(file_paths):
+    """
+    Read the standardized columns of a multi-well dataset from the headers of its files, without loading data.
+
+    Returns:
+    list of str: The de-duplicated columns of every well, in order of first appearance, and 'well ()'.
+    """
+    columns = {}
+    for file_path in file_paths:
+        final_columns = projection.read_standardized_columns(file_path) or []
+        columns.update(dict.fromkeys(make_unique_columns(final_columns)))
+    columns.pop(WELL_COLUMN, None)
+    return list(columns) + [WELL_COLUMN]
+
+
+def load_files_standardize_header(file_paths, use_cache=True,
+                                  max_workers=config_constants['ingestion_max_workers'], compact=False,
+                                  columns=None):
+    """
+    Load and standardize several wells concurrently and combine them into one DataFrame.
+
+    The on-disk dataset cache is checked first in this process, and wells found there are read from their cached
+    entries directly. Only the cache misses go through `load_well_standardize_header` in a process pool, so
+    loading, header standardization and unit conversion run in parallel across wells, and a rerun with the same
+    files starts no pool and pickles no frames back from workers.
+
+    The frames are concatenated in the order of `file_paths`. Channels missing from a well are NaN for its rows.
+    Files that fail to load are reported and skipped.
+
+    Parameters:
+    file_paths (list of str): The paths to the raw files, one per well.
+    use_cache (bool, optional): Whether to use the on-disk dataset cache. Defaults to True.
+    max_workers (int, optional): The maximum number of worker processes. Defaults to
+        config_constants['ingestion_max_workers']; None uses the number of CPUs.
+    compact (bool, optional): Whether to downcast the combined frame (see `compact_dtypes`), which stores the
+        'well ()' column as a categorical, and print its memory report. Defaults to False.
+    columns (list of str, optional): The standardized columns to load from every well (see
+        `load_file_standardize_header`). Defaults to None, which loads all columns.
+
+    Returns:
+    df (pandas.DataFrame): The combined DataFrame with a 'well ()' column, or None if no file could be loaded.
+    """
+    frames = {}
+    if use_cache:
+        for file_path in file_paths:
+            try:
+                df, _ = load_cached_standardized_dataframe(file_path, well_columns(columns))
+            except OSError as e:
+                print(f"Error loading well from {file_path}: {e}")
+                continue
+            if df is not None:
+                frames[file_path] = tag_well(df, file_path)
+    missing_paths = [file_path for file_path in file_paths if file_path not in frames]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(missing_paths)))
+
+    if max_workers == 1:
+        for file_path in missing_paths:
+            try:
+                frames[file_path] = load_well_standardize_header(file_path, use_cache, columns)
+            except Exception as e:
+                print(f"Error loading well from {file_path}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(load_well_standardize_header, file_path, use_cache, columns)
+                       for file_path in missing_paths]
+            for file_path, future in zip(missing_paths, futures):
+                try:
+                    frames[file_path] = future.result()
+                except Exception as e:
+                    print(f"Error loading well from {file_path}: {e}")
+
+    frames = [frames[file_path] for file_path in file_paths if file_path in frames]
+    if not frames:
+        return None
+
+    df = pd.concat(frames, ignore_index=True, sort=False)
+
+    # Keep the well tag as the last column, as in file_handling.set_header
+    columns = [column for column in df.columns if column != WELL_COLUMN] + [WELL_COLUMN]
+    df = df[columns]
+
+    if compact:
+        df, report = compact_dtypes(df)
+        print_memory_report(report)
+    return df
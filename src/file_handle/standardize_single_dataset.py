@@ -1,8 +1,15 @@
+import os
+import tempfile
 import pandas as pd
-from . import headers, units, units_config, load_file
+from config import cache_directory
+from utils import ensure_directory_exists
+from data_wrangle.clean_df import clean_df, remove_outliers
+from data_wrangle.add_columns import add_columns
+from . import headers, units, units_config, load_file, dataset_cache, stream_file, compact_dtypes, projection
 
 
-def load_file_standardize_header(file_path):
+def load_file_standardize_header(file_path, use_cache=True, streaming=None, compact=False, columns=None,
+                                 channels=None, clean_columns=None, outlier_columns=None):
     """
     Load a file, standardize the headers, and convert the units.
 
@@ -14,18 +21,194 @@ def load_file_standardize_header(file_path):
 
     3. Unit Conversion: Finally, the function converts the units of the DataFrame columns using the `standardize_units` function. This is done using a set of predefined conversion mappings. Each column's unit is mapped to a standard unit, and a conversion function is applied to convert the data in the column to the standard unit.
 
+    The standardized frame is cached on disk as Parquet (see `dataset_cache`), keyed by the file content hash,
+    its mtime and the header/unit configuration version, so Streamlit reruns that load the same file again skip
+    all three steps.
+
+    Large CSV/TXT and LAS files are streamed (see `stream_file`): they are read and standardized chunk by chunk and written
+    straight into the cache as Parquet, so peak memory during ingestion is bounded by the chunk size. The entry is then
+    converted into a channel store and its channels are memory-mapped (see `dataset_cache.save_cache_channel_store`),
+    so loading it does not read the whole file into memory either.
+
+    Duplicated standardized columns are suffixed (see `headers.make_unique_columns`) on every path, so a file gets the
+    same column names whether it is streamed, projected or loaded whole.
+
+    With `columns`, only those standardized columns are loaded: the header is resolved first and the other columns
+    are never parsed, unit-converted or cached (see `projection.load_file_projected`). When the whole file is already
+    cached, the columns are read from the cached Parquet file instead.
+
+    With `channels`, `clean_columns` or `outlier_columns`, the derived channels are added, the rows are cleaned on
+    `clean_columns` and the rows with outliers in `outlier_columns` are removed (see `prepare_dataframe`). A streamed
+    file is prepared chunk by chunk while it is ingested, with approximate quartiles past
+    config_constants['outlier_approx_min_rows'] rows, and the result is cached under its own key and memory-mapped
+    like any streamed entry (see `load_file_streaming_prepared`), so the whole file is never held in memory; a file
+    loaded in memory is prepared with exact quartiles.
+
     Parameters:
     file_path (str): The path to the file to be loaded. This should be a full path, including the file name and extension.
+    use_cache (bool, optional): Whether to read from and write to the on-disk cache. Defaults to True.
+    streaming (bool, optional): Whether to ingest the file in chunks. Defaults to None, which streams CSV/TXT/LAS files
+        larger than config_constants['streaming_threshold_mb'].
+    compact (bool, optional): Whether to downcast the loaded frame (see `compact_dtypes`) and print its memory
+        report. The cache always holds the full-precision frame. Defaults to False.
+    columns (list of str, optional): The standardized columns to load. Defaults to None, which loads all columns.
+    channels (list of str, optional): The derived channels to add (see `data_wrangle.add_columns`). Defaults to None,
+        which adds none.
+    clean_columns (list of str, optional): The columns to clean (see `data_wrangle.clean_df`). Defaults to None,
+        which cleans none.
+    outlier_columns (list of str, optional): The columns from which outliers are removed. Defaults to None, which
+        keeps every row.
 
     Returns:
     df (pandas.DataFrame): The DataFrame with standardized headers and units.
     """
-    df = load_file.load_file_and_merge_headers(file_path)
-    df = headers.standardize_mnemonics(df)
-    df = units.standardize_units(df, units_config.unit_conversion_mappings)
+    if streaming is None:
+        streaming = stream_file.should_stream(file_path)
+    prepared = bool(channels or clean_columns or outlier_columns)
+    if prepared and streaming:
+        df = load_file_streaming_prepared(file_path, use_cache, columns, channels, clean_columns, outlier_columns)
+    else:
+        df = load_standardized_dataframe(file_path, use_cache, streaming, columns)
+        if prepared and df is not None:
+            df = prepare_dataframe(df, channels, clean_columns, outlier_columns)
+
+    if compact and df is not None:
+        df, report = compact_dtypes.compact_dtypes(df)
+        compact_dtypes.print_memory_report(report)
+    return df
+
+
+def prepare_dataframe(df, channels=None, clean_columns=None, outlier_columns=None):
+    """
+    Add the derived channels to a standardized frame (or chunk), clean it on `clean_columns` and, when
+    `outlier_columns` is given, remove the rows with outliers in those columns with exact quartiles.
+    See `load_file_standardize_header`.
+    """
+    if channels:
+        df = add_columns(df, channels)
+    if clean_columns:
+        df = clean_df(df, clean_columns)
+    if outlier_columns:
+        df = remove_outliers(df, outlier_columns)
     return df
 
 
+def load_file_streaming_prepared(file_path, use_cache=True, columns=None, channels=None, clean_columns=None,
+                                 outlier_columns=None):
+    """
+    Stream a large CSV/TXT or LAS file with the derived channels added, cleaned and without outliers, chunk by chunk.
+
+    With the cache, the result is cached under its own key (see `dataset_cache.cleaned_cache_key`) and its channels
+    are memory-mapped; without it, the streamed file is read and removed. See `load_file_standardize_header`.
+    """
+    def prepare_chunk(chunk):
+        return prepare_dataframe(chunk, channels, clean_columns)
+
+    cache_key = None
+    if use_cache:
+        key = dataset_cache.dataset_cache_key(file_path)
+        if columns is not None:
+            key = dataset_cache.projected_cache_key(key, columns)
+        cache_key = dataset_cache.cleaned_cache_key(key, channels, clean_columns, outlier_columns)
+        df = dataset_cache.load_cached_dataframe(cache_key)
+        if df is not None:
+            return df
+
+    output_path = load_file_streaming(file_path, cache_key, columns, prepare_chunk=prepare_chunk,
+                                      outlier_columns=outlier_columns)
+    if cache_key is None:
+        df = pd.read_parquet(output_path)
+        os.remove(output_path)
+        return df
+    dataset_cache.save_cache_channel_store(cache_key)
+    return dataset_cache.load_cached_dataframe(cache_key)
+
+
+def load_cached_standardized_dataframe(file_path, columns=None):
+    """
+    Load a standardized DataFrame from the cache only: the entry of the whole file, or of the projection on `columns`.
+
+    Returns:
+    tuple: (the DataFrame or None on a miss, the cache key a new entry is saved under)
+    """
+    cache_key = dataset_cache.dataset_cache_key(file_path)
+    df = dataset_cache.load_cached_dataframe(cache_key, columns=columns)
+    if df is None and columns is not None:
+        cache_key = dataset_cache.projected_cache_key(cache_key, columns)
+        df = dataset_cache.load_cached_dataframe(cache_key)
+    return df, cache_key
+
+
+def load_standardized_dataframe(file_path, use_cache=True, streaming=None, columns=None):
+    """
+    Load a standardized DataFrame from the cache, by streaming, or in memory. See `load_file_standardize_header`.
+    """
+    cache_key = None
+    if use_cache:
+        df, cache_key = load_cached_standardized_dataframe(file_path, columns)
+        if df is not None:
+            return df
+
+    if streaming is None:
+        streaming = stream_file.should_stream(file_path)
+    if streaming:
+        output_path = load_file_streaming(file_path, cache_key, columns)
+        if cache_key is None:
+            # Without the cache there is no entry to map, so the streamed file is read and removed
+            df = pd.read_parquet(output_path)
+            os.remove(output_path)
+            return df
+        dataset_cache.save_cache_channel_store(cache_key)
+        return dataset_cache.load_cached_dataframe(cache_key)
+
+    if columns is None:
+        df = load_file.load_file_and_merge_headers(file_path)
+        df = headers.standardize_mnemonics(df)
+        df = units.standardize_units(df, units_config.unit_conversion_mappings)
+        if df is not None:
+            df.columns = headers.make_unique_columns(df.columns)
+    else:
+        df = projection.load_file_projected(file_path, columns)
+
+    if cache_key is not None and df is not None:
+        dataset_cache.save_dataframe_to_cache(cache_key, df)
+    return df
+
+
+def load_file_streaming(file_path, cache_key=None, columns=None, prepare_chunk=None, outlier_columns=None):
+    """
+    Stream a large CSV/TXT or LAS file into standardized Parquet, without loading the result.
+
+    With a cache key the Parquet file becomes the cache entry; without one it is written to a temporary file, which the
+    caller removes. The caller projects or memory-maps the file (see `dataset_cache.load_cached_dataframe`).
+
+    Parameters:
+    file_path (str): The path to the raw CSV/TXT or LAS file.
+    cache_key (str, optional): The cache key from `dataset_cache.dataset_cache_key`.
+    columns (list of str, optional): The standardized columns to stream. Defaults to None, which streams all columns.
+    prepare_chunk (callable, optional): Applied to every standardized chunk (see
+        `stream_file.stream_file_standardize_header`). Defaults to None.
+    outlier_columns (list of str, optional): The standardized columns from which outliers are removed while
+        streaming. Defaults to None, which keeps every row.
+
+    Returns:
+    str: The path of the Parquet file.
+    """
+    if cache_key is not None:
+        ensure_directory_exists(cache_directory)
+        output_path = dataset_cache.get_cache_path(cache_key)
+    else:
+        file_descriptor, output_path = tempfile.mkstemp(suffix=".parquet")
+        os.close(file_descriptor)
+
+    stream_file.stream_file_standardize_header(file_path, output_path, columns=columns,
+                                               prepare_chunk=prepare_chunk, outlier_columns=outlier_columns)
+
+    if cache_key is not None:
+        dataset_cache.evict_least_recently_used()
+    return output_path
+
+
 if __name__ == '__main__':
     file_path = r'c:/development/MSE_analysis/data_to_work/well_1.csv'
     df = load_file_standardize_header(file_path)
\ No newline at end of file
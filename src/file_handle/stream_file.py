@@ -0,0 +1,182 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import config_constants
+from data_wrangle.clean_df import remove_outliers_from_chunks
+from . import headers, units, units_config, load_file, projection, las_file
+
+
+# Delimiters used by load_file.load_file_into_dataframe for each text extension
+STREAMABLE_DELIMITERS = {".csv": ",", ".txt": "\t"}
+
+
+def should_stream(file_path, threshold_mb=config_constants['streaming_threshold_mb']):
+    """
+    Decide whether a file should be ingested in chunks rather than loaded whole.
+
+    Only CSV/TXT and LAS files can be streamed; Excel workbooks are always loaded whole.
+
+    Parameters:
+    file_path (str): The path to the raw file.
+    threshold_mb (float, optional): Files larger than this are streamed.
+
+    Returns:
+    bool: True if the file should be streamed.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in STREAMABLE_DELIMITERS and extension != las_file.LAS_EXTENSION:
+        return False
+    return os.path.getsize(file_path) > threshold_mb * 1024 * 1024
+
+
+def read_merged_header(file_path, delimiter, encoding):
+    """
+    Read the two header rows (mnemonic and unit) and merge them into "MNEMONIC (unit)" names.
+
+    Blank cells are named like pandas does for header=[0, 1], so the result matches
+    `load_file.load_file_and_merge_headers`.
+
+    Returns:
+    list of str: The merged column names.
+    """
+    header_rows = pd.read_csv(file_path, header=None, nrows=2, delimiter=delimiter,
+                              encoding=encoding, dtype=str)
+    merged = []
+    for i in range(header_rows.shape[1]):
+        mnemonic, unit = header_rows.iloc[0, i], header_rows.iloc[1, i]
+        mnemonic = f"Unnamed: {i}_level_0" if pd.isna(mnemonic) else mnemonic.strip()
+        unit = f"Unnamed: {i}_level_1" if pd.isna(unit) else unit.strip()
+        merged.append(f"{mnemonic} ({unit})")
+    return merged
+
+
+def normalize_chunk_types(chunk, numeric_positions):
+    """
+    Give every chunk the same column types so they can be appended to one Parquet file.
+
+    Columns that were numeric in the first chunk are coerced to float64 (so later NaNs and
+    sentinels fit); all other columns are stored as strings.
+    """
+    for position in range(chunk.shape[1]):
+        if position in numeric_positions:
+            chunk.isetitem(position, pd.to_numeric(
+                chunk.iloc[:, position], errors='coerce').astype('float64'))
+        else:
+            chunk.isetitem(position, chunk.iloc[:, position].astype('string'))
+    return chunk
+
+
+def iter_standardized_chunks(file_path, chunksize=config_constants['streaming_chunk_rows'], columns=None):
+    """
+    Read a CSV/TXT or LAS file in chunks and standardize each chunk.
+
+    Each chunk goes through the same steps as `load_file_standardize_header`: NaN sentinel
+    conversion, header standardization and unit conversion. The standardized mnemonics are
+    resolved once from the header (see `projection.resolve_standardized_columns`) and reused
+    for every chunk, so all chunks share one schema.
+
+    Parameters:
+    file_path (str): The path to the raw CSV/TXT or LAS file.
+    chunksize (int, optional): The number of rows per chunk.
+    columns (list of str, optional): The standardized columns to read; the other columns are
+        skipped by the reader. Defaults to None, which reads all columns.
+
+    Yields:
+    pandas.DataFrame: Standardized chunks with consistent columns and types.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == las_file.LAS_EXTENSION:
+        las_header = las_file.read_las_header(file_path)
+        merged_columns = [f"{mnemonic} ({unit})" for mnemonic, unit in las_header["curves"]]
+    else:
+        delimiter = STREAMABLE_DELIMITERS[extension]
+        try:
+            encoding = "utf-8"
+            merged_columns = read_merged_header(file_path, delimiter, encoding)
+        except UnicodeDecodeError:
+            encoding = "latin1"
+            merged_columns = read_merged_header(file_path, delimiter, encoding)
+
+    standardized_columns, final_columns = projection.resolve_standardized_columns(merged_columns)
+    positions = (list(range(len(final_columns))) if columns is None
+                 else projection.project_positions(final_columns, columns))
+    standardized_columns = [standardized_columns[position] for position in positions]
+    numeric_positions = None
+
+    if extension == las_file.LAS_EXTENSION:
+        reader = las_file.iter_las_chunks(file_path, chunksize, usecols=positions, header=las_header)
+    else:
+        reader = pd.read_csv(file_path, header=None, skiprows=2, delimiter=delimiter,
+                             encoding=encoding, chunksize=chunksize,
+                             usecols=None if columns is None else positions)
+    for chunk in reader:
+        chunk = load_file.convert_na_values(chunk)
+        chunk.columns = standardized_columns
+
+        chunk = units.standardize_units(
+            chunk, units_config.unit_conversion_mappings)
+        chunk.columns = headers.make_unique_columns(chunk.columns)
+
+        if numeric_positions is None:
+            numeric_positions = {position for position in range(chunk.shape[1])
+                                 if pd.api.types.is_numeric_dtype(chunk.iloc[:, position])}
+
+        yield normalize_chunk_types(chunk, numeric_positions)
+
+
+def stream_file_standardize_header(file_path, output_path,
+                                   chunksize=config_constants['streaming_chunk_rows'], columns=None,
+                                   prepare_chunk=None, outlier_columns=None):
+    """
+    Stream a large CSV/TXT or LAS drilling log into a standardized Parquet file.
+
+    Chunks from `iter_standardized_chunks` are appended to the Parquet file as they are
+    produced, so peak memory is bounded by the chunk size rather than the file size.
+    The file is written under a temporary name and renamed once complete.
+
+    With `prepare_chunk`, every standardized chunk is transformed before it is written, e.g. to add the derived
+    channels and clean rows, which only depends on the rows of the chunk. With `outlier_columns`, the rows with
+    outliers in those columns are removed while streaming (see `data_wrangle.clean_df.remove_outliers_from_chunks`):
+    the file is read twice, once for the IQR fences and once to write the filtered chunks.
+
+    Parameters:
+    file_path (str): The path to the raw CSV/TXT or LAS file.
+    output_path (str): The path of the Parquet file to write.
+    chunksize (int, optional): The number of rows per chunk.
+    columns (list of str, optional): The standardized columns to write. Defaults to None, which writes all columns.
+    prepare_chunk (callable, optional): Takes a standardized chunk and returns the chunk to write. Defaults to None,
+        which writes the chunks as they are.
+    outlier_columns (list of str, optional): The standardized columns from which outliers are removed. They must be
+        among the columns of the prepared chunks. Defaults to None, which keeps every row.
+
+    Returns:
+    str: output_path.
+    """
+    def make_chunks():
+        chunks = iter_standardized_chunks(file_path, chunksize, columns)
+        return chunks if prepare_chunk is None else (prepare_chunk(chunk) for chunk in chunks)
+
+    chunks = make_chunks() if not outlier_columns else remove_outliers_from_chunks(make_chunks, outlier_columns)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    except Exception:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if writer is None:
+        raise ValueError(f"No data rows found in file '{file_path}'.")
+
+    writer.close()
+    os.replace(tmp_path, output_path)
+    return output_path
@@ -0,0 +1,305 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import cache_directory, config_constants
+from utils import ensure_directory_exists
+from data_wrangle import add_columns
+from . import headers, units, units_config, load_file, projection, stream_file, dataset_cache
+
+
+TAIL_STATE_VERSION = 2
+
+# Largest block of appended bytes parsed at once, so the first read of a big log is bounded in memory
+TAIL_BLOCK_BYTES = 64 * 1024 * 1024
+
+# Serializes ingestion within a process (the watcher thread and Streamlit reruns)
+_ingest_lock = threading.Lock()
+
+
+def get_tail_paths(file_path, cache_folder=cache_directory):
+    """
+    Return the state file and the Parquet part directory used to follow a growing log.
+
+    Returns:
+    tuple: (state JSON path, dataset directory)
+    """
+    key = hashlib.sha256(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return (os.path.join(cache_folder, f"tail_{key}.json"),
+            os.path.join(cache_folder, f"tail_{key}"))
+
+
+def read_header_bytes(file_path):
+    """
+    Read the raw bytes of the two header rows (mnemonic and unit).
+
+    Returns:
+    bytes: The header rows, including their line endings; their length is the byte offset of the data.
+    """
+    with open(file_path, "rb") as f:
+        return f.readline() + f.readline()
+
+
+def read_tail_state(state_path):
+    if not os.path.exists(state_path):
+        return None
+    try:
+        with open(state_path, "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read tail state {state_path}: {e}")
+        return None
+    return state if state.get("version") == TAIL_STATE_VERSION else None
+
+
+def save_tail_state(state_path, state):
+    tmp_path = f"{state_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def new_tail_state(file_path, header_bytes, dataset_dir):
+    """
+    Resolve the schema of a log from its header and start an empty dataset for it.
+
+    The delimiter, encoding and standardized column names are stored in the state, so appended rows are
+    parsed without looking at the header again. The state also records the version of the header and unit
+    configuration (see `dataset_cache.standardization_config_version`), so rows standardized with another
+    configuration are never mixed.
+    """
+    delimiter = stream_file.STREAMABLE_DELIMITERS[os.path.splitext(file_path)[1].lower()]
+    try:
+        header_bytes.decode("utf-8")
+        encoding = "utf-8"
+    except UnicodeDecodeError:
+        encoding = "latin1"
+
+    standardized_columns, _ = projection.resolve_standardized_columns(
+        load_file.read_merged_header(file_path))
+
+    if os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    os.makedirs(dataset_dir)
+
+    return {
+        "version": TAIL_STATE_VERSION,
+        "file_path": os.path.abspath(file_path),
+        "header_sha256": hashlib.sha256(header_bytes).hexdigest(),
+        "config_version": dataset_cache.standardization_config_version(),
+        "delimiter": delimiter,
+        "encoding": encoding,
+        "standardized_columns": standardized_columns,
+        "numeric_columns": None,
+        "offset": len(header_bytes),
+        "n_rows": 0,
+        "parts": [],
+        "part_rows": [],
+    }
+
+
+def read_complete_lines(file_path, offset, block_bytes=TAIL_BLOCK_BYTES):
+    """
+    Read the complete lines appended after a byte offset, up to about `block_bytes`.
+
+    A last line without its line ending is still being written and is left for the next read.
+
+    Returns:
+    bytes: The complete lines (empty if there are none).
+    """
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        data = f.read(block_bytes)
+        if len(data) == block_bytes:
+            # Finish the line cut by the block boundary
+            data += f.readline()
+
+    end = data.rfind(b"\n")
+    return data[:end + 1] if end >= 0 else b""
+
+
+def standardize_rows(data, state):
+    """
+    Parse appended rows and standardize them like `load_file_standardize_header`, then add the derived columns.
+
+    NaN sentinels are converted, the stored standardized names are applied, units are converted and
+    `data_wrangle.add_columns` computes DOC, Mu and MSE for the new rows only. Column types are fixed on the
+    first block (see `stream_file.normalize_chunk_types`) so every part shares one schema.
+    """
+    names = range(len(state["standardized_columns"]))
+    rows = pd.read_csv(io.BytesIO(data), header=None, names=names, delimiter=state["delimiter"],
+                       encoding=state["encoding"], skip_blank_lines=True)
+    rows = load_file.convert_na_values(rows)
+    rows.columns = state["standardized_columns"]
+    rows = units.standardize_units(rows, units_config.unit_conversion_mappings)
+    rows.columns = headers.make_unique_columns(rows.columns)
+    rows = add_columns(rows)
+
+    if state["numeric_columns"] is None:
+        state["numeric_columns"] = [column for column in rows.columns
+                                    if pd.api.types.is_numeric_dtype(rows[column])]
+    numeric_columns = set(state["numeric_columns"])
+    numeric_positions = {position for position, column in enumerate(rows.columns)
+                         if column in numeric_columns}
+    return stream_file.normalize_chunk_types(rows, numeric_positions)
+
+
+def write_part(rows, state, dataset_dir, part_rows=config_constants['tail_part_rows']):
+    """
+    Append standardized rows to the Parquet parts of the dataset, with the schema of the first part.
+
+    Every poll that finds rows would otherwise leave a small part, and a rerun would open thousands of them.
+    So the rows are merged into the last part, which is rewritten, until it holds `part_rows` rows; only then
+    is a new part started.
+    """
+    table = pa.Table.from_pandas(rows, preserve_index=False)
+    if state["parts"]:
+        table = table.cast(pq.read_schema(os.path.join(dataset_dir, state["parts"][0])))
+
+    if state["parts"] and state["part_rows"][-1] < part_rows:
+        part = state["parts"][-1]
+        part_path = os.path.join(dataset_dir, part)
+        table = pa.concat_tables([pq.read_table(part_path).cast(table.schema), table])
+        state["part_rows"][-1] = table.num_rows
+    else:
+        part = f"part-{len(state['parts']):06d}.parquet"
+        part_path = os.path.join(dataset_dir, part)
+        state["parts"].append(part)
+        state["part_rows"].append(table.num_rows)
+
+    tmp_path = f"{part_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, part_path)
+
+
+def ingest_new_rows(file_path, cache_folder=cache_directory, block_bytes=TAIL_BLOCK_BYTES):
+    """
+    Ingest the rows appended to a growing CSV/TXT log since the last call.
+
+    The byte offset of the last complete line read and the resolved schema are kept in a state file, so only
+    the appended bytes are read and parsed. They are standardized (see `standardize_rows`) and appended to the
+    cached dataset (see `write_part`). When the header changes or the file shrinks (rotated or rewritten
+    log), or the header and unit configuration changed, the dataset is rebuilt from the start of the file.
+
+    Parameters:
+    file_path (str): The path to the raw CSV/TXT log.
+    cache_folder (str, optional): The cache directory. Defaults to config.cache_directory.
+    block_bytes (int, optional): The largest block of bytes parsed at once.
+
+    Returns:
+    int: The number of new rows. The rows themselves are only written to the parts, so a large first ingest
+        is never held whole (see `load_tail_dataset`).
+    """
+    with _ingest_lock:
+        ensure_directory_exists(cache_folder)
+        state_path, dataset_dir = get_tail_paths(file_path, cache_folder)
+        header_bytes = read_header_bytes(file_path)
+
+        state = read_tail_state(state_path)
+        if (state is None
+                or state["header_sha256"] != hashlib.sha256(header_bytes).hexdigest()
+                or state["config_version"] != dataset_cache.standardization_config_version()
+                or os.path.getsize(file_path) < state["offset"]):
+            state = new_tail_state(file_path, header_bytes, dataset_dir)
+            save_tail_state(state_path, state)
+
+        new_rows = 0
+        while True:
+            data = read_complete_lines(file_path, state["offset"], block_bytes)
+            if not data:
+                break
+
+            rows = standardize_rows(data, state)
+            if len(rows):
+                write_part(rows, state, dataset_dir)
+                new_rows += len(rows)
+
+            state["offset"] += len(data)
+            state["n_rows"] += len(rows)
+            save_tail_state(state_path, state)
+
+    return new_rows
+
+
+def read_tail_columns(file_path, cache_folder=cache_directory):
+    """
+    Read the columns of the dataset ingested from a growing log, including the derived columns.
+
+    Returns:
+    list of str: The columns, or None if the log has not been ingested yet.
+    """
+    state_path, dataset_dir = get_tail_paths(file_path, cache_folder)
+    state = read_tail_state(state_path)
+    if state is None or not state["parts"]:
+        return None
+    return pq.read_schema(os.path.join(dataset_dir, state["parts"][0])).names
+
+
+def load_tail_dataset(file_path, cache_folder=cache_directory, columns=None):
+    """
+    Load the dataset ingested so far from a growing log (see `ingest_new_rows`).
+
+    Parameters:
+    file_path (str): The path to the raw CSV/TXT log.
+    cache_folder (str, optional): The cache directory. Defaults to config.cache_directory.
+    columns (list of str, optional): Only read these columns. Defaults to None, which reads all columns.
+
+    Returns:
+    df (pandas.DataFrame): The standardized rows, or None if the log has not been ingested yet.
+    """
+    state_path, dataset_dir = get_tail_paths(file_path, cache_folder)
+    state = read_tail_state(state_path)
+    if state is None or not state["parts"]:
+        return None
+
+    part_paths = [os.path.join(dataset_dir, part) for part in state["parts"]]
+    if columns is not None:
+        columns = set(columns)
+        columns = [name for name in pq.read_schema(part_paths[0]).names if name in columns]
+    tables = [pq.read_table(part_path, columns=columns) for part_path in part_paths]
+    return pa.concat_tables(tables).to_pandas()
+
+
+def watch_file(file_path, interval=config_constants['tail_poll_interval_s'], callback=None, stop_event=None):
+    """
+    Poll a growing log and ingest appended rows every `interval` seconds until `stop_event` is set.
+
+    Parameters:
+    file_path (str): The path to the raw CSV/TXT log.
+    interval (float, optional): The polling interval in seconds. Defaults to config_constants['tail_poll_interval_s'].
+    callback (callable, optional): Called with the number of new rows whenever rows were appended.
+    stop_event (threading.Event, optional): Stops the watcher when set. Defaults to None, which polls forever.
+    """
+    while stop_event is None or not stop_event.is_set():
+        try:
+            new_rows = ingest_new_rows(file_path)
+            if callback is not None and new_rows:
+                callback(new_rows)
+        except Exception as e:
+            print(f"Error ingesting new rows from {file_path}: {e}")
+
+        if stop_event is None:
+            time.sleep(interval)
+        else:
+            stop_event.wait(interval)
+
+
+def start_tail_watcher(file_path, interval=config_constants['tail_poll_interval_s'], callback=None):
+    """
+    Start `watch_file` in a daemon thread.
+
+    Returns:
+    tuple: (thread, stop_event); set stop_event to stop the watcher.
+    """
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watch_file, args=(file_path, interval, callback, stop_event),
+                              daemon=True)
+    thread.start()
+    return thread, stop_event
@@ -0,0 +1,106 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from . import load_file
+
+
+# Number of data rows sampled to decide whether a column is a float channel or a string column
+SCHEMA_SAMPLE_ROWS = 1000
+
+# Null markers passed to the Arrow reader, on top of the drilling NaN sentinels
+ARROW_NULL_VALUES = ["", "NaN", "nan", "NA", "N/A", "null", "NULL"]
+
+
+def infer_column_types(sample):
+    """
+    Infer a float/string type for each column of a sample of data rows.
+
+    A column is a float channel when every sampled value, ignoring blanks, NaN sentinels and the
+    Arrow null markers (`ARROW_NULL_VALUES`, e.g. "NaN" or "NA"), parses as a number. Columns with no values at all are treated as float channels.
+
+    Parameters:
+    sample (pandas.DataFrame): Data rows read as strings, with positional column labels.
+
+    Returns:
+    list of str: 'float' or 'string' for each column position.
+    """
+    column_types = []
+    for position in range(sample.shape[1]):
+        values = sample.iloc[:, position].dropna().str.strip()
+        values = values[~values.isin(ARROW_NULL_VALUES) & ~values.isin(list(load_file.STRING_NA_SET))]
+        is_numeric = pd.to_numeric(values, errors="coerce").notna().all()
+        column_types.append("float" if is_numeric else "string")
+    return column_types
+
+
+def read_csv_typed(file_path_or_buffer, delimiter=",", encoding="utf-8", header_rows=2,
+                   sample_rows=SCHEMA_SAMPLE_ROWS, usecols=None):
+    """
+    Parse a CSV/TXT file with the multi-threaded Arrow reader using an inferred schema.
+
+    The header rows are read first, a small sample of data rows is used to infer which columns
+    are float channels and which are strings (see `infer_column_types`), and the body is then
+    parsed by `pyarrow.csv` with explicit column types. Float channels come out as float64
+    instead of object, and NaN sentinels written as plain text ("nodata", "-999.25") become NaN.
+
+    Parameters:
+    file_path_or_buffer: The path to the file or a file-like object.
+    delimiter (str, optional): The field delimiter. Defaults to ','.
+    encoding (str, optional): The file encoding. Defaults to 'utf-8'.
+    header_rows (int, optional): The number of header rows before the data. Defaults to 2.
+    sample_rows (int, optional): The number of data rows sampled for schema inference.
+    usecols (list of int, optional): The positions of the columns to read; other columns are
+        skipped by the Arrow reader and never converted. Defaults to None, which reads all columns.
+
+    Returns:
+    tuple: (header, body) where header is a DataFrame of the header rows read as strings and
+           body is the typed data with positional column labels; (None, None) if the file cannot
+           be parsed with the inferred schema (e.g. whitespace-padded sentinels in a float
+           channel beyond the sample), in which case callers fall back to pandas.
+    """
+    try:
+        header = pd.read_csv(file_path_or_buffer, header=None, nrows=header_rows,
+                             delimiter=delimiter, encoding=encoding, dtype=str,
+                             keep_default_na=False, na_values=[""])
+        rewind(file_path_or_buffer)
+        sample = pd.read_csv(file_path_or_buffer, header=None, skiprows=header_rows,
+                             nrows=sample_rows, delimiter=delimiter, encoding=encoding,
+                             dtype=str, keep_default_na=False, na_values=[""])
+        rewind(file_path_or_buffer)
+
+        column_names = [f"column_{i}" for i in range(header.shape[1])]
+        if usecols is not None:
+            header = header.reindex(columns=usecols)
+            sample = sample.reindex(columns=usecols)
+            include_columns = [column_names[position] for position in usecols]
+        else:
+            include_columns = column_names
+        column_types = {name: pa.float64() if column_type == "float" else pa.string()
+                        for name, column_type in zip(include_columns, infer_column_types(sample))}
+
+        read_options = pa_csv.ReadOptions(use_threads=True, skip_rows=header_rows,
+                                          column_names=column_names, encoding=encoding)
+        parse_options = pa_csv.ParseOptions(delimiter=delimiter)
+        convert_options = pa_csv.ConvertOptions(column_types=column_types,
+                                                include_columns=include_columns,
+                                                null_values=ARROW_NULL_VALUES +
+                                                [str(val) for val in load_file.NA_VALUES_LIST],
+                                                strings_can_be_null=True)
+        table = pa_csv.read_csv(file_path_or_buffer, read_options=read_options,
+                                parse_options=parse_options, convert_options=convert_options)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, UnicodeDecodeError,
+            pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        print(f"Typed Arrow parse failed, falling back to pandas: {e}")
+        return None, None
+    finally:
+        rewind(file_path_or_buffer)
+
+    body = table.to_pandas()
+    body.columns = range(body.shape[1])
+    return header, body
+
+
+def rewind(file_path_or_buffer):
+    if hasattr(file_path_or_buffer, "seek"):
+        file_path_or_buffer.seek(0)
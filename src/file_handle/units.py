@@ -1,8 +1,13 @@
 import pandas as pd
+import numpy as np
 import re
 from . import units_config
 
 
+# Compiled plans keyed by the content of the mapping they were built from
+_compiled_plans = {}
+
+
 def map_unit(unit):
     """
     Standardize unit representations to a consistent set using regex.
@@ -18,27 +23,92 @@ def map_unit(unit):
     return unit
 
 
+def compile_unit_conversion_plan(unit_conversion_mappings):
+    """
+    Compile a unit conversion mapping into a scale/offset plan.
+
+    Every conversion function in `units_config` is linear (new = value * scale + offset),
+    so scale and offset are recovered by probing each function at 0 and 1000. A third probe
+    checks linearity; functions that fail it are kept and applied value by value.
+    The plan is cached, so it is only compiled once per mapping.
+
+    Parameters:
+    unit_conversion_mappings (dict): Mapping of unit -> {'conversion_function', 'new_unit'}.
+
+    Returns:
+    dict: Mapping of lowercased unit -> {'scale', 'offset', 'new_unit', 'conversion_function'}.
+          'scale' and 'offset' are None for non-linear conversions.
+    """
+    cache_key = tuple((unit, id(mapping['conversion_function']), mapping['new_unit'])
+                      for unit, mapping in unit_conversion_mappings.items())
+    if cache_key in _compiled_plans:
+        return _compiled_plans[cache_key]
+
+    plan = {}
+    for unit, mapping in unit_conversion_mappings.items():
+        conversion_function = mapping['conversion_function']
+        scale = offset = None
+        try:
+            offset = conversion_function(0.0)
+            # Probe at 1000 rather than 1 to avoid cancellation error when offset != 0
+            scale = (conversion_function(1000.0) - offset) / 1000.0
+            if not np.isclose(conversion_function(-7.5), -7.5 * scale + offset):
+                scale = offset = None
+        except TypeError:
+            # The function returned None for a probe value
+            scale = offset = None
+
+        plan[unit.lower()] = {
+            'scale': scale,
+            'offset': offset,
+            'new_unit': mapping['new_unit'],
+            'conversion_function': conversion_function,
+        }
+
+    _compiled_plans[cache_key] = plan
+    return plan
+
+
 def standardize_units(df, unit_conversion_mappings):
     """
     Standardize units in the DataFrame.
     Map units to a standard representation and apply conversion functions based on the unit of each column.
-    Apply conversion functions based on the unit of each column.
+
+    The mapping is compiled into a scale/offset plan (see `compile_unit_conversion_plan`).
+    All matched columns are converted in one vectorized pass, with non-numeric values
+    becoming NaN, and all columns are renamed in one operation.
     """
-    # Convert keys in unit_conversion_mappings to lowercase
-    unit_conversion_mappings = {
-        k.lower(): v for k, v in unit_conversion_mappings.items()}
+    plan = compile_unit_conversion_plan(unit_conversion_mappings)
 
-    for col in df.columns:
+    new_columns = []
+    linear_positions, scales, offsets = [], [], []
+    for position, col in enumerate(df.columns):
         mnemonic, unit = col.split(' (')
         unit = unit.rstrip(')')
 
         # Map the unit to a standard representation
         unit = map_unit(unit.lower()).lower()
 
-        if unit in unit_conversion_mappings:
-            conversion_function = unit_conversion_mappings[unit]['conversion_function']
-            new_unit = unit_conversion_mappings[unit]['new_unit']
-            df[col] = df[col].apply(conversion_function)
-            df.rename(columns={col: f"{mnemonic} ({new_unit})"}, inplace=True)
+        if unit in plan:
+            step = plan[unit]
+            if step['scale'] is not None:
+                linear_positions.append(position)
+                scales.append(step['scale'])
+                offsets.append(step['offset'])
+            else:
+                df.isetitem(position, df.iloc[:, position].apply(
+                    step['conversion_function']))
+            new_columns.append(f"{mnemonic} ({step['new_unit']})")
+        else:
+            new_columns.append(col)
+
+    if linear_positions:
+        values = np.column_stack([
+            pd.to_numeric(df.iloc[:, position], errors='coerce').to_numpy(dtype=float)
+            for position in linear_positions])
+        values = values * np.array(scales) + np.array(offsets)
+        for i, position in enumerate(linear_positions):
+            df.isetitem(position, values[:, i])
 
+    df.columns = new_columns
     return df
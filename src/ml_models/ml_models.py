@@ -10,7 +10,7 @@ from catboost import CatBoostRegressor
 import numpy as np
 import pandas as pd
 
-from utils import get_columns_by_mnemonics
+from utils import get_columns_by_mnemonics, get_cluster_partition
 
 
 def evaluate_models(model_list: List[Tuple[str, BaseEstimator]], features: np.ndarray, targets: np.ndarray, cross_validator: KFold, progress_callback: Callable[[str], None] = print) -> Tuple[BaseEstimator, float]:
@@ -89,7 +89,9 @@ def perform_optimization(dataframe: pd.DataFrame, X_mnemonics: List[str] = ['WOB
     if 'cluster ()' in dataframe.columns:
         dataframe.rename(columns={'cluster ()': 'cluster'}, inplace=True)
 
-    clusters = dataframe['cluster'].unique()
+    # Rows, feature arrays and targets of each cluster, grouped once for all clusters
+    partition = get_cluster_partition(dataframe, 'cluster')
+    clusters = partition.clusters
     scalers_best_models = {}
 
     kfold = KFold(n_splits=k, shuffle=True, random_state=1)
@@ -105,17 +107,17 @@ def perform_optimization(dataframe: pd.DataFrame, X_mnemonics: List[str] = ['WOB
 
     for cluster in clusters:
         progress_callback(f"Evaluating cluster {cluster}")
-        cluster_data = dataframe[dataframe['cluster'] == cluster]
+        X_data = partition.get_frame(cluster, X_cols)
 
         progress_callback(
-            f" ####### X shape is: {len(cluster_data[X_cols].columns)} #########")
+            f" ####### X shape is: {len(X_data.columns)} #########")
         progress_callback(
-            f" ####### X columns are: {cluster_data[X_cols].columns} #########")
+            f" ####### X columns are: {X_data.columns} #########")
 
         scaler = StandardScaler()  # Create a new scaler for this cluster
-        X = scaler.fit_transform(cluster_data[X_cols])  # Scale the data
+        X = scaler.fit_transform(X_data)  # Scale the data
 
-        y = cluster_data[y_col]
+        y = partition.get_values(cluster, y_col)
 
         best_model, best_mse = evaluate_models(
             models_list, X, y, kfold, progress_callback)
@@ -7,7 +7,7 @@ from tqdm import tqdm
 
 # from .optimize_config import bounds, BIT_DIAMETER
 from config import config_constants
-from utils import get_columns_by_mnemonics, compute_mu, compute_mse
+from utils import get_columns_by_mnemonics, get_cluster_partition, compute_mu, compute_mse
 
 import warnings
 # Disable the specific warning
@@ -67,16 +67,17 @@ def minimize_objective_function(objective_function, initial_guess, bounds, X_mne
 
 
 def monte_carlo_optimization(df_with_clusters, scaler, trained_model, X_mnemonics, bounds, iterations):
-    def objective_function(params):
-        wob_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'wob'][0]
-        rpm_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'rpm'][0]
-        torque_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'torque'][0]
-        mu_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'mu'][0]
+    # Parameter positions looked up once, not on every evaluation of the objective
+    wob_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'wob'][0]
+    rpm_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'rpm'][0]
+    torque_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'torque'][0]
+    mu_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'mu'][0]
 
+    def objective_function(params):
         params[mu_index] = compute_mu(
             params[wob_index],
             params[torque_index],
@@ -89,6 +90,7 @@ def monte_carlo_optimization(df_with_clusters, scaler, trained_model, X_mnemonic
         # Use all parameters in X_mnemonics for prediction
         rop = trained_model.predict(X_scaled)[0]
 
+        # Teale's MSE, with the axial term WOB / bit area (see `compute_mse`)
         mse = compute_mse(params[wob_index],
                           params[rpm_index], params[torque_index], rop,
                           config_constants['bit_diameter'])
@@ -158,19 +160,21 @@ def print_results(cluster, params_data, mse_values, X_mnemonics,
         f'MSE: Min = {mse_min:.2f}, Max = {mse_max:.2f}, Median = {mse_median:.2f}, IQR = {mse_IQR:.2f}\n')
 
 
-def get_bounds_for_cluster(original_data_with_clusters, X_mnemonics, cluster, expanding_factor=10000):
+def get_bounds_for_cluster(original_data_with_clusters, X_mnemonics, cluster, expanding_factor=10000, partition=None):
     """Generate bounds for the parameters based on the data in the cluster
     Except lithology, others have max value * 10000 to allow the simulation
-    to explore the wide range of data"""
+    to explore the wide range of data.
+    The min and max are read from the cluster partition (see `utils.get_cluster_partition`)"""
+    if partition is None:
+        partition = get_cluster_partition(original_data_with_clusters)
     bounds = {}
     for mnemonic in X_mnemonics:
         # Convert mnemonic to column header
         column_header = get_columns_by_mnemonics(
             original_data_with_clusters, [mnemonic])[0]
-        data_for_cluster = original_data_with_clusters[original_data_with_clusters['cluster']
-                                                       == cluster][column_header]
-        bounds[mnemonic] = (data_for_cluster.min(), data_for_cluster.max(
-        ) * (expanding_factor if mnemonic not in ['Si', 'Shale', 'Dolomite', 'Limestone'] else 1))
+        min_value, max_value = partition.get_range(cluster, column_header)
+        bounds[mnemonic] = (min_value, max_value * (
+            expanding_factor if mnemonic not in ['Si', 'Shale', 'Dolomite', 'Limestone'] else 1))
     return bounds
 
 
@@ -191,9 +195,10 @@ def execute_monte_carlo_optimization(df_with_clusters, scalers_best_models, X_mn
     """
 
     clusters = {}
-    for cluster in df_with_clusters['cluster'].unique():
+    partition = get_cluster_partition(df_with_clusters, 'cluster')
+    for cluster in partition.clusters:
         bounds = get_bounds_for_cluster(
-            df_with_clusters, X_mnemonics, cluster)
+            df_with_clusters, X_mnemonics, cluster, partition=partition)
 
         progress_callback(f"#### Seeking MSE min for cluster {cluster} #####")
 
@@ -7,7 +7,7 @@ from tqdm import tqdm
 
 # from .optimize_config import bounds, BIT_DIAMETER
 from config import config_constants
-from utils import get_columns_by_mnemonics, compute_mu, compute_mse
+from utils import get_columns_by_mnemonics, get_cluster_partition, compute_mu, compute_mse
 
 import warnings
 # Disable the specific warning
@@ -73,16 +73,17 @@ def minimize_objective_function(objective_function, initial_guess, bounds, X_mne
 
 
 def monte_carlo_optimization(df_with_clusters, scaler, trained_model, X_mnemonics, bounds, iterations, initial_guess):
-    def objective_function(params):
-        wob_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'wob'][0]
-        rpm_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'rpm'][0]
-        torque_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'torque'][0]
-        mu_index = [i for i, m in enumerate(
-            X_mnemonics) if m.lower() == 'mu'][0]
+    # Parameter positions looked up once, not on every evaluation of the objective
+    wob_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'wob'][0]
+    rpm_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'rpm'][0]
+    torque_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'torque'][0]
+    mu_index = [i for i, m in enumerate(
+        X_mnemonics) if m.lower() == 'mu'][0]
 
+    def objective_function(params):
         params[mu_index] = compute_mu(
             params[wob_index],
             params[torque_index],
@@ -95,6 +96,7 @@ def monte_carlo_optimization(df_with_clusters, scaler, trained_model, X_mnemonic
         # Use all parameters in X_mnemonics for prediction
         rop = trained_model.predict(X_scaled)[0]
 
+        # Teale's MSE, with the axial term WOB / bit area (see `compute_mse`)
         mse = compute_mse(params[wob_index],
                           params[rpm_index], params[torque_index], rop,
                           config_constants['bit_diameter'])
@@ -152,29 +154,33 @@ def print_results(cluster, param_ranges, low_mses):
     print()
 
 
-def get_bounds_for_cluster(original_data_with_clusters, X_mnemonics, cluster):
+def get_bounds_for_cluster(original_data_with_clusters, X_mnemonics, cluster, partition=None):
     """Generate bounds for the parameters based on the data in the cluster
     Except lithology, others have max value * 10000 to allow the simulation
-    to explore the wide range of data"""
+    to explore the wide range of data.
+    The min and max are read from the cluster partition (see `utils.get_cluster_partition`)"""
+    if partition is None:
+        partition = get_cluster_partition(original_data_with_clusters)
     bounds = {}
     for mnemonic in X_mnemonics:
         # Convert mnemonic to column header
         column_header = get_columns_by_mnemonics(
             original_data_with_clusters, [mnemonic])[0]
-        data_for_cluster = original_data_with_clusters[original_data_with_clusters['cluster']
-                                                       == cluster][column_header]
-        bounds[mnemonic] = (data_for_cluster.min(), data_for_cluster.max(
-        ) * (10000 if mnemonic not in ['Si', 'Shale', 'Dolomite', 'Limestone'] else 1))
+        min_value, max_value = partition.get_range(cluster, column_header)
+        bounds[mnemonic] = (min_value, max_value * (
+            10000 if mnemonic not in ['Si', 'Shale', 'Dolomite', 'Limestone'] else 1))
     return bounds
 
 
 def execute_monte_carlo_optimization(df_with_clusters, scalers_best_models, X_mnemonics, iterations, num_starts):
     clusters = {}
-    for cluster in df_with_clusters['cluster'].unique():
+    partition = get_cluster_partition(df_with_clusters, 'cluster')
+    for cluster in partition.clusters:
         print(f"#### Seeking MSE min for cluster {cluster} #####")
         scaler = scalers_best_models[cluster]['scaler']
         trained_model = scalers_best_models[cluster]['model']
-        bounds = get_bounds_for_cluster(df_with_clusters, X_mnemonics, cluster)
+        bounds = get_bounds_for_cluster(
+            df_with_clusters, X_mnemonics, cluster, partition=partition)
 
         results = multi_start_optimization(
             df_with_clusters, scaler, trained_model, X_mnemonics, bounds, iterations, num_starts)
@@ -4,7 +4,7 @@ import numpy as np
 from tqdm import tqdm
 
 from utils import compute_mu, compute_mse
-from utils import get_columns_by_mnemonics
+from utils import get_columns_by_mnemonics, get_column_index, resolve_mnemonic, get_cluster_partition
 from config import config_constants
 
 import warnings
@@ -14,30 +14,70 @@ warnings.filterwarnings(
     "ignore", message="X does not have valid feature names, but StandardScaler was fitted with feature names")
 
 
-def sample_rock_components(cluster_df, mnemonics):
+def get_rock_component_ranges(cluster_df, mnemonics, partition=None, cluster=None):
+    """
+    Returns the min-max range of each rock component in the cluster.
+
+    Parameters:
+    cluster_df (DataFrame): DataFrame of a specific cluster, or the whole DataFrame when a partition is given.
+    mnemonics (list): List of mnemonics.
+    partition (ClusterPartition, optional): The partition of the DataFrame, to read the precomputed ranges of
+        `cluster` from instead of scanning cluster_df. Defaults to None.
+    cluster (optional): The cluster, with partition.
+
+    Returns:
+    dict: A dictionary of (min, max) pairs.
+    """
+    ranges = {}
+    for mnemonic in mnemonics:
+        col_name = get_columns_by_mnemonics(cluster_df, mnemonic)[0]
+        if partition is not None:
+            ranges[mnemonic] = partition.get_range(cluster, col_name)
+        else:
+            ranges[mnemonic] = (cluster_df[col_name].min(), cluster_df[col_name].max())
+    return ranges
+
+
+def sample_rock_components(cluster_df, mnemonics, ranges=None):
     """
     Samples rock components uniformly within their min-max range in the cluster.
 
     Parameters:
     cluster_df (DataFrame): DataFrame of a specific cluster.
     mnemonics (list): List of mnemonics to sample.
+    ranges (dict, optional): The ranges from `get_rock_component_ranges`, computed once per cluster by callers
+        that sample repeatedly. Defaults to None, which computes them.
 
     Returns:
     dict: A dictionary of sampled values normalized to sum up to 1.
     """
+    if ranges is None:
+        ranges = get_rock_component_ranges(cluster_df, mnemonics)
     components = {}
     for mnemonic in mnemonics:
-        col_name = get_columns_by_mnemonics(cluster_df, mnemonic)[0]
-        components[mnemonic] = np.random.uniform(
-            cluster_df[col_name].min(), cluster_df[col_name].max())
+        components[mnemonic] = np.random.uniform(*ranges[mnemonic])
     total = sum(components.values())
     return {k: v*100 / total for k, v in components.items()}
 
 
+def resolve_parameter_column(column_index, mnemonic):
+    """
+    Returns the column of a sampled parameter, as `get_columns_by_mnemonics(df, mnemonic)[0]` does.
+    """
+    column = resolve_mnemonic(column_index, mnemonic)
+    if column is None:
+        raise IndexError(f"No column matches '{mnemonic}'.")
+    return column
+
+
 def monte_carlo_optimization(df, X_mnemonics, scalers_best_models, bounds, mse_tolerance=None, iterations=100):
     """
     Perform Monte Carlo optimization over different clusters in the dataset.
 
+    The candidate points of a cluster are evaluated as one batch: the parameters and rock components of all
+    iterations are sampled in one draw (in the same order as sampling them point by point), then scaled,
+    predicted and run through the `utils.compute_mu`/`compute_mse` kernels as arrays.
+
     Parameters:
     df (DataFrame): The dataset containing the clusters and other information.
     X_mnemonics (list): List of mnemonics to be used in the optimization.
@@ -53,44 +93,64 @@ def monte_carlo_optimization(df, X_mnemonics, scalers_best_models, bounds, mse_t
         df, X_mnemonics) + ['ROP (m/h)', 'MSE (ksi)', 'MSE_min (ksi)', 'cluster']
     results = []
 
-    for cluster in df['cluster'].unique():
-        cluster_df = df[df['cluster'] == cluster]
-        for _ in tqdm(range(iterations), desc=f"Cluster {cluster}"):
-            # Sample parameters
-            params = {param: np.random.uniform(
-                *bounds[param]) for param in bounds}
-            params['mu'] = compute_mu(
-                params['wob'], params['torque'], config_constants['bit_diameter'])
-
-            # Sample and normalize rock components
-            rock_mnemonics = ['si', 'dolomite', 'limestone', 'shale']
-            rock_components = sample_rock_components(
-                cluster_df, rock_mnemonics)
-            params.update(rock_components)
-            params['cluster'] = cluster
-
-            # Create input feature vector
-            X = [params.get(mnemonic.lower(), None)
-                 for mnemonic in X_mnemonics]
-            if None in X:
-                print(
-                    "Not enough data to predict ROP, check if all mnemonics are present")
-                break
-
-            X = np.array(X).reshape(1, -1)
-            X_scaled = scalers_best_models[cluster]['scaler'].transform(X)
-            rop = scalers_best_models[cluster]['model'].predict(X_scaled)[0]
-            params['rop'] = rop
-
-            # Calculate MSE and MSE_min
-            params['mse'] = compute_mse(
-                params['wob'], params['rpm'], params['torque'], rop, config_constants['bit_diameter'])
-            params['mse_min'] = cluster_df['MSE_min (ksi)'].min()
-
-            if params['mse'] <= params['mse_min'] * (1 + mse_tolerance):
-                params = {get_columns_by_mnemonics(
-                    df, k)[0]: v for k, v in params.items()}
-                results.append({column: params.get(column, None)
-                                for column in result_df_columns})
-
-    return pd.DataFrame(results, columns=result_df_columns)
+    # Sampled parameter names resolved to columns once, rather than per accepted sample
+    column_index = get_column_index(df.columns)
+    rock_mnemonics = ['si', 'dolomite', 'limestone', 'shale']
+    bit_diameter = config_constants['bit_diameter']
+
+    # Per-cluster ranges read from the cluster partition rather than masking the frame for every cluster
+    partition = get_cluster_partition(df, 'cluster')
+
+    for cluster in tqdm(partition.clusters, desc="Clusters"):
+        # Constant within the cluster, computed once rather than per sample
+        rock_ranges = get_rock_component_ranges(df, rock_mnemonics, partition, cluster)
+        mse_min = partition.get_statistic(cluster, 'MSE_min (ksi)', 'min')
+
+        # Sample parameters and rock components, one row per iteration
+        ranges = [bounds[param] for param in bounds] + [rock_ranges[mnemonic] for mnemonic in rock_mnemonics]
+        samples = np.random.uniform([low for low, _ in ranges], [high for _, high in ranges],
+                                    size=(iterations, len(ranges)))
+        params = {param: samples[:, i] for i, param in enumerate(bounds)}
+        params['mu'] = compute_mu(params['wob'], params['torque'], bit_diameter)
+
+        # Normalize rock components to sum up to 100
+        rock_samples = samples[:, len(bounds):]
+        total = rock_samples[:, 0].copy()
+        for i in range(1, len(rock_mnemonics)):
+            total += rock_samples[:, i]
+        for i, mnemonic in enumerate(rock_mnemonics):
+            params[mnemonic] = rock_samples[:, i] * 100 / total
+        params['cluster'] = cluster
+
+        # Create input feature matrix
+        if any(mnemonic.lower() not in params for mnemonic in X_mnemonics):
+            print(
+                "Not enough data to predict ROP, check if all mnemonics are present")
+            continue
+
+        X = np.column_stack([np.broadcast_to(params[mnemonic.lower()], iterations)
+                             for mnemonic in X_mnemonics])
+        X_scaled = scalers_best_models[cluster]['scaler'].transform(X)
+        rop = scalers_best_models[cluster]['model'].predict(X_scaled)
+        params['rop'] = rop
+
+        # Calculate MSE and MSE_min; Teale's MSE, with the axial term WOB / bit area (see `compute_mse`)
+        params['mse'] = compute_mse(
+            params['wob'], params['rpm'], params['torque'], rop, bit_diameter)
+        params['mse_min'] = mse_min
+
+        accepted = params['mse'] <= params['mse_min'] * (1 + mse_tolerance)
+        if not accepted.any():
+            continue
+
+        columns = {resolve_parameter_column(column_index, k): v for k, v in params.items()}
+        n_accepted = int(accepted.sum())
+        results.append(pd.DataFrame(
+            {column: (columns[column][accepted] if np.ndim(columns[column])
+                      else [columns[column]] * n_accepted) if column in columns else None
+             for column in result_df_columns},
+            index=range(n_accepted), columns=result_df_columns))
+
+    if not results:
+        return pd.DataFrame(results, columns=result_df_columns)
+    return pd.concat(results, ignore_index=True)
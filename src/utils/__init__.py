@@ -1,10 +1,14 @@
 from .df_utils import get_columns_by_mnemonics, get_bounds_for_cluster, get_header_from_mnemonic
-from .drilling_utils import compute_mu, compute_mse
+from .df_utils import get_column_index, resolve_mnemonic
+from .cluster_partition import ClusterPartition, build_cluster_partition, get_cluster_partition, forget_cluster_partition
+from .drilling_utils import compute_mu, compute_mse, compute_doc
 from .misc import ensure_directory_exists, list_sub_folders, copy_folder, delete_folder, load_pickle_file_to_dict
 
 __all__ = [
     'get_columns_by_mnemonics', 'get_bounds_for_cluster', 'get_header_from_mnemonic',
-    'compute_mu', 'compute_mse',
+    'get_column_index', 'resolve_mnemonic',
+    'ClusterPartition', 'build_cluster_partition', 'get_cluster_partition', 'forget_cluster_partition',
+    'compute_mu', 'compute_mse', 'compute_doc',
     'ensure_directory_exists',
     'list_sub_folders',
     'copy_folder',
@@ -0,0 +1,206 @@
+import warnings
+import weakref
+import numpy as np
+import pandas as pd
+
+
+# Names of the cluster label column: 'cluster ()' after clustering, 'cluster' while the modelling and
+# optimization stages run
+CLUSTER_COLUMNS = ('cluster', 'cluster ()')
+
+# Quantiles precomputed for every channel of every cluster
+PARTITION_QUANTILES = (0.25, 0.5, 0.75)
+
+# Partitions of the DataFrames seen so far, by id, with a weak reference to check the object is still the same one
+_partitions_by_id = {}
+
+
+def get_cluster_column(df):
+    """
+    Return the cluster label column of a DataFrame, 'cluster' or 'cluster ()'.
+    """
+    for column in CLUSTER_COLUMNS:
+        if column in df.columns:
+            return column
+    raise KeyError(f"No cluster column found. Expected one of {list(CLUSTER_COLUMNS)}.")
+
+
+class ClusterPartition:
+    """
+    The rows of a clustered DataFrame grouped by cluster, built in one pass over the cluster labels.
+
+    The numeric channels are gathered once into an array sorted by cluster, so the rows of each cluster are a
+    contiguous slice of every channel, and their min, max and quantiles are computed for every cluster up
+    front. Per-cluster stages read rows, arrays and statistics from here instead of masking the whole frame
+    with `df[df['cluster'] == cluster]` for every cluster, mnemonic and iteration.
+
+    Attributes:
+    clusters (list): The cluster labels, in order of first appearance (as `Series.unique()`); rows without a
+        label are left out.
+    columns (list of str): The numeric channels held, excluding the cluster column.
+    """
+
+    def __init__(self, df, cluster_column=None, quantiles=PARTITION_QUANTILES):
+        if cluster_column is None:
+            cluster_column = get_cluster_column(df)
+
+        codes, clusters = pd.factorize(df[cluster_column])
+        labelled = np.flatnonzero(codes >= 0)
+        order = np.argsort(codes[labelled], kind='stable')
+        counts = np.bincount(codes[labelled], minlength=len(clusters))
+
+        self.clusters = list(clusters)
+        self._cluster_positions = {cluster: i for i, cluster in enumerate(self.clusters)}
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._rows = labelled[order]
+        self._index = df.index
+
+        positions = [position for position, column in enumerate(df.columns)
+                     if column not in CLUSTER_COLUMNS and pd.api.types.is_numeric_dtype(df.iloc[:, position])]
+        self.columns = [df.columns[position] for position in positions]
+        self._column_positions = {column: i for i, column in enumerate(self.columns)}
+
+        # One row per channel, so each cluster's values of a channel are contiguous
+        self._values = np.empty((len(positions), len(self._rows)))
+        for i, position in enumerate(positions):
+            self._values[i] = df.iloc[:, position].to_numpy(dtype=float, na_value=np.nan)[self._rows]
+
+        self._statistics = self._compute_statistics(quantiles)
+
+    def _compute_statistics(self, quantiles):
+        """
+        Compute the min, max and quantiles of every channel in every cluster, ignoring NaN values.
+
+        Returns:
+        dict: {statistic: numpy.ndarray of shape (clusters, columns)}, keyed by 'min', 'max' and the quantiles.
+        """
+        if not self.clusters:
+            return {}
+
+        starts = self._offsets[:-1]
+        statistics = {
+            'min': np.fmin.reduceat(self._values, starts, axis=1).T,
+            'max': np.fmax.reduceat(self._values, starts, axis=1).T,
+        }
+        with warnings.catch_warnings():
+            # Channels without values in a cluster give NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            per_cluster = np.stack([np.nanquantile(self._values[:, start:stop], quantiles, axis=1)
+                                    for start, stop in zip(starts, self._offsets[1:])], axis=1)
+        for quantile, values in zip(quantiles, per_cluster):
+            statistics[quantile] = values
+        return statistics
+
+    def _slice(self, cluster):
+        i = self._cluster_positions[cluster]
+        return slice(self._offsets[i], self._offsets[i + 1])
+
+    def get_rows(self, cluster):
+        """
+        Return the positions (for `df.iloc`) of the rows of a cluster, in the order of the frame.
+        """
+        return self._rows[self._slice(cluster)]
+
+    def get_index(self, cluster):
+        """
+        Return the index labels (for `df.loc`) of the rows of a cluster, in the order of the frame.
+        """
+        return self._index[self.get_rows(cluster)]
+
+    def get_values(self, cluster, columns):
+        """
+        Return the values of channels in a cluster.
+
+        Parameters:
+        cluster: The cluster label.
+        columns (str or list of str): A column, or a list of columns.
+
+        Returns:
+        numpy.ndarray: For one column, a contiguous 1-D view of its values in the cluster; for a list of
+            columns, a (rows, columns) array.
+        """
+        if isinstance(columns, str):
+            return self._values[self._column_positions[columns], self._slice(cluster)]
+        positions = [self._column_positions[column] for column in columns]
+        return self._values[positions, self._slice(cluster)].T
+
+    def get_frame(self, cluster, columns):
+        """
+        Return channels of a cluster as a DataFrame indexed like the original rows, e.g. to fit a scaler with
+        feature names.
+        """
+        return pd.DataFrame(self.get_values(cluster, list(columns)), columns=list(columns),
+                            index=self.get_index(cluster))
+
+    def get_statistic(self, cluster, column, statistic):
+        """
+        Return a precomputed statistic of a channel in a cluster.
+
+        Parameters:
+        cluster: The cluster label.
+        column (str): The column.
+        statistic (str or float): 'min', 'max' or one of the precomputed quantiles.
+
+        Returns:
+        float: The statistic, NaN if the channel has no values in the cluster.
+        """
+        return self._statistics[statistic][self._cluster_positions[cluster], self._column_positions[column]]
+
+    def get_range(self, cluster, column):
+        """
+        Return the (min, max) of a channel in a cluster.
+        """
+        return self.get_statistic(cluster, column, 'min'), self.get_statistic(cluster, column, 'max')
+
+
+def get_partition_key(df):
+    """
+    The columns a partition depends on, apart from the cluster column, which stages rename back and forth.
+    """
+    return len(df), tuple(column for column in df.columns if column not in CLUSTER_COLUMNS)
+
+
+def build_cluster_partition(df, cluster_column=None):
+    """
+    Build the partition of a clustered DataFrame and keep it for `get_cluster_partition`.
+
+    Returns:
+    ClusterPartition: The partition.
+    """
+    partition = ClusterPartition(df, cluster_column)
+    key = id(df)
+
+    def forget(reference, key=key):
+        if _partitions_by_id.get(key, (None,))[0] is reference:
+            del _partitions_by_id[key]
+
+    _partitions_by_id[key] = (weakref.ref(df, forget), get_partition_key(df), partition)
+    return partition
+
+
+def forget_cluster_partition(df):
+    """
+    Drop the partition kept for a DataFrame, e.g. after its cluster labels were reassigned in place.
+    """
+    _partitions_by_id.pop(id(df), None)
+
+
+def get_cluster_partition(df, cluster_column=None):
+    """
+    Return the partition of a clustered DataFrame, building it on first use.
+
+    The lookup is by object: a partition is reused for as long as the frame keeps its rows and columns (the
+    cluster column may be renamed between 'cluster ()' and 'cluster'). Adding or dropping columns rebuilds it.
+    Assigning new cluster labels in place must go through `forget_cluster_partition`, as `perform_kmeans` does.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame with a 'cluster' or 'cluster ()' column.
+    cluster_column (str, optional): The cluster column. Defaults to None, which uses `get_cluster_column`.
+
+    Returns:
+    ClusterPartition: The partition.
+    """
+    entry = _partitions_by_id.get(id(df))
+    if entry is not None and entry[0]() is df and entry[1] == get_partition_key(df):
+        return entry[2]
+    return build_cluster_partition(df, cluster_column)
@@ -1,11 +1,86 @@
-import pandas as pd
 import re
+import weakref
+from functools import lru_cache
+import pandas as pd
+from .cluster_partition import get_cluster_partition
+
+
+# Column indexes of the pandas Index objects seen so far, by id, with a weak reference to check the object is
+# still the same one (pandas creates a new Index whenever the columns change)
+_column_indexes_by_id = {}
+
+
+@lru_cache(maxsize=256)
+def build_column_index(columns):
+    """
+    Build the mnemonic -> column index of a schema.
+
+    The index holds the case-folded column names and a memo of the mnemonics resolved so far, so each mnemonic
+    is only searched once per schema. Indexes are cached by the tuple of column names, so frames sharing a
+    schema share an index.
+
+    Parameters:
+    columns (tuple of str): The column names, in order.
+
+    Returns:
+    dict: {'columns': tuple, 'folded': tuple, 'resolved': dict}.
+    """
+    return {"columns": columns, "folded": tuple(str(column).lower() for column in columns), "resolved": {}}
+
+
+def get_column_index(columns):
+    """
+    Return the column index of a schema (see `build_column_index`).
+
+    For a pandas Index the lookup is by object, so repeated calls on the same frame cost a dict lookup instead
+    of rebuilding the tuple of column names. Renaming, adding or dropping columns gives the frame a new Index
+    object, and with it a new index.
+
+    Parameters:
+    columns (pandas.Index or list of str): The columns.
+
+    Returns:
+    dict: The column index.
+    """
+    if not isinstance(columns, pd.Index):
+        return build_column_index(tuple(columns))
+
+    key = id(columns)
+    entry = _column_indexes_by_id.get(key)
+    if entry is not None and entry[0]() is columns:
+        return entry[1]
+
+    index = build_column_index(tuple(columns))
+
+    def forget(reference, key=key):
+        if _column_indexes_by_id.get(key, (None,))[0] is reference:
+            del _column_indexes_by_id[key]
+
+    _column_indexes_by_id[key] = (weakref.ref(columns, forget), index)
+    return index
+
+
+def resolve_mnemonic(index, mnemonic):
+    """
+    Return the first column of a column index whose name contains the mnemonic (case-insensitive), or None.
+    """
+    folded_mnemonic = mnemonic.lower()
+    resolved = index["resolved"]
+    if folded_mnemonic not in resolved:
+        resolved[folded_mnemonic] = next(
+            (column for column, folded in zip(index["columns"], index["folded"]) if folded_mnemonic in folded),
+            None)
+    return resolved[folded_mnemonic]
 
 
 def get_columns_by_mnemonics(df, mnemonics):
     """
     Identifies columns in a DataFrame or a Series of Dataframe.columns that contain any of the specified mnemonics.
 
+    For each mnemonic, the first column containing it (case-insensitive) is returned; mnemonics without a column
+    are skipped. Lookups go through a column index cached per schema (see `get_column_index`), so repeated calls
+    on the same columns do not scan them again.
+
     Parameters:
     df (pandas.DataFrame or pandas.Series or list): The DataFrame, Series, or list in which to search for columns.
     mnemonics (list of str or str): The mnemonics to search for.
@@ -24,16 +99,16 @@ def get_columns_by_mnemonics(df, mnemonics):
     # If mnemonics is a string, convert it to a list.
     mnemonics = [mnemonics] if isinstance(mnemonics, str) else mnemonics
 
+    index = get_column_index(columns_to_search)
     columns = []
     for mnemonic in mnemonics:
-        for col in df.columns:
-            if mnemonic.lower() in col.lower():
-                columns.append(col)
-                break
+        column = resolve_mnemonic(index, mnemonic)
+        if column is not None:
+            columns.append(column)
     return columns
 
 
-def get_bounds_for_cluster(df_with_clusters, X_mnemonics, cluster):
+def get_bounds_for_cluster(df_with_clusters, X_mnemonics, cluster, partition=None):
     """
     Computes the bounds for each mnemonic in a specified cluster.
 
@@ -41,23 +116,25 @@ def get_bounds_for_cluster(df_with_clusters, X_mnemonics, cluster):
     df_with_clusters (pandas.DataFrame): The DataFrame containing the data and cluster assignments.
     X_mnemonics (list of str): The mnemonics for which to compute the bounds.
     cluster (int): The cluster for which to compute the bounds.
+    partition (ClusterPartition, optional): The partition of df_with_clusters. Defaults to None, which uses
+        `get_cluster_partition`.
 
     Returns:
     dict: A dictionary where the keys are mnemonics and the values are (min, max) pairs representing the bounds.
           The minimum bound is either the minimum value of the mnemonic in the cluster or 0.0001 if the minimum value is less than 0.
           The maximum bound is the maximum value of the mnemonic in the cluster, multiplied by 100 for certain mnemonics.
     """
+    if partition is None:
+        partition = get_cluster_partition(df_with_clusters)
     bounds = {}
     for mnemonic in X_mnemonics:
         # Convert mnemonic to column header
         column_header = get_columns_by_mnemonics(
             df_with_clusters, [mnemonic])[0]
-        data_for_cluster = df_with_clusters[df_with_clusters['cluster']
-                                            == cluster][column_header]
-        min_value = data_for_cluster.min()
+        min_value, max_value = partition.get_range(cluster, column_header)
         min_bound = min_value if min_value >= 0 else 0.0001
-        bounds[mnemonic] = (min_bound, data_for_cluster.max(
-        ) * (100 if mnemonic not in ['Si', 'Shale', 'Dolomite', 'Limestone'] else 1))
+        bounds[mnemonic] = (min_bound, max_value * (
+            100 if mnemonic not in ['Si', 'Shale', 'Dolomite', 'Limestone'] else 1))
     return bounds
 
 
@@ -1,35 +1,97 @@
-import math
+import numpy as np
 
 
-def compute_mu(wob, torque, bit_diameter):
-    """Compute Mu
+# Unit conversions of the standardized units (ROP in m/h) to the units of the drilling formulas
+M_PER_H_TO_FT_PER_H = 3.2808
+M_PER_H_TO_IN_PER_MIN = 39.3701 / 60
+
+
+def prepare_kernel_output(arrays, out, dtype):
+    """
+    Convert the inputs of a kernel to arrays of one float type and allocate the output buffer.
+
+    The inputs broadcast against each other. With an `out` buffer its dtype is used, so float32 buffers give
+    float32 arithmetic. The output is written before all inputs are read, so `out` must not share memory
+    with an input.
+
+    Returns:
+    tuple: (list of numpy.ndarray inputs, output buffer, whether the result is a scalar)
+    """
+    dtype = np.dtype(out.dtype if out is not None else dtype)
+    arrays = [np.asarray(array, dtype=dtype) for array in arrays]
+    shape = np.broadcast_shapes(*(array.shape for array in arrays))
+    scalar = out is None and shape == ()
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    return arrays, out, scalar
+
+
+def compute_mu(wob, torque, bit_diameter, out=None, dtype=np.float64):
+    """Compute Mu, vectorized over arrays of any broadcastable shapes
     input:
         wob: weight on bit (klbs)
         torque: torque (klbf-ft)
         bit_diameter: bit diameter (in)
+        out: optional output buffer of the broadcast shape, written in place
+        dtype: np.float64 or np.float32, when out is not given
     output:
-        mu: mu
+        mu: mu, a scalar for scalar inputs, otherwise an array (out when given)
     """
-    mu = torque / (wob * bit_diameter/36)
-    # # Debug print
-    # print(
-    #     f"TORQUE: {torque}, WOB: {wob}, Mu: {mu}")
-    return mu
+    (wob, torque, bit_diameter), out, scalar = prepare_kernel_output(
+        (wob, torque, bit_diameter), out, dtype)
 
+    # mu = torque / (wob * bit_diameter / 36), without temporaries; zero WOB gives inf/NaN as in pandas
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.multiply(wob, bit_diameter, out=out)
+        np.divide(out, 36, out=out)
+        np.divide(torque, out, out=out)
+    return out[()] if scalar else out
 
-# Function to compute MSE
-def compute_mse(wob, bit_rpm, torque, rop, bit_diameter):
-    """Compute Mechanical Specific Energy (ksi)
+
+def compute_mse(wob, bit_rpm, torque, rop, bit_diameter, out=None, dtype=np.float64):
+    """Compute Mechanical Specific Energy (ksi), vectorized over arrays of any broadcastable shapes
+    MSE = 4 WOB / (pi D^2) + 480 TORQUE RPM / (D^2 ROP)   (Teale, ROP in ft/h)
+    The axial term is WOB over the bit area. Before the derived channel and the optimizers shared this kernel,
+    the optimizers computed it as WOB * pi / (D/2)^2, pi^2 times larger, so their MSE minima (and the
+    parameters minimizing it) differ from the ones of earlier versions.
     input:
         wob: weight on bit (klbs)
         bit_rpm: rotary speed (rpm)
         torque: torque (klbf-ft)
-        rop: rate of penetration (ft/hr)
+        rop: rate of penetration (m/h)
         bit_diameter: bit diameter (in)
+        out: optional output buffer of the broadcast shape, written in place
+        dtype: np.float64 or np.float32, when out is not given
+    output:
+        mse: mechanical specific energy (ksi), a scalar for scalar inputs, otherwise an array (out when given)
+    """
+    (wob, bit_rpm, torque, rop, bit_diameter), out, scalar = prepare_kernel_output(
+        (wob, bit_rpm, torque, rop, bit_diameter), out, dtype)
+
+    bit_area = np.square(bit_diameter)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Rotary term: 480 * torque * rpm / (D^2 * ROP in ft/h)
+        np.multiply(torque, bit_rpm, out=out)
+        np.multiply(out, 480 / M_PER_H_TO_FT_PER_H, out=out)
+        np.divide(out, np.multiply(bit_area, rop, dtype=out.dtype), out=out)
+        # Axial term: WOB / bit area
+        out += np.divide(wob, bit_area * (np.pi / 4), dtype=out.dtype)
+    return out[()] if scalar else out
+
+
+def compute_doc(rop, bit_rpm, out=None, dtype=np.float64):
+    """Compute the depth of cut (in/rev), vectorized over arrays of any broadcastable shapes
+    input:
+        rop: rate of penetration (m/h)
+        bit_rpm: rotary speed (rpm)
+        out: optional output buffer of the broadcast shape, written in place
+        dtype: np.float64 or np.float32, when out is not given
     output:
-        mse: mechanical specific energy (ksi)
+        doc: depth of cut (in/rev), a scalar for scalar inputs, otherwise an array (out when given)
     """
-    wob_term = wob / (bit_diameter/2)**2 * math.pi
-    torque_term = 480 * torque * bit_rpm / (bit_diameter**2 * rop * 3.2808)
+    (rop, bit_rpm), out, scalar = prepare_kernel_output((rop, bit_rpm), out, dtype)
 
-    return wob_term + torque_term
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.multiply(rop, M_PER_H_TO_IN_PER_MIN, out=out)
+        np.divide(out, bit_rpm, out=out)
+    return out[()] if scalar else out
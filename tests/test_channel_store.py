@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from file_handle.channel_store import save_channel_store, save_channel_store_from_parquet, open_channel_store
+from file_handle.load_dataset import load_dataset
+from utils import compute_mse
+
+
+def test_channel_store_from_parquet_row_groups(tmp_path):
+    df = pd.DataFrame({"ROP (m/h)": np.arange(10, dtype=float),
+                       "well ()": ["a", "b", None, "c", "a", "d", "b", None, "e", "a"]})
+    parquet_path = str(tmp_path / "entry.parquet")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), parquet_path, row_group_size=3)
+
+    store = open_channel_store(save_channel_store_from_parquet(parquet_path, str(tmp_path / "entry.channels")))
+
+    assert isinstance(store["ROP (m/h)"].values, np.memmap)
+    assert store["ROP (m/h)"].tolist() == df["ROP (m/h)"].tolist()
+    assert store["well ()"].where(store["well ()"].notna(), None).tolist() == df["well ()"].tolist()
+
+
+def test_derived_channels_of_saved_store_are_recomputed(tmp_path):
+    # A store saved with an older MSE formula
+    df = pd.DataFrame({"WOB (klbs)": [20.0], "TORQUE (klbf-ft)": [10.0], "BIT_RPM (rpm)": [120.0],
+                       "ROP (m/h)": [30.0], "BIT_DIAMETER (in)": [8.5], "MSE (ksi)": [1.0]})
+    store_path = save_channel_store(df, str(tmp_path / "cleaned.parquet.channels"))
+
+    loaded = load_dataset(store_path, compact=False)
+
+    assert loaded["MSE (ksi)"].tolist() == [compute_mse(20.0, 120.0, 10.0, 30.0, 8.5)]
@@ -0,0 +1,121 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from data_wrangle.clean_df import chunked_iqr_bounds, clean_df
+from file_handle.standardize_single_dataset import load_file_standardize_header
+
+# The package attribute `data_wrangle.clean_df` is the function of the same name
+clean_df_module = importlib.import_module("data_wrangle.clean_df")
+
+
+def make_chunks(values, chunk_rows):
+    frame = pd.DataFrame({"ROP (m/h)": values})
+    return [frame.iloc[start:start + chunk_rows] for start in range(0, len(frame), chunk_rows)]
+
+
+def test_chunked_iqr_bounds_are_exact_below_threshold():
+    values = np.random.default_rng(0).lognormal(size=1000)
+
+    bounds = chunked_iqr_bounds(make_chunks(values, 100), ["ROP (m/h)"], approx_min_rows=None)
+
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    assert np.allclose(bounds["ROP (m/h)"], (q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)))
+
+
+def test_chunked_iqr_bounds_approximate_above_threshold():
+    values = np.random.default_rng(0).lognormal(size=20_000)
+
+    exact = chunked_iqr_bounds(make_chunks(values, 1000), ["ROP (m/h)"], approx_min_rows=None)
+    approximate = chunked_iqr_bounds(make_chunks(values, 1000), ["ROP (m/h)"], approx_min_rows=1000)
+
+    assert np.allclose(approximate["ROP (m/h)"], exact["ROP (m/h)"], rtol=0.01)
+
+
+def test_streamed_outlier_removal_matches_in_memory(tmp_path):
+    rop = np.random.default_rng(1).lognormal(size=500)
+    rop[::50] = 1000.0
+    path = tmp_path / "well_1.csv"
+    pd.DataFrame({"DEPTH": np.arange(1, 501), "ROP": rop}).to_csv(path, index=False)
+    lines = path.read_text().splitlines()
+    path.write_text("\n".join([lines[0], "m,m/h"] + lines[1:]) + "\n")
+
+    streamed = load_file_standardize_header(str(path), use_cache=False, streaming=True,
+                                            outlier_columns=["ROP (m/h)"])
+    in_memory = load_file_standardize_header(str(path), use_cache=False, streaming=False,
+                                             outlier_columns=["ROP (m/h)"])
+
+    assert len(streamed) == len(in_memory) < 500
+    assert np.allclose(streamed["ROP (m/h)"].to_numpy(), in_memory["ROP (m/h)"].to_numpy())
+
+
+def test_streamed_clean_matches_in_memory(tmp_path):
+    rng = np.random.default_rng(4)
+    rop, rpm = rng.lognormal(size=500), rng.lognormal(size=500)
+    rop[::40] = 1000.0
+    rpm[::9] = 0.0
+    path = tmp_path / "well_1.csv"
+    pd.DataFrame({"DEPTH": np.arange(1, 501), "ROP": rop, "RPM": rpm}).to_csv(path, index=False)
+    lines = path.read_text().splitlines()
+    path.write_text("\n".join([lines[0], "m,m/h,rpm"] + lines[1:]) + "\n")
+
+    options = dict(use_cache=False, channels=["DOC (in/rev)"], clean_columns=["ROP (m/h)", "BIT_RPM (rpm)"],
+                   outlier_columns=["ROP (m/h)"])
+    streamed = load_file_standardize_header(str(path), streaming=True, **options)
+    in_memory = load_file_standardize_header(str(path), streaming=False, **options)
+
+    assert len(streamed) == len(in_memory) < 500 - 500 // 9
+    assert (streamed["BIT_RPM (rpm)"] > 0).all()
+    assert np.allclose(streamed["DOC (in/rev)"].to_numpy(), in_memory["DOC (in/rev)"].to_numpy())
+
+
+def make_drilling_frame(rows=200, seed=2):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({"ROP (m/h)": rng.lognormal(size=rows), "WOB (klbf)": rng.lognormal(size=rows),
+                          "BIT_RPM (rpm)": rng.lognormal(size=rows)})
+    frame.loc[::7, "ROP (m/h)"] = 0.0
+    frame.loc[::11, "WOB (klbf)"] = np.nan
+    frame.loc[::13, "BIT_RPM (rpm)"] = -1.0
+    return frame
+
+
+def count_mask_computations(monkeypatch):
+    computed = []
+    original = clean_df_module.column_validity_mask
+
+    def counting_mask(column):
+        computed.append(column.name)
+        return original(column)
+
+    monkeypatch.setattr(clean_df_module, "column_validity_mask", counting_mask)
+    return computed
+
+
+def test_incremental_clean_reuses_cached_masks(monkeypatch):
+    frame = make_drilling_frame()
+    mask_cache = {}
+    computed = count_mask_computations(monkeypatch)
+
+    cleaned = clean_df(frame, ["ROP (m/h)"], mask_cache=mask_cache, version="v1")
+    cleaned = clean_df(cleaned, ["ROP (m/h)", "WOB (klbf)"], mask_cache=mask_cache, version="v1")
+
+    assert computed == ["ROP (m/h)", "WOB (klbf)"]
+    expected = clean_df(frame, ["ROP (m/h)", "WOB (klbf)"])
+    pd.testing.assert_frame_equal(cleaned, expected)
+    assert all(len(mask) == len(cleaned) for mask in mask_cache["masks"].values())
+
+
+def test_masks_of_another_version_are_recomputed(monkeypatch):
+    first, second = make_drilling_frame(seed=2), make_drilling_frame(seed=3)
+    mask_cache = {}
+    clean_df(first, ["BIT_RPM (rpm)"], mask_cache=mask_cache, version="v1")
+    computed = count_mask_computations(monkeypatch)
+
+    # Another dataset with the same number of rows as the cached masks
+    other = second.iloc[:len(mask_cache["masks"]["BIT_RPM (rpm)"])].reset_index(drop=True)
+    cleaned = clean_df(other, ["BIT_RPM (rpm)"], mask_cache=mask_cache, version="v2")
+
+    assert computed == ["BIT_RPM (rpm)"]
+    assert mask_cache["version"] == "v2"
+    pd.testing.assert_frame_equal(cleaned, clean_df(other, ["BIT_RPM (rpm)"]))
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from data_wrangle import add_columns
+
+
+def test_derived_channel_follows_rewritten_input():
+    df = add_columns(pd.DataFrame({"ROP (m/h)": ["10", "20"], "BIT_RPM (rpm)": [100.0, 100.0]}), ["DOC (in/rev)"])
+    doc = df["DOC (in/rev)"].to_numpy().copy()
+
+    df["ROP (m/h)"] = [20.0, 40.0]
+    df = add_columns(df, ["DOC (in/rev)"])
+
+    assert np.allclose(df["DOC (in/rev)"].to_numpy(), 2 * doc)
+
+
+def test_derived_channel_recomputed_from_its_inputs():
+    df = pd.DataFrame({"ROP (m/h)": [10.0], "BIT_RPM (rpm)": [100.0], "DOC (in/rev)": [1.0]})
+
+    assert np.allclose(add_columns(df, ["DOC (in/rev)"])["DOC (in/rev)"].to_numpy(), [10.0 * 39.3701 / 60 / 100])
+
+
+def test_derived_channel_without_inputs_is_kept():
+    df = pd.DataFrame({"ROP (m/h)": [10.0], "DOC (in/rev)": [1.0]})
+
+    assert add_columns(df, ["DOC (in/rev)"])["DOC (in/rev)"].tolist() == [1.0]
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from utils import compute_doc, compute_mse, compute_mu
+
+
+def test_mu_matches_hand_computed_value():
+    # torque / (wob * bit_diameter / 36) = 10 / (20 * 8.5 / 36)
+    assert compute_mu(20.0, 10.0, 8.5) == pytest.approx(2.1176470588)
+
+
+def test_doc_matches_hand_computed_value():
+    # 30 m/h = 30 * 39.3701 / 60 in/min, over 120 rpm
+    assert compute_doc(30.0, 120.0) == pytest.approx(0.1640420833)
+
+
+def test_mse_matches_hand_computed_value():
+    # 480 * 10 * 120 / (8.5^2 * 30 * 3.2808) + 4 * 20 / (pi * 8.5^2) = 80.99974 + 0.35245
+    assert compute_mse(20.0, 120.0, 10.0, 30.0, 8.5) == pytest.approx(81.352193)
+
+
+def test_kernels_broadcast_into_float32_buffer():
+    wob = np.array([20.0, 40.0])
+    out = np.empty(2, dtype=np.float32)
+
+    mse = compute_mse(wob, 120.0, 10.0, 30.0, 8.5, out=out)
+
+    assert mse is out
+    assert np.allclose(out, [compute_mse(20.0, 120.0, 10.0, 30.0, 8.5), compute_mse(40.0, 120.0, 10.0, 30.0, 8.5)])
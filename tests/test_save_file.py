@@ -0,0 +1,47 @@
+import io
+import os
+
+from file_handle import save_file
+
+
+def make_upload(name, data):
+    upload = io.BytesIO(data)
+    upload.name = name
+    return upload
+
+
+def test_same_bytes_under_another_name_keep_their_name(tmp_path):
+    data = b"DEPTH,ROP\nm,m/h\n1,5.5\n"
+
+    first = save_file.save_uploaded_file(make_upload("a.csv", data), str(tmp_path))
+    second = save_file.save_uploaded_file(make_upload("c.csv", data), str(tmp_path))
+    again = save_file.save_uploaded_file(make_upload("a.csv", data), str(tmp_path))
+
+    assert os.path.basename(first) == "a.csv"
+    assert os.path.basename(second) == "c.csv"
+    assert again == first
+
+
+def test_upload_already_read_is_saved_whole(tmp_path):
+    data = b"DEPTH,ROP\nm,m/h\n1,5.5\n"
+    upload = make_upload("a.csv", data)
+    upload.read()
+
+    saved = save_file.save_uploaded_file(upload, str(tmp_path))
+
+    with open(saved, "rb") as f:
+        assert f.read() == data
+
+
+def test_combined_wells_named_after_their_content(tmp_path):
+    paths = []
+    for name, data in [("a.csv", b"1"), ("b.csv", b"2"), ("c.csv", b"3")]:
+        paths.append(str(tmp_path / name))
+        with open(paths[-1], "wb") as f:
+            f.write(data)
+
+    name = save_file.get_dataset_file_name(paths[:2])
+
+    assert name.startswith("combined_2_wells_")
+    assert name == save_file.get_dataset_file_name(paths[1::-1])
+    assert name != save_file.get_dataset_file_name(paths[1:])
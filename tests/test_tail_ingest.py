@@ -0,0 +1,37 @@
+from file_handle import tail_ingest
+
+
+HEADER = "DEPTH,ROP\nm,m/h\n"
+
+
+def append_rows(path, start, stop):
+    with open(path, "a") as f:
+        f.write("".join(f"{i},{i % 7 + 1}\n" for i in range(start, stop)))
+
+
+def test_small_appends_are_merged_into_the_last_part(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text(HEADER)
+    append_rows(path, 0, 100)
+
+    assert tail_ingest.ingest_new_rows(str(path), cache_folder=str(tmp_path)) == 100
+    for start in range(100, 400, 10):
+        append_rows(path, start, start + 10)
+        tail_ingest.ingest_new_rows(str(path), cache_folder=str(tmp_path))
+
+    state = tail_ingest.read_tail_state(tail_ingest.get_tail_paths(str(path), str(tmp_path))[0])
+    df = tail_ingest.load_tail_dataset(str(path), cache_folder=str(tmp_path))
+    assert len(state["parts"]) == 1
+    assert df.iloc[:, 0].tolist() == list(range(400))
+
+
+def test_configuration_change_rebuilds_the_dataset(tmp_path, monkeypatch):
+    path = tmp_path / "log.csv"
+    path.write_text(HEADER)
+    append_rows(path, 0, 50)
+    tail_ingest.ingest_new_rows(str(path), cache_folder=str(tmp_path))
+
+    monkeypatch.setattr(tail_ingest.dataset_cache, "standardization_config_version", lambda: "changed")
+
+    assert tail_ingest.ingest_new_rows(str(path), cache_folder=str(tmp_path)) == 50
+    assert len(tail_ingest.load_tail_dataset(str(path), cache_folder=str(tmp_path))) == 50
@@ -0,0 +1,21 @@
+import io
+
+import pandas as pd
+
+from file_handle import typed_csv
+
+
+def test_infer_column_types_ignores_null_tokens():
+    sample = pd.DataFrame({0: ["NaN", "5.5", "6.5"], 1: ["NA", "", "7"], 2: ["NaN", "abc", "1"]})
+
+    assert typed_csv.infer_column_types(sample) == ["float", "float", "string"]
+
+
+def test_read_csv_typed_float_channel_starting_with_nan():
+    data = "DEPTH,ROP\nm,m/h\n1,NaN\n2,5.5\n3,6.5\n"
+
+    _, body = typed_csv.read_csv_typed(io.BytesIO(data.encode("utf-8")))
+
+    assert body[1].dtype == "float64"
+    assert body[1].isna().tolist() == [True, False, False]
+    assert body[1].iloc[1:].tolist() == [5.5, 6.5]